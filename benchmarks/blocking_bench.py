@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Page-load cost of each source with and without resource blocking.
+
+Loads every site's search page for a keyword twice per round, first with
+blocking off (full page load, nothing blocked) and then on (``eager``
+strategy plus the source's block list), and reports the median time until
+the ready selector appears, the KiB transferred and the number of requests.
+
+Each mode gets its own browser, since the page load strategy is fixed when
+Chrome starts. Byte counts come from the Performance API of the page, so
+cross-origin resources without ``Timing-Allow-Origin`` are not counted and
+the figures are a lower bound. Needs Chrome and network access.
+
+Usage:
+    python -m benchmarks.blocking_bench
+    python -m benchmarks.blocking_bench --keyword neuron --rounds 3 --sources bioart,svgrepo
+"""
+
+import argparse
+import os
+import statistics
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scrapers import blocking, utils  # noqa: E402
+from scrapers.sites import SITES  # noqa: E402
+
+MODES = (("off", False), ("on", True))
+
+
+def measure(sources, keyword, enabled, rounds):
+    """Load each source's page ``rounds`` times in one browser, per mode."""
+    blocking.configure(enabled)
+    driver = utils.get_driver(headless=True)
+    results = {}
+    try:
+        for name in sources:
+            site = SITES[name]
+            profile = site.blocking
+            runs = []
+            for _ in range(rounds):
+                blocking.apply(driver, profile)
+                runs.append(utils.load_page(driver, site.url_for(keyword), site.ready, site.ready_timeout))
+            results[name] = runs
+    finally:
+        driver.quit()
+    return results
+
+
+def _median(runs, key):
+    values = [r[key] for r in runs if r.get(key) is not None]
+    return statistics.median(values) if values else None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--keyword", default="DNA", help="Search keyword (default: DNA)")
+    parser.add_argument("--rounds", type=int, default=1, help="Loads per source and mode (default: 1)")
+    parser.add_argument("--sources", help="Comma-separated subset of sources")
+    args = parser.parse_args(argv)
+
+    sources = args.sources.split(",") if args.sources else list(SITES)
+    by_mode = {mode: measure(sources, args.keyword, enabled, args.rounds) for mode, enabled in MODES}
+
+    print(f"\n{'source':<12} {'blocking':<9} {'ready':>7} {'KiB':>8} {'requests':>9}  timeouts")
+    for name in sources:
+        for mode, _ in MODES:
+            runs = by_mode[mode][name]
+            seconds = _median(runs, "seconds")
+            kib = _median(runs, "bytes")
+            requests = _median(runs, "requests")
+            timeouts = sum(not r["ready"] for r in runs)
+            print(
+                f"{name:<12} {mode:<9} {seconds:>6.1f}s "
+                f"{'-' if kib is None else f'{kib / 1024:.0f}':>8} "
+                f"{'-' if requests is None else f'{requests:.0f}':>9}  {timeouts}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Micro-benchmark of search-page extraction per source.
+
+For every site in ``scrapers.sites`` this times ``Site.extract`` (lxml +
+precompiled XPath) against building a full ``BeautifulSoup(html, "lxml")``
+tree, the baseline every scraper used to pay before extracting anything,
+and reports peak memory for both.
+
+Pages are read from ``--fixtures DIR/<source>.html`` when present (save
+real ones with ``--save KEYWORD``, which needs Chrome); otherwise a
+synthetic SPA-sized page with the site's result markup is generated.
+
+Each case runs in a fresh process. ``py peak`` is the tracemalloc peak of
+one run and only covers the Python heap; lxml's tree lives in libxml2, so
+``tree`` also reports the resident memory held by the parsed document
+(read from /proc, so Linux only).
+
+Usage:
+    python -m benchmarks.parse_bench
+    python -m benchmarks.parse_bench --fixtures benchmarks/fixtures --repeat 20
+    python -m benchmarks.parse_bench --save DNA --fixtures benchmarks/fixtures
+"""
+
+import argparse
+import gc
+import json
+import multiprocessing
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scrapers.engine import parse_html  # noqa: E402
+from scrapers.sites import SITES  # noqa: E402
+
+KEYWORD = "dna"
+
+# One result card per source, mirroring the markup the descriptors target
+CARDS = {
+    "bioicons": '<article class="icon"><a href="/icon/cc-by-3.0/Genetics/x/{kw}_{i}">'
+                '<img src="/icons/cc-by-3.0/Genetics/x/{kw}_{i}.svg" alt="{kw}"></a></article>',
+    "bioart": '<div class="MuiPaper-root MuiCard-root css-1x2y3z"><a href="/bioart/{i}">'
+              '<img src="/api/bioarts/{i}/files/{i}.png" alt="{kw}"></a>'
+              '<div class="MuiCardContent-root"><p>{kw} {i}</p></div></div>',
+    "flaticon": '<li class="icon--item"><a href="/free-icon/{kw}_{i}" class="link">'
+                '<img src="https://cdn-icons-png.flaticon.com/128/{i}/{i}.png" alt="{kw}"></a></li>',
+    "nounproject": '<div class="GridItem-sc-9qhdhk-0 kXyZa"><a href="/icon/{kw}-{i}/">'
+                   '<img src="https://static.thenounproject.com/png/{i}-200.png" alt="{kw}"></a></div>',
+    "svgrepo": '<div class="style_Node__7ZTAV"><div class="style_NodeImage__Xe1Hf">'
+               '<a href="/svg/{i}/{kw}"><img src="https://www.svgrepo.com/show/{i}/{kw}.svg"></a>'
+               '</div></div>',
+    "pixabay": '<div class="cell"><a href="/vectors/{kw}-helix-{i}/">'
+               '<img src="https://cdn.pixabay.com/photo/2020/01/01/{i}__340.png"></a></div>',
+    "freepik": '<figure><a href="/free-vector/{kw}-set_{i}.htm">'
+               '<img src="https://img.freepik.com/free-vector/{kw}_{i}.jpg"></a></figure>',
+    "vecteezy": '<li><a href="/vector-art/{i}-{kw}-vector"><img src="https://static.vecteezy.com/{i}.jpg"></a></li>',
+}
+
+# Wrapper around the cards, so containers and cards match the descriptors
+CONTAINERS = {
+    "bioicons": '<div id="infiniteScroll"><div id="app-grid">{cards}</div></div>',
+    "bioart": '<div class="MuiGrid-container">{cards}</div>',
+    "flaticon": '<section class="search-result"><ul class="icons">{cards}</ul></section>',
+    "nounproject": '<div id="browse-page-1" class="GridContainer-abc">{cards}</div>',
+    "svgrepo": '<div class="style_nodeListing__pLl3E">{cards}</div>',
+    "pixabay": '<div class="results">{cards}</div>',
+    "freepik": '<section class="showcase">{cards}</section>',
+    "vecteezy": '<ul class="ez-resource-grid">{cards}</ul>',
+}
+
+
+def synthetic_page(source, cards=80, noise=4000, state_kb=1500, seed=0):
+    """Build a SPA-sized results page for ``source``.
+
+    The page has a large inline JSON state blob, deep navigation and
+    footer markup around the results, roughly like the real sites.
+    """
+    rng = random.Random(seed)
+    state = json.dumps([
+        {"id": i, "slug": f"{KEYWORD}-{i}", "tags": [rng.random() for _ in range(8)]}
+        for i in range(state_kb * 4)
+    ])
+    filler = "".join(
+        f'<div class="css-{rng.randrange(1 << 24):06x} Box-sc-{i % 97}">'
+        f'<span class="label">item {i}</span><a href="/category/{i}">c</a>'
+        f'<svg viewBox="0 0 24 24"><path d="M{i} 0L24 {i % 24}Z"/></svg></div>'
+        for i in range(noise)
+    )
+    results = CONTAINERS[source].format(
+        cards="".join(CARDS[source].format(kw=KEYWORD, i=i) for i in range(cards))
+    )
+    return (
+        "<!DOCTYPE html><html><head><title>search</title>"
+        f'<script id="__NEXT_DATA__" type="application/json">{state}</script>'
+        "</head><body>"
+        f"<nav>{filler[:len(filler) // 2]}</nav><main>{results}</main>"
+        f"<footer>{filler[len(filler) // 2:]}</footer></body></html>"
+    )
+
+
+def load_page(source, fixtures):
+    if fixtures:
+        path = os.path.join(fixtures, f"{source}.html")
+        if os.path.exists(path):
+            with open(path, encoding="utf-8") as f:
+                return f.read(), "fixture"
+    return synthetic_page(source), "synthetic"
+
+
+def _extract(source, html):
+    return SITES[source].extract(html)
+
+
+def _soup(source, html):
+    from bs4 import BeautifulSoup
+    return BeautifulSoup(html, "lxml")
+
+
+METHODS = {"engine": _extract, "bs4-tree": _soup}
+
+# The document each method builds, for measuring resident memory
+TREES = {"engine": lambda source, html: parse_html(html), "bs4-tree": _soup}
+
+
+def _rss_kb():
+    """Current resident set size in KiB, or 0 where /proc is unavailable."""
+    try:
+        with open("/proc/self/statm") as f:
+            pages = int(f.read().split()[1])
+    except OSError:
+        return 0
+    return pages * os.sysconf("SC_PAGE_SIZE") // 1024
+
+
+def _measure(source, method, path, repeat, queue):
+    """Child process body: tree RSS, ``repeat`` timed runs, then one traced run."""
+    with open(path, encoding="utf-8") as f:
+        html = f.read()
+    func = METHODS[method]
+    if method == "bs4-tree":
+        __import__("bs4")
+    # Measured first, before earlier runs leave freed memory in the heap
+    gc.collect()
+    rss_before = _rss_kb()
+    tree = TREES[method](source, html)
+    rss_kb = _rss_kb() - rss_before
+    del tree
+    func(source, html)  # warm up
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(source, html)
+        times.append(time.perf_counter() - start)
+    tracemalloc.start()
+    func(source, html)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    queue.put({
+        "ms": statistics.median(times) * 1000,
+        "py_peak_kb": peak / 1024,
+        "rss_kb": rss_kb,
+    })
+
+
+def run_case(source, method, path, repeat):
+    """Measure one (source, method) pair in a fresh process on the page at ``path``."""
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+    proc = ctx.Process(target=_measure, args=(source, method, path, repeat, queue))
+    proc.start()
+    result = queue.get()
+    proc.join()
+    return result
+
+
+def save_fixtures(keyword, fixtures):
+    """Render each site's real results page for ``keyword`` and save it."""
+    from scrapers import utils
+
+    os.makedirs(fixtures, exist_ok=True)
+    for name, site in SITES.items():
+        with utils.lease_driver() as driver:
+            driver.get(site.url_for(keyword))
+            utils.wait_for_ready(driver, site.ready, site.ready_timeout)
+            html = driver.page_source
+        with open(os.path.join(fixtures, f"{name}.html"), "w", encoding="utf-8") as f:
+            f.write(html)
+        print(f"  Saved {name}.html ({len(html) // 1024} KiB)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--fixtures", help="Directory of saved <source>.html pages")
+    parser.add_argument("--repeat", type=int, default=10, help="Timed runs per case (default: 10)")
+    parser.add_argument("--sources", help="Comma-separated subset of sources")
+    parser.add_argument("--save", metavar="KEYWORD", help="Save real result pages to --fixtures and exit")
+    args = parser.parse_args(argv)
+
+    if args.save:
+        if not args.fixtures:
+            parser.error("--save needs --fixtures")
+        save_fixtures(args.save, args.fixtures)
+        return
+
+    sources = args.sources.split(",") if args.sources else list(SITES)
+    methods = list(METHODS)
+    try:
+        __import__("bs4")
+    except ImportError:  # bs4 is only needed for the baseline
+        methods.remove("bs4-tree")
+
+    print(f"{'source':<12} {'page':>9} {'method':<9} {'median':>9} {'py peak':>10} {'tree':>10}  found")
+    with tempfile.TemporaryDirectory() as tmp:
+        for source in sources:
+            html, kind = load_page(source, args.fixtures)
+            found = _extract(source, html)
+            counts = f"{len(found.get('images', []))} img / {len(found['links'])} links"
+            path = os.path.join(tmp, f"{source}.html")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(html)
+            for method in methods:
+                r = run_case(source, method, path, args.repeat)
+                print(
+                    f"{source:<12} {len(html) // 1024:>6}KiB {method:<9} "
+                    f"{r['ms']:>7.1f}ms {r['py_peak_kb']:>8.0f}KiB {r['rss_kb']:>8}KiB"
+                    + (f"  {counts} ({kind})" if method == "engine" else "")
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for every source site, for offline benchmarks.
+
+Each source gets its own HTTP server on a free local port. Pages are
+served at the same paths as on the real site (see :mod:`scrapers.origins`),
+so the scrapers run unchanged once rebased onto the stand-in:
+
+* search pages come from ``--fixtures DIR/<source>.html`` when present
+  (as saved by ``benchmarks.parse_bench --save``), otherwise from the
+  synthetic pages of :mod:`benchmarks.parse_bench`;
+* SciDraw gets a home page with a plain search form, and OpenClipart gets
+  detail pages with SVG and PNG download links;
+* any path ending in an image extension gets a synthetic payload of that
+  type, the same bytes for the same path.
+
+Absolute URLs in served pages (CDN images, the site's own links) are
+rewritten to ``<stand-in>/_cdn/<host>/...`` so nothing leaves the machine.
+
+Latency is added to every response, and a share of requests can be
+answered with an error status instead.
+
+Usage:
+    python -m benchmarks.standin
+    python -m benchmarks.standin --page-latency 300 --error-rate 0.05
+"""
+
+import argparse
+import hashlib
+import os
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.parse_bench import CARDS, KEYWORD, synthetic_page  # noqa: E402
+
+SOURCES = (
+    "bioicons", "scidraw", "bioart", "flaticon",
+    "nounproject", "svgrepo", "openclipart", "pixabay",
+)
+
+CONTENT_TYPES = {
+    ".svg": "image/svg+xml",
+    ".png": "image/png",
+    ".jpg": "image/jpeg",
+    ".jpeg": "image/jpeg",
+}
+
+ABSOLUTE_URL_RE = re.compile(r"https?://([A-Za-z0-9.-]+)/")
+
+SCIDRAW_HOME = (
+    "<!DOCTYPE html><html><head><title>SciDraw</title></head><body>"
+    '<form action="/search" method="get"><input type="search" name="q" '
+    'placeholder="Search drawings"></form></body></html>'
+)
+SCIDRAW_CARD = (
+    '<div class="card"><a href="/drawing/{kw}-{i}">'
+    '<img src="/media/drawings/{kw}_{i}.svg" alt="{kw}"></a></div>'
+)
+OPENCLIPART_CARD = '<div class="artwork"><a href="/detail/{i}/{kw}-{i}">{kw} {i}</a></div>'
+OPENCLIPART_DETAIL = (
+    '<!DOCTYPE html><html><body><h2>{kw} {i}</h2>'
+    '<a href="/download/{i}/{kw}-{i}.svg">SVG</a>'
+    '<a href="/image/800px/{kw}-{i}.png">PNG</a></body></html>'
+)
+
+
+def _page(body):
+    return f"<!DOCTYPE html><html><body>{body}</body></html>"
+
+
+def payload(path, size):
+    """Synthetic image bytes of the type ``path``'s extension names."""
+    ext = os.path.splitext(path)[1].lower()
+    rng = random.Random(hashlib.sha1(path.encode()).digest())
+    if ext == ".svg":
+        head = (
+            '<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 24 24">'
+            '<path d="M0 0L24 24Z"/><!--'
+        )
+        filler = "".join(rng.choice("abcdefgh") for _ in range(max(0, size - len(head) - 9)))
+        return (head + filler + "--></svg>").encode()
+    magic = b"\x89PNG\r\n\x1a\n" if ext == ".png" else b"\xff\xd8\xff\xe0"
+    return magic + rng.randbytes(max(0, size - len(magic)))
+
+
+class StandIn:
+    """One local HTTP server per source, with latency and error injection.
+
+    Args:
+        sources (iterable): Source names to serve.
+        fixtures (str): Optional directory of saved ``<source>.html`` pages.
+        page_latency (float): Seconds added to every page response.
+        asset_latency (float): Seconds added to every image response.
+        jitter (float): Up to this many extra seconds, uniformly random.
+        error_rate (float): Share of requests answered with ``error_status``.
+        error_status (int): Status of injected errors.
+        retry_after (int): ``Retry-After`` seconds sent with injected
+            errors, or None for no header.
+        asset_kb (float): Size of each image payload in KiB.
+        cards (int): Results on each synthetic search page.
+        seed (int): Seed of the latency and error randomness.
+    """
+
+    def __init__(self, sources=SOURCES, fixtures=None, page_latency=0.0, asset_latency=0.0,
+                 jitter=0.0, error_rate=0.0, error_status=503, retry_after=None,
+                 asset_kb=16, cards=40, seed=0):
+        self.sources = list(sources)
+        self.fixtures = fixtures
+        self.page_latency = page_latency
+        self.asset_latency = asset_latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.retry_after = retry_after
+        self.asset_size = int(asset_kb * 1024)
+        self.cards = cards
+        self.origins = {}
+        self.requests = {name: 0 for name in self.sources}
+        self.errors = {name: 0 for name in self.sources}
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._servers = []
+        self._pages = {}
+
+    def start(self):
+        """Start serving and return ``{source: origin}``."""
+        for name in self.sources:
+            server = _Server(("127.0.0.1", 0), _Handler)
+            server.standin = self
+            server.source = name
+            self.origins[name] = f"http://127.0.0.1:{server.server_address[1]}"
+            threading.Thread(
+                target=server.serve_forever, name=f"standin-{name}", daemon=True
+            ).start()
+            self._servers.append(server)
+        for name in self.sources:
+            self._pages[name] = self._search_page(name)
+        return dict(self.origins)
+
+    def stop(self):
+        for server in self._servers:
+            server.shutdown()
+            server.server_close()
+        self._servers = []
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _search_page(self, name):
+        if self.fixtures:
+            path = os.path.join(self.fixtures, f"{name}.html")
+            if os.path.exists(path):
+                with open(path, encoding="utf-8") as f:
+                    return self._localize(name, f.read())
+        if name == "scidraw":
+            cards = "".join(SCIDRAW_CARD.format(kw=KEYWORD, i=i) for i in range(self.cards))
+            html = _page(f'<div class="grid-container-container">{cards}</div>')
+        elif name == "openclipart":
+            html = _page("".join(
+                OPENCLIPART_CARD.format(kw=KEYWORD, i=i) for i in range(self.cards)
+            ))
+        elif name in CARDS:
+            html = synthetic_page(name, cards=self.cards, noise=1000, state_kb=200)
+        else:
+            raise KeyError(f"no stand-in page for {name!r}")
+        return self._localize(name, html)
+
+    def _localize(self, name, html):
+        """Point absolute URLs in ``html`` at ``name``'s stand-in."""
+        return ABSOLUTE_URL_RE.sub(rf"{self.origins[name]}/_cdn/\1/", html)
+
+    def _delay_and_fault(self, name, asset):
+        """Sleep the injected latency; return True if this request should fail."""
+        with self._lock:
+            self.requests[name] += 1
+            extra = self._rng.uniform(0, self.jitter) if self.jitter else 0.0
+            fail = self.error_rate > 0 and self._rng.random() < self.error_rate
+            if fail:
+                self.errors[name] += 1
+        delay = (self.asset_latency if asset else self.page_latency) + extra
+        if delay > 0:
+            time.sleep(delay)
+        return fail
+
+    def respond(self, name, target):
+        """Return ``(status, headers, body)`` for a GET of ``target`` on ``name``."""
+        path = urlsplit(target).path
+        ext = os.path.splitext(path)[1].lower()
+        asset = ext in CONTENT_TYPES
+        if self._delay_and_fault(name, asset):
+            headers = {"Content-Type": "text/plain"}
+            if self.retry_after is not None:
+                headers["Retry-After"] = str(self.retry_after)
+            return self.error_status, headers, b"injected error"
+        if asset:
+            return 200, {"Content-Type": CONTENT_TYPES[ext]}, payload(path, self.asset_size)
+        if name == "scidraw" and path == "/":
+            html = SCIDRAW_HOME
+        elif name == "openclipart" and path.startswith("/detail/"):
+            i = path.split("/")[2]
+            html = OPENCLIPART_DETAIL.format(kw=KEYWORD, i=i)
+        else:
+            html = self._pages[name]
+        return 200, {"Content-Type": "text/html; charset=utf-8"}, html.encode()
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def handle_error(self, request, client_address):
+        # Clients dropping keep-alive connections are expected, not errors
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        status, headers, body = self.server.standin.respond(self.server.source, self.path)
+        self.send_response(status)
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def add_arguments(parser):
+    """Add the stand-in's options to ``parser`` (shared with the benchmark)."""
+    parser.add_argument("--fixtures", help="Directory of saved <source>.html pages")
+    parser.add_argument("--page-latency", type=float, default=150,
+                        help="Milliseconds added to each page response (default: 150)")
+    parser.add_argument("--asset-latency", type=float, default=40,
+                        help="Milliseconds added to each image response (default: 40)")
+    parser.add_argument("--jitter", type=float, default=20,
+                        help="Up to this many random extra milliseconds (default: 20)")
+    parser.add_argument("--error-rate", type=float, default=0.0,
+                        help="Share of requests answered with --error-status (default: 0)")
+    parser.add_argument("--error-status", type=int, default=503,
+                        help="Status of injected errors (default: 503)")
+    parser.add_argument("--retry-after", type=int,
+                        help="Retry-After seconds sent with injected errors")
+    parser.add_argument("--asset-kb", type=float, default=16,
+                        help="Size of each image in KiB (default: 16)")
+    parser.add_argument("--cards", type=int, default=40,
+                        help="Results on each synthetic search page (default: 40)")
+
+
+def from_args(args, sources=SOURCES):
+    return StandIn(
+        sources,
+        fixtures=args.fixtures,
+        page_latency=args.page_latency / 1000,
+        asset_latency=args.asset_latency / 1000,
+        jitter=args.jitter / 1000,
+        error_rate=args.error_rate,
+        error_status=args.error_status,
+        retry_after=args.retry_after,
+        asset_kb=args.asset_kb,
+        cards=args.cards,
+    )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    add_arguments(parser)
+    args = parser.parse_args(argv)
+    standin = from_args(args)
+    for name, origin in standin.start().items():
+        print(f"  {name:<12} {origin}")
+    print("Serving, Ctrl+C to stop")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        standin.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Browser startup latency with a cold and a warm Chrome probe cache.
+
+Each round times two steps, first cold (the probe cache in
+``chrome_probe.json`` and the kept chromedriver are deleted beforehand) and
+then warm (both reused): detecting the Chrome version, and launching a
+headless driver up to a blank page. Reports the median seconds per step and
+mode. The cold launch lets ``undetected_chromedriver`` fetch and patch a
+chromedriver, so it needs Chrome and, unless one is already downloaded,
+network access.
+
+Usage:
+    python -m benchmarks.startup_bench
+    python -m benchmarks.startup_bench --rounds 5
+"""
+
+import argparse
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from scrapers import chromeprobe, utils  # noqa: E402
+
+
+def _timed(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def _forget_memory():
+    """Drop the in-process probe but keep the disk cache, as a new run would."""
+    chromeprobe._probe = None
+
+
+def launch():
+    driver = utils.get_driver(headless=True)
+    try:
+        driver.get("about:blank")
+    finally:
+        driver.quit()
+
+
+def measure(rounds):
+    """Return ``{(step, mode): [seconds, ...]}``."""
+    times = {}
+    for _ in range(rounds):
+        for mode in ("cold", "warm"):
+            if mode == "cold":
+                chromeprobe.clear()
+            _forget_memory()
+            seconds, _ = _timed(chromeprobe.probe)
+            times.setdefault(("probe", mode), []).append(seconds)
+            _forget_memory()
+            seconds, _ = _timed(launch)
+            times.setdefault(("launch", mode), []).append(seconds)
+    return times
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--rounds", type=int, default=3, help="Cold/warm pairs (default: 3)")
+    args = parser.parse_args(argv)
+
+    times = measure(args.rounds)
+    print(f"\n{'step':<8} {'cold':>8} {'warm':>8}")
+    for step in ("probe", "launch"):
+        cold = statistics.median(times[(step, "cold")])
+        warm = statistics.median(times[(step, "warm")])
+        print(f"{step:<8} {cold:>7.2f}s {warm:>7.2f}s")
+
+
+if __name__ == "__main__":
+    main()
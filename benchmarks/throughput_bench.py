@@ -0,0 +1,219 @@
+#!/usr/bin/env python3
+"""
+End-to-end throughput of the scrapers against a local stand-in of each site.
+
+Starts :mod:`benchmarks.standin`, points every source at it (see
+:mod:`scrapers.origins`) and scrapes a list of keywords through the normal
+orchestration, by default or with ``--pipeline`` / ``--tabs``. Reports
+keywords per minute, downloaded assets per second, p50/p95 latency of each
+unit (one source for one keyword) and of each stage, the outcome counts and
+the peak resident memory. With ``--pipeline`` the stages are the pipeline's
+own; otherwise they are the phases recorded by :mod:`scrapers.spans`. No request leaves the
+machine, so runs are comparable across commits.
+
+Without ``--browser`` no Chrome is started: every descriptor-based source
+takes its HTTP path (the stand-in's pages need no JavaScript), and SciDraw,
+which always needs the browser, is left out. With ``--browser`` sources keep
+their usual transport and Chrome loads the stand-in's pages.
+
+Results and HTTP caches are off, and rate limiting is off unless ``--rate``
+is given, so the orchestration and download paths are what gets measured.
+
+Usage:
+    python -m benchmarks.throughput_bench
+    python -m benchmarks.throughput_bench --keywords 20 --pipeline
+    python -m benchmarks.throughput_bench --error-rate 0.05 --retry-after 1 --rate 8
+    python -m benchmarks.throughput_bench --browser --tabs
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks import standin  # noqa: E402
+from bioimagedownloader.pipeline import Pipeline  # noqa: E402
+from bioimagedownloader.report import percentile  # noqa: E402
+from bioimagedownloader.runner import run_keyword, source_name  # noqa: E402
+from scrapers import (  # noqa: E402
+    downloader,
+    origins,
+    ratelimit,
+    resultcache,
+    spans,
+    scrape_bioart,
+    scrape_bioicons,
+    scrape_flaticon,
+    scrape_nounproject,
+    scrape_openclipart,
+    scrape_pixabay,
+    scrape_scidraw,
+    scrape_svgrepo,
+    utils,
+)
+from scrapers.sites import SITES  # noqa: E402
+from scrapers.transport import HTTP  # noqa: E402
+
+SCRAPERS = [
+    scrape_bioicons,
+    scrape_scidraw,
+    scrape_bioart,
+    scrape_flaticon,
+    scrape_nounproject,
+    scrape_svgrepo,
+    scrape_openclipart,
+    scrape_pixabay,
+]
+
+# Sources that cannot run without Chrome
+BROWSER_ONLY = frozenset({"scidraw"})
+
+# Span phases reported as stages outside --pipeline, in report order
+SPAN_STAGES = ("navigate", "ready", "fetch", "extract", "download", "write")
+
+
+def peak_rss_mb():
+    """Peak resident memory of this process and of its reaped children, in MiB."""
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None, None
+    unit = 1024 * 1024 if sys.platform == "darwin" else 1024  # bytes vs KiB
+    own = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / unit
+    children = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss / unit
+    return own, children
+
+
+def _no_browser(*args, **kwargs):
+    raise RuntimeError("no browser in this benchmark run (use --browser)")
+
+
+def run(args, keywords, scrapers, folder):
+    """Scrape ``keywords`` and return ``(summaries, stages, wall seconds)``."""
+    jobs = []
+    for keyword in keywords:
+        keyword_folder = os.path.join(folder, keyword)
+        os.makedirs(keyword_folder, exist_ok=True)
+        jobs.append((keyword, keyword_folder, scrapers))
+
+    start = time.perf_counter()
+    if args.pipeline:
+        pipeline = Pipeline(
+            browsers=args.workers, parse_workers=args.parse_workers, deadline=args.deadline
+        )
+        by_keyword = pipeline.run(jobs)
+        summaries = [r for keyword in keywords for r in by_keyword[keyword]]
+        stages = {stage.name: stage.durations for stage in pipeline.stages}
+    else:
+        recorder = spans.Recorder()
+        spans.configure(recorder)
+        summaries = []
+        try:
+            for keyword, keyword_folder, _ in jobs:
+                summaries += run_keyword(
+                    keyword, keyword_folder, scrapers=scrapers, workers=args.workers,
+                    tabs=args.tabs, deadline=args.deadline,
+                )
+        finally:
+            spans.configure(None)
+        stages = {name: [] for name in SPAN_STAGES}
+        for span in recorder.spans():
+            if span.name in stages:
+                stages[span.name].append(span.duration)
+    return summaries, stages, time.perf_counter() - start
+
+
+def report(summaries, stages, wall, keywords, server):
+    units = [r["elapsed"] for r in summaries]
+    assets = sum(r["downloaded"] for r in summaries)
+    statuses = {}
+    for r in summaries:
+        statuses[r["status"]] = statuses.get(r["status"], 0) + 1
+
+    print(f"\n  {len(keywords)} keyword(s) x {len(summaries) // max(1, len(keywords))} "
+          f"source(s) in {wall:.1f}s")
+    print(f"  keywords/min   {len(keywords) / wall * 60:>8.1f}")
+    print(f"  assets/sec     {assets / wall:>8.1f}   ({assets} downloaded)")
+    print(f"  outcomes       {', '.join(f'{k} {v}' for k, v in sorted(statuses.items()))}")
+    requests = sum(server.requests.values())
+    errors = sum(server.errors.values())
+    print(f"  requests       {requests:>8}   ({errors} injected errors)")
+
+    print(f"\n  {'latency':<10} {'p50':>8} {'p95':>8} {'n':>6}")
+    rows = [("unit", units)] + list(stages.items())
+    for name, values in rows:
+        p50, p95 = percentile(values, 50), percentile(values, 95)
+        if p50 is None:
+            continue
+        print(f"  {name:<10} {p50:>7.2f}s {p95:>7.2f}s {len(values):>6}")
+
+    own, children = peak_rss_mb()
+    if own is not None:
+        print(f"\n  peak RSS       {own:>8.1f} MiB   (children {children:.1f} MiB)")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[1])
+    parser.add_argument("--keywords", type=int, default=10,
+                        help="Number of keywords to scrape (default: 10)")
+    parser.add_argument("--sources", help="Comma-separated subset of sources")
+    parser.add_argument("--workers", type=int, default=3,
+                        help="Sources in parallel, or browsers with --pipeline (default: 3)")
+    parser.add_argument("--pipeline", action="store_true", help="Use the staged pipeline")
+    parser.add_argument("--parse-workers", type=int, default=2,
+                        help="Parse processes with --pipeline (default: 2)")
+    parser.add_argument("--tabs", action="store_true", help="One browser, a tab per source")
+    parser.add_argument("--browser", action="store_true",
+                        help="Allow Chrome and keep each source's own transport")
+    parser.add_argument("--download-workers", type=int, default=8,
+                        help="Concurrent image downloads (default: 8)")
+    parser.add_argument("--per-host", type=int, default=4,
+                        help="Concurrent image downloads per host (default: 4)")
+    parser.add_argument("--retries", type=int, default=3, help="Download retries (default: 3)")
+    parser.add_argument("--rate", type=float, default=0,
+                        help="Requests per second per host, 0 for no limit (default: 0)")
+    parser.add_argument("--deadline", type=float, default=180,
+                        help="Seconds per unit (default: 180)")
+    parser.add_argument("--verbose", action="store_true", help="Show the scrapers' output")
+    standin.add_arguments(parser)
+    args = parser.parse_args(argv)
+    if args.tabs and args.pipeline:
+        parser.error("--tabs and --pipeline cannot be combined")
+
+    scrapers = SCRAPERS
+    if args.sources:
+        wanted = set(args.sources.split(","))
+        scrapers = [s for s in scrapers if source_name(s) in wanted]
+    if not args.browser:
+        scrapers = [s for s in scrapers if source_name(s) not in BROWSER_ONLY]
+        for site in SITES.values():
+            site.transport = HTTP
+        utils.get_driver = _no_browser
+    names = [source_name(s) for s in scrapers]
+    keywords = [f"{standin.KEYWORD}{i}" for i in range(args.keywords)]
+
+    resultcache.configure(None)
+    ratelimit.configure(rate=args.rate or ratelimit.DEFAULT_RATE, enabled=args.rate > 0)
+    downloader.configure(
+        per_host=args.per_host, max_workers=args.download_workers, retries=args.retries,
+    )
+
+    server = standin.from_args(args, names)
+    with server, tempfile.TemporaryDirectory(prefix="throughput_bench_") as folder:
+        previous = origins.rebase(server.origins)
+        output = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+        try:
+            with output:
+                summaries, stages, wall = run(args, keywords, scrapers, folder)
+        finally:
+            origins.rebase(previous)
+    report(summaries, stages, wall, keywords, server)
+
+
+if __name__ == "__main__":
+    main()
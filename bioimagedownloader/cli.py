@@ -5,77 +5,373 @@ Command-line interface for BioImageDownloader.
 This is the entry point used by the `bioimagedownloader` console script.
 """
 
+import argparse
 import os
 import sys
 import time
 
+from bioimagedownloader.journal import JOURNAL_NAME, open_journal
+from bioimagedownloader.pipeline import PARSE_WORKERS, Pipeline
+from bioimagedownloader.report import REPORT_NAME, SPAN_LOG_NAME, write_report
+from bioimagedownloader.runner import (
+    DEFAULT_DEADLINE,
+    DEFAULT_SCRAPERS,
+    DEFAULT_WORKERS,
+    print_summary,
+    run_keyword,
+    source_name,
+)
 from scrapers import (
-    scrape_bioicons,
-    scrape_scidraw,
-    scrape_bioart,
-    scrape_flaticon,
-    scrape_nounproject,
-    scrape_freepik,
-    scrape_vecteezy,
-    scrape_pixabay,
-    scrape_svgrepo,
-    scrape_openclipart,
+    blocking,
+    cassette,
+    downloader,
+    profiling,
+    ratelimit,
+    resultcache,
+    spans,
 )
+from scrapers.httpcache import HTTPCache
+from scrapers.store import ObjectStore
+
+
+def add_run_arguments(parser):
+    """Add the scraping options shared by a run and ``serve`` to ``parser``."""
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=DEFAULT_WORKERS,
+        help=f"Number of sources to scrape in parallel (default: {DEFAULT_WORKERS})",
+    )
+    parser.add_argument(
+        "--tabs",
+        action="store_true",
+        help="Use one browser with a tab per source instead of a browser per "
+        "worker (much less memory, --workers is ignored)",
+    )
+    parser.add_argument(
+        "--download-workers",
+        type=int,
+        default=8,
+        help="Maximum concurrent image downloads overall (default: 8)",
+    )
+    parser.add_argument(
+        "--per-host",
+        type=int,
+        default=4,
+        help="Maximum concurrent image downloads per host (default: 4)",
+    )
+    parser.add_argument(
+        "--max-download-mb",
+        type=float,
+        default=50,
+        help="Abort image downloads larger than this many MiB, 0 for no limit (default: 50)",
+    )
+    parser.add_argument(
+        "--deadline",
+        type=float,
+        default=DEFAULT_DEADLINE,
+        help="Seconds one source may take per keyword, from waiting for a "
+        "browser to the last download; its browser is killed after that, "
+        f"0 for no limit (default: {DEFAULT_DEADLINE})",
+    )
+    parser.add_argument(
+        "--rate",
+        type=float,
+        default=ratelimit.DEFAULT_RATE,
+        help="Starting requests per second per host for pages and downloads; "
+        "adapts to 429/503 and timeouts, 0 to disable "
+        f"(default: {ratelimit.DEFAULT_RATE:g})",
+    )
+    parser.add_argument(
+        "--retries",
+        type=int,
+        default=3,
+        help="Retries with backoff for downloads that time out or get "
+        "429/5xx (default: 3)",
+    )
+    parser.add_argument(
+        "--dedup",
+        action="store_true",
+        help="Store each unique image once under Output/.objects and link it "
+        "into keyword folders",
+    )
+    parser.add_argument(
+        "--no-http-cache",
+        dest="http_cache",
+        action="store_false",
+        help="Do not cache downloaded images under Output/.cache/http",
+    )
+    parser.add_argument(
+        "--http-cache-ttl",
+        type=float,
+        default=24,
+        help="Hours a cached image is reused before revalidation (default: 24)",
+    )
+    parser.add_argument(
+        "--http-cache-mb",
+        type=float,
+        default=500,
+        help="Size budget of the HTTP cache in MiB (default: 500)",
+    )
+    parser.add_argument(
+        "--results-ttl",
+        type=float,
+        default=6,
+        help="Hours cached search results are reused without opening a "
+        "browser, 0 to disable (default: 6)",
+    )
+    parser.add_argument(
+        "--refresh",
+        action="store_true",
+        help="Ignore cached search results and render every search page again",
+    )
+    parser.add_argument(
+        "--no-block-resources",
+        dest="block_resources",
+        action="store_false",
+        help="Let the browser load images, fonts, media and trackers, and wait "
+        "for the full page load (for comparison runs)",
+    )
+    parser.add_argument(
+        "--limit",
+        type=int,
+        help="Download at most this many images per source and keyword",
+    )
+
+
+def parse_args(argv=None):
+    """Parse command-line arguments.
+
+    Keywords may be given as separate arguments and/or comma-separated.
+    """
+    parser = argparse.ArgumentParser(
+        prog="bioimagedownloader",
+        description="Download biology/science icons from multiple sources.",
+        epilog="Run 'bioimagedownloader serve --help' for the long-running "
+        "daemon with an HTTP/JSON API.",
+    )
+    parser.add_argument(
+        "keywords",
+        nargs="*",
+        help="Comma-separated keywords, e.g. DNA, neuron, protein",
+    )
+    add_run_arguments(parser)
+    parser.add_argument(
+        "--pipeline",
+        action="store_true",
+        help="Run all keywords through navigate/parse/download stages, so "
+        "browsers move on while pages are parsed and images download",
+    )
+    parser.add_argument(
+        "--parse-workers",
+        type=int,
+        default=PARSE_WORKERS,
+        help=f"Processes parsing page sources with --pipeline (default: {PARSE_WORKERS})",
+    )
+    parser.add_argument(
+        "--record",
+        metavar="DIR",
+        help="Save every page read, the extracted results and every "
+        "downloaded image to a cassette in DIR (results cache is bypassed)",
+    )
+    parser.add_argument(
+        "--replay",
+        metavar="DIR",
+        help="Rerun from the cassette in DIR recorded with --record: no "
+        "browser and no network, results are compared with the recording",
+    )
+    parser.add_argument(
+        "--span-log",
+        action="store_true",
+        help=f"Also write every timed phase to Output/{SPAN_LOG_NAME} as "
+        f"OpenTelemetry-style JSON lines (Output/{REPORT_NAME} is always written)",
+    )
+    parser.add_argument(
+        "--profile",
+        choices=(profiling.CPU, profiling.MEMORY),
+        help="Profile each source: 'cpu' writes cProfile stats and collapsed "
+        "stacks per source, 'mem' the top allocations of each keyword/source "
+        "pair, to Output/profile (on Python 3.12+ 'cpu' runs one worker and "
+        "cannot be combined with --tabs or --pipeline)",
+    )
+    parser.add_argument(
+        "--profile-top",
+        type=int,
+        default=profiling.DEFAULT_TOP,
+        help=f"Allocation sites listed per pair with --profile mem "
+        f"(default: {profiling.DEFAULT_TOP})",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help=f"Skip keyword/source pairs already completed according to "
+        f"Output/{JOURNAL_NAME}; failed and partial ones are retried",
+    )
+    args = parser.parse_args(argv)
+    if args.tabs and args.pipeline:
+        parser.error("--tabs and --pipeline cannot be combined")
+    if args.record and args.replay:
+        parser.error("--record and --replay cannot be combined")
+    if args.profile == profiling.CPU and profiling.PROCESS_WIDE and (args.tabs or args.pipeline):
+        # Sources overlap in these modes, and one profile holds the hook
+        parser.error("--profile cpu cannot be combined with --tabs or --pipeline "
+                     "on Python 3.12+")
+    user_input = " ".join(args.keywords)
+    args.keywords = [k.strip() for k in user_input.split(",") if k.strip()]
+    return args
+
+
+def configure(args, base_folder, tape=None):
+    """Set up the shared caches, limits and downloader from ``args``.
+
+    Args:
+        args: Options added by :func:`add_run_arguments`.
+        base_folder (str): Output folder holding the caches.
+        tape (Cassette): Cassette being recorded or replayed, if any.
+    """
+    store = ObjectStore(os.path.join(base_folder, ".objects")) if args.dedup else None
+    cache = None
+    if args.http_cache:
+        cache = HTTPCache(
+            os.path.join(base_folder, ".cache", "http"),
+            ttl=args.http_cache_ttl * 3600,
+            max_bytes=int(args.http_cache_mb * 1024 * 1024),
+        )
+    cassette.configure(tape)
+
+    results = None
+    # Cached results would skip the pages a cassette records or replays
+    if args.results_ttl > 0 and tape is None:
+        results = resultcache.ResultCache(
+            os.path.join(base_folder, ".cache", "results"),
+            ttl=args.results_ttl * 3600,
+            negative_ttl=min(args.results_ttl * 3600, resultcache.DEFAULT_NEGATIVE_TTL),
+            refresh=args.refresh,
+        )
+    resultcache.configure(results)
+    blocking.configure(args.block_resources)
+    ratelimit.configure(rate=args.rate or ratelimit.DEFAULT_RATE, enabled=args.rate > 0)
+    downloader.configure(
+        per_host=args.per_host,
+        max_workers=args.download_workers,
+        max_bytes=int(args.max_download_mb * 1024 * 1024),
+        store=store,
+        cache=cache,
+        retries=args.retries,
+        limit=args.limit,
+    )
+
+
+def run(args, base_folder="Output"):
+    """Scrape every keyword in ``args.keywords`` into ``base_folder``."""
+    # Create base output folder
+    os.makedirs(base_folder, exist_ok=True)
+
+    tape = None
+    if args.record:
+        tape = cassette.Cassette(args.record, cassette.RECORD)
+    elif args.replay:
+        tape = cassette.Cassette(args.replay, cassette.REPLAY)
+    configure(args, base_folder, tape)
+
+    profiler = None
+    if args.profile == profiling.CPU:
+        if profiling.PROCESS_WIDE and args.workers != 1:
+            print("  --profile cpu: cProfile is process-wide on Python 3.12+, "
+                  "using --workers 1")
+            args.workers = 1
+        profiler = profiling.CPUProfiler()
+    elif args.profile == profiling.MEMORY:
+        profiler = profiling.MemoryProfiler(top=args.profile_top)
+    profiling.configure(profiler)
 
+    recorder = spans.Recorder()
+    spans.configure(recorder)
+    started = time.time()
+    mode = "pipeline" if args.pipeline else "tabs" if args.tabs else "threads"
+
+    journal = open_journal(base_folder)
+    try:
+        jobs = []
+        for keyword in args.keywords:
+            scrapers = DEFAULT_SCRAPERS
+            if args.resume:
+                scrapers = [
+                    s for s in scrapers
+                    if not journal.is_complete(keyword, source_name(s))
+                ]
+                if not scrapers:
+                    print(f"\n  Skipping '{keyword}': already complete")
+                    continue
+            # Create keyword folder
+            keyword_folder = os.path.join(base_folder, keyword)
+            os.makedirs(keyword_folder, exist_ok=True)
+            jobs.append((keyword, keyword_folder, scrapers))
+
+        if args.pipeline:
+            pipeline = Pipeline(
+                browsers=args.workers, parse_workers=args.parse_workers, journal=journal,
+                deadline=args.deadline,
+            )
+            by_keyword = pipeline.run(jobs)
+            for keyword, _, _ in jobs:
+                print_summary(keyword, by_keyword[keyword])
+            pipeline.print_report()
+            return
+
+        # Process each keyword
+        for keyword, keyword_folder, scrapers in jobs:
+            print(f"\n{'=' * 60}")
+            print(f"  Processing keyword: {keyword}")
+            print("=" * 60)
+            skipped = len(DEFAULT_SCRAPERS) - len(scrapers)
+            if skipped:
+                print(f"  Resuming: {skipped} source(s) already complete")
+
+            results = run_keyword(
+                keyword, keyword_folder, scrapers=scrapers,
+                workers=args.workers, journal=journal, tabs=args.tabs,
+                deadline=args.deadline,
+            )
+            print_summary(keyword, results)
+    finally:
+        journal.close()
+        spans.configure(None)
+        path = write_report(
+            base_folder, recorder, started, args.keywords, mode, span_log=args.span_log
+        )
+        print(f"\n  Run report: {path}")
+        if profiler is not None:
+            profiling.configure(None)
+            for path in profiler.write(os.path.join(base_folder, "profile")):
+                print(f"  Profile: {path}")
+
+
+def main(argv=None):
+    """Main function to run all scrapers, or the daemon with ``serve``."""
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] == "serve":
+        # Imported here: the server module builds on this one
+        from bioimagedownloader.server import main as serve
+        serve(argv[1:])
+        return
 
-def main():
-    """Main function to run all scrapers."""
     print("=" * 60)
     print("  BIO IMAGE DOWNLOADER")
     print("  Downloads biology/science icons from multiple sources")
     print("=" * 60)
 
-    # Get keywords from command line arguments
-    if len(sys.argv) > 1:
-        # Join all arguments and split by comma
-        user_input = " ".join(sys.argv[1:])
-        keywords = [k.strip() for k in user_input.split(",") if k.strip()]
-    else:
-        print("\nUsage: bioimagedownloader DNA, neuron, protein")
-        print("No keywords provided. Exiting.")
-        return
+    args = parse_args(argv)
+    keywords = args.keywords
 
     if not keywords:
+        print("\nUsage: bioimagedownloader DNA, neuron, protein")
         print("No keywords provided. Exiting.")
         return
 
     print(f"\nProcessing {len(keywords)} keyword(s): {', '.join(keywords)}")
 
-    # Create base output folder
-    base_folder = "Output"
-    os.makedirs(base_folder, exist_ok=True)
-
-    # Process each keyword
-    for keyword in keywords:
-        print(f"\n{'=' * 60}")
-        print(f"  Processing keyword: {keyword}")
-        print("=" * 60)
-
-        # Create keyword folder
-        keyword_folder = os.path.join(base_folder, keyword)
-        os.makedirs(keyword_folder, exist_ok=True)
-
-        # Call selected scrapers
-        scrapers = [
-            scrape_bioicons,
-            scrape_scidraw,
-            scrape_bioart,
-            scrape_flaticon,
-            scrape_nounproject,
-            scrape_svgrepo,
-        ]
-
-        for scraper in scrapers:
-            try:
-                scraper(keyword, keyword_folder)
-            except Exception as e:
-                print(f"  Error in {scraper.__name__}: {e}")
-            time.sleep(2)  # Small delay between scrapers
+    run(args)
 
     print(f"\n{'=' * 60}")
     print("  DONE! Check the Output folder for results.")
@@ -84,4 +380,3 @@ def main():
 
 if __name__ == "__main__":
     main()
-
@@ -0,0 +1,91 @@
+"""
+Append-only completion journal for resumable runs.
+
+Every (keyword, source) unit that finishes is appended as one JSON line to
+``journal.jsonl`` in the output folder. A later run started with
+``--resume`` reads the journal back and skips units whose latest record is
+complete, so only failed or partial units are scraped again.
+"""
+
+import json
+import os
+import threading
+import time
+
+JOURNAL_NAME = "journal.jsonl"
+
+# Statuses (see runner.run_source) that mark a unit as done
+COMPLETE = frozenset({"ok", "empty"})
+
+
+class Journal:
+    """Record the outcome of each (keyword, source) unit.
+
+    The file is opened once in append mode and each record is written as a
+    single line and flushed, without fsync, so journaling costs one small
+    ``write`` per unit. A torn last line left by a crash is ignored on load
+    and terminated, so the next record starts on a line of its own.
+
+    Args:
+        path (str): Journal file, e.g. ``Output/journal.jsonl``.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self._latest = {}
+        self._lock = threading.Lock()
+        torn = self._load()
+        self._file = open(path, "a", encoding="utf-8")
+        if torn:
+            self._file.write("\n")
+            self._file.flush()
+
+    def _load(self):
+        """Read the records back; True if the last line is unterminated."""
+        try:
+            f = open(self.path, encoding="utf-8")
+        except FileNotFoundError:
+            return False
+        line = ""
+        with f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                    self._latest[(record["keyword"], record["source"])] = record
+                except (ValueError, KeyError, TypeError):
+                    continue
+        return bool(line) and not line.endswith("\n")
+
+    def is_complete(self, keyword, source):
+        """True if the latest record for ``(keyword, source)`` is complete."""
+        record = self._latest.get((keyword, source))
+        return record is not None and record["status"] in COMPLETE
+
+    def record(self, result):
+        """Append a :func:`runner.run_source` summary to the journal."""
+        record = {
+            "keyword": result["keyword"],
+            "source": result["source"],
+            "status": result["status"],
+            "downloaded": result["downloaded"],
+            "links": result["links"],
+            "failed": result.get("failed", 0),
+            "transport": result.get("transport"),
+            "error": result["error"],
+            "elapsed": result.get("elapsed"),
+            "ts": round(time.time(), 3),
+        }
+        line = json.dumps(record) + "\n"
+        with self._lock:
+            self._file.write(line)
+            self._file.flush()
+            self._latest[(record["keyword"], record["source"])] = record
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+def open_journal(folder):
+    """Open (creating if needed) the journal in an output ``folder``."""
+    return Journal(os.path.join(folder, JOURNAL_NAME))
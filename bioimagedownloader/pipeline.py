@@ -0,0 +1,344 @@
+"""
+Pipelined scraping: navigate -> parse -> download, connected by bounded queues.
+
+In the default mode each source loads its page, waits, extracts and
+downloads in one chain, so its browser is idle while images download. Here
+every (keyword, source) unit flows through three stages instead:
+
+* **navigate** - one thread per browser. Loads the search page (or fetches
+  it over HTTP, finds it in the results cache, or reads it from a replayed
+  cassette) and takes a snapshot:
+  the raw values of the in-browser extraction, or the page source. The
+  browser goes back to the pool and the thread moves on to the next unit
+  as soon as the snapshot is queued.
+* **parse** - turns snapshots into candidates. Page sources are parsed in a
+  process pool, off the GIL; in-browser extraction results only need
+  filtering and are handled in the stage's thread.
+* **download** - downloads the images, writes link files and journals the
+  unit.
+
+The queues between stages are bounded, so a slow stage holds back the one
+before it rather than piling up page sources in memory. Scrapers that are
+not built on :mod:`scrapers.engine` (SciDraw, OpenClipart) drive the page
+themselves and run whole on the download stage.
+
+Each stage's busy time and queue depths are printed at the end.
+"""
+
+import multiprocessing
+import queue
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from bioimagedownloader.runner import (
+    CIRCUIT_OPEN,
+    DEFAULT_DEADLINE,
+    FAILED,
+    circuit_allows,
+    describe_span,
+    source_name,
+    summarize,
+)
+from scrapers import cassette, profiling, ratelimit, spans, utils, watchdog
+from scrapers.engine import count_items
+from scrapers.resultcache import is_empty, lookup, store
+from scrapers.sites import SITES
+from scrapers.transport import BROWSER, CACHE, HTTP, REPLAY, fetch_page
+
+PARSE_WORKERS = 2
+DOWNLOAD_WORKERS = 4
+QUEUE_SIZE = 4
+
+_STOP = object()
+
+
+def _parse_html(name, html):
+    """Process-pool body: the raw values of ``name``'s rules in a page source.
+
+    URLs are resolved by the caller, whose sites may have been rebased
+    (see :mod:`scrapers.origins`).
+    """
+    return SITES[name].groups(html)
+
+
+class _Unit:
+    """One (keyword, source) pair moving through the pipeline."""
+
+    def __init__(self, keyword, folder, scraper):
+        self.keyword = keyword
+        self.folder = folder
+        self.scraper = scraper
+        self.source = source_name(scraper)
+        self.site = SITES.get(self.source)
+        self.url = self.site.url_for(keyword) if self.site else None
+        self.transport = None  # what served the page: http, browser or cache
+        self.snapshot = None
+        self.candidates = None
+        self.force_browser = False
+        self.start = None
+        self.span = spans.NO_SPAN  # root span, opened when work on the unit starts
+        self.profile = None  # see scrapers.profiling.unit_started
+
+
+class Stage:
+    """A pool of threads draining a queue, with utilization statistics.
+
+    Args:
+        name (str): Stage name used in the report.
+        handler (callable): Called with each queued item.
+        workers (int): Number of threads.
+        maxsize (int): Queue bound, 0 for unbounded.
+    """
+
+    def __init__(self, name, handler, workers, maxsize=0):
+        self.name = name
+        self.handler = handler
+        self.workers = workers
+        self.queue = queue.Queue(maxsize)
+        self.maxsize = maxsize
+        self.busy = 0.0
+        self.items = 0
+        self.durations = []  # seconds per item, for latency percentiles
+        self.max_depth = 0
+        self._depth_sum = 0
+        self._puts = 0
+        self._lock = threading.Lock()
+        self._threads = []
+
+    def put(self, item):
+        self.queue.put(item)
+        depth = self.queue.qsize()
+        with self._lock:
+            self.max_depth = max(self.max_depth, depth)
+            self._depth_sum += depth
+            self._puts += 1
+
+    def start(self, on_error):
+        for i in range(self.workers):
+            thread = threading.Thread(
+                target=self._work, args=(on_error,),
+                name=f"{self.name}-{i}", daemon=True,
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def stop(self):
+        for _ in self._threads:
+            self.queue.put(_STOP)
+        for thread in self._threads:
+            thread.join()
+
+    def _work(self, on_error):
+        while True:
+            item = self.queue.get()
+            if item is _STOP:
+                return
+            start = time.perf_counter()
+            try:
+                # Phases timed by the handler go under the unit's own span
+                with profiling.scope(item.source), spans.activate(item.span):
+                    self.handler(item)
+            except Exception as e:
+                on_error(item, e)
+            finally:
+                elapsed = time.perf_counter() - start
+                with self._lock:
+                    self.busy += elapsed
+                    self.items += 1
+                    self.durations.append(elapsed)
+
+    def report(self, wall):
+        """One summary line: busy share of ``wall`` seconds and queue depths."""
+        busy = self.busy / (wall * self.workers) if wall > 0 else 0
+        line = (
+            f"    {self.name:<9} {self.workers:>2} worker(s) {busy:>5.0%} busy "
+            f"{self.items:>4} item(s)"
+        )
+        if self._puts:
+            bound = self.maxsize or "-"
+            line += (
+                f"  queue max {self.max_depth}/{bound}, "
+                f"avg {self._depth_sum / self._puts:.1f}"
+            )
+        return line
+
+
+class Pipeline:
+    """Run (keyword, source) units through the navigate/parse/download stages.
+
+    Args:
+        browsers (int): Navigate threads, and so live browsers.
+        parse_workers (int): Parse threads and processes.
+        download_workers (int): Download threads.
+        queue_size (int): Bound of the parse and download queues.
+        journal: Optional :class:`~bioimagedownloader.journal.Journal`.
+        deadline (float): Seconds a unit may take from the start of its
+            navigation, or None. Browser loads and downloads that run past
+            it are abandoned (see :mod:`scrapers.watchdog`).
+    """
+
+    def __init__(self, browsers=3, parse_workers=PARSE_WORKERS,
+                 download_workers=DOWNLOAD_WORKERS, queue_size=QUEUE_SIZE, journal=None,
+                 deadline=DEFAULT_DEADLINE):
+        self.journal = journal
+        self.deadline = deadline
+        self.parse_workers = parse_workers
+        # The navigate queue holds the whole work list plus units sent back
+        # by the parse stage, so it must not block
+        self.navigate = Stage("navigate", self._navigate, browsers)
+        self.parse = Stage("parse", self._parse, parse_workers, queue_size)
+        self.download = Stage("download", self._download, download_workers, queue_size)
+        self.stages = (self.navigate, self.parse, self.download)
+        self._results = {}
+        self._pending = 0
+        self._done = threading.Condition()
+        self._processes = None
+
+    def run(self, jobs):
+        """Scrape every job and return ``{keyword: [summary, ...]}``.
+
+        Args:
+            jobs (list): ``(keyword, folder, scrapers)`` tuples.
+        """
+        units = [
+            _Unit(keyword, folder, scraper)
+            for keyword, folder, scrapers in jobs
+            for scraper in scrapers
+        ]
+        self._pending = len(units)
+        utils.get_pool().resize(self.navigate.workers)
+        start = time.perf_counter()
+        with ProcessPoolExecutor(
+            max_workers=self.parse_workers,
+            mp_context=multiprocessing.get_context("spawn"),
+        ) as self._processes:
+            for stage in self.stages:
+                stage.start(self._fail)
+            for unit in units:
+                if unit.site is not None:
+                    self.navigate.put(unit)
+            # Queued last: these may block on the bounded download queue
+            for unit in units:
+                if unit.site is None:
+                    self.download.put(unit)
+            with self._done:
+                self._done.wait_for(lambda: self._pending == 0)
+            for stage in self.stages:
+                stage.stop()
+        self.wall = time.perf_counter() - start
+        return {
+            keyword: [self._results[(keyword, source_name(s))] for s in scrapers]
+            for keyword, _, scrapers in jobs
+        }
+
+    def print_report(self):
+        print(f"\n  Pipeline stages ({self.wall:.1f}s):")
+        for stage in self.stages:
+            print(stage.report(self.wall))
+
+    def _finish(self, unit, outcome, error=None, status=None):
+        result = summarize(
+            unit.source, unit.keyword, outcome, error, unit.start, self.journal, status
+        )
+        describe_span(unit.span, result)
+        unit.span.end()
+        profiling.unit_finished(unit.profile)
+        if error != CIRCUIT_OPEN:
+            ratelimit.get_breaker().record(unit.source, result["status"] not in FAILED)
+        with self._done:
+            self._results[(unit.keyword, unit.source)] = result
+            self._pending -= 1
+            self._done.notify_all()
+
+    def _fail(self, unit, error):
+        unit.span.fail(error)
+        if isinstance(error, watchdog.DeadlineExceeded):
+            self._finish(unit, None, str(error), "timeout")
+            return
+        print(f"  {unit.source} error for '{unit.keyword}': {error}")
+        self._finish(unit, None, str(error))
+
+    def _guarded(self, unit, func, *args):
+        """Call ``func(*args)`` within what is left of the unit's deadline."""
+        if not self.deadline:
+            return func(*args)
+        left = self.deadline - (time.perf_counter() - unit.start)
+        if left <= 0:
+            raise watchdog.DeadlineExceeded(f"timed out after {self.deadline:g}s")
+        return watchdog.run_with_deadline(f"{unit.source}/{unit.keyword}", left, func, *args)
+
+    def _navigate(self, unit):
+        site = unit.site
+        if unit.start is None:
+            if not circuit_allows(unit.source):
+                self._finish(unit, None, CIRCUIT_OPEN)
+                return
+            unit.start = time.perf_counter()
+            unit.profile = profiling.unit_started(unit.source, unit.keyword)
+            unit.span = spans.start("unit", source=unit.source, keyword=unit.keyword)
+            with spans.activate(unit.span):
+                return self._navigate(unit)
+        print(f"\n[{site.label}] Searching for: {unit.keyword}")
+        if not unit.force_browser:
+            candidates = lookup(site.name, unit.keyword, unit.url)
+            if candidates is not None:
+                unit.transport, unit.candidates = CACHE, candidates
+                self.download.put(unit)
+                return
+            if cassette.replaying():
+                unit.transport = REPLAY
+                unit.snapshot = ("html", cassette.replay_page(unit.url))
+                self.parse.put(unit)
+                return
+            if site.transport == HTTP:
+                print(f"  Fetching: {unit.url}")
+                html = fetch_page(unit.url)
+                if html is not None:
+                    unit.transport, unit.snapshot = HTTP, ("html", html)
+                    self.parse.put(unit)
+                    return
+                print("  Falling back to browser")
+        snapshot = self._guarded(unit, self._snapshot, site, unit.url)
+        unit.transport, unit.snapshot = BROWSER, snapshot
+        self.parse.put(unit)
+
+    @staticmethod
+    def _snapshot(site, url):
+        with utils.lease_driver(site.blocking) as driver:
+            utils.load_page(driver, url, site.ready, site.ready_timeout)
+            return site.snapshot(driver)
+
+    def _parse(self, unit):
+        kind, data = unit.snapshot
+        unit.snapshot = None
+        with spans.span("extract", method="script" if kind == "groups" else kind) as span:
+            if kind == "html":
+                span.set(bytes=len(data))
+                data = self._processes.submit(_parse_html, unit.source, data).result()
+            candidates = unit.site.candidates(data)
+            span.set(items=count_items(candidates))
+        if unit.transport == HTTP and is_empty(candidates):
+            print(f"  [{unit.site.label}] HTTP fetch found no results, falling back to browser")
+            unit.force_browser = True
+            self.navigate.put(unit)
+            return
+        store(unit.source, unit.keyword, unit.url, candidates)
+        unit.candidates = candidates
+        self.download.put(unit)
+
+    def _download(self, unit):
+        if unit.site is None:
+            if not circuit_allows(unit.source):
+                self._finish(unit, None, CIRCUIT_OPEN)
+                return
+            unit.start = time.perf_counter()
+            unit.profile = profiling.unit_started(unit.source, unit.keyword)
+            unit.span = spans.start("unit", source=unit.source, keyword=unit.keyword)
+            with spans.activate(unit.span):
+                outcome = self._guarded(unit, unit.scraper, unit.keyword, unit.folder)
+        else:
+            outcome = self._guarded(
+                unit, unit.site.save, unit.keyword, unit.folder, unit.candidates, unit.transport
+            )
+        self._finish(unit, outcome)
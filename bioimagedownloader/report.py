@@ -0,0 +1,152 @@
+"""
+Machine-readable run report, built from the spans of a run.
+
+Every (keyword, source) unit is timed as a tree of spans (see
+:mod:`scrapers.spans`): waiting for a browser (``driver.acquire``),
+``navigate``, the ``ready`` wait, HTTP ``fetch``, ``extract``, each image
+``download`` and its ``write`` into place. At the end of a run the spans
+are aggregated into ``run_report.json`` in the output folder:
+
+* ``units`` - one entry per unit with its outcome and the count, seconds,
+  bytes and errors of each phase;
+* ``sources`` - per source and phase, the count, total / p50 / p95 / max
+  seconds, bytes, items and error classes;
+* ``phases`` - the same across all sources.
+
+Phases nest (a ``write`` is part of its ``download``, a ``ready`` wait
+is not part of ``navigate``), so phase seconds of one unit do not add up
+to its wall time. Browser work shared by several units in tab mode is
+reported under the source ``shared``.
+
+With ``--span-log`` the raw spans are also written to ``spans.jsonl``, one
+OpenTelemetry-style span per line.
+"""
+
+import json
+import os
+import time
+
+REPORT_NAME = "run_report.json"
+SPAN_LOG_NAME = "spans.jsonl"
+
+# Source of spans that belong to no single unit (tab batches)
+SHARED = "shared"
+
+
+def percentile(values, p):
+    """Linearly interpolated ``p``-th percentile of ``values``, or None."""
+    if not values:
+        return None
+    values = sorted(values)
+    k = (len(values) - 1) * p / 100
+    low = int(k)
+    high = min(low + 1, len(values) - 1)
+    return values[low] + (values[high] - values[low]) * (k - low)
+
+
+class _Phase:
+    """Running totals of one phase."""
+
+    def __init__(self):
+        self.durations = []
+        self.bytes = 0
+        self.items = 0
+        self.errors = {}
+
+    def add(self, span):
+        self.durations.append(span.duration)
+        self.bytes += span.attrs.get("bytes") or 0
+        self.items += span.attrs.get("items") or 0
+        error = span.attrs.get("error")
+        if error:
+            self.errors[error] = self.errors.get(error, 0) + 1
+
+    def summary(self, percentiles=True):
+        summary = {
+            "count": len(self.durations),
+            "seconds": round(sum(self.durations), 3),
+        }
+        if percentiles:
+            summary.update(
+                p50=round(percentile(self.durations, 50), 3),
+                p95=round(percentile(self.durations, 95), 3),
+                max=round(max(self.durations), 3),
+            )
+        if self.bytes:
+            summary["bytes"] = self.bytes
+        if self.items:
+            summary["items"] = self.items
+        if self.errors:
+            summary["errors"] = dict(sorted(self.errors.items()))
+        return summary
+
+
+def _summaries(phases, percentiles=True):
+    return {name: phase.summary(percentiles) for name, phase in sorted(phases.items())}
+
+
+def build_report(recorder, started, keywords, mode):
+    """Aggregate the spans in ``recorder`` into the report dict.
+
+    Args:
+        recorder (Recorder): Spans of the run.
+        started (float): Start of the run, seconds since the epoch.
+        keywords (list): Keywords of the run.
+        mode (str): ``"threads"``, ``"tabs"`` or ``"pipeline"``.
+    """
+    finished = recorder.spans()
+    roots = {s.trace_id: s for s in finished if s.parent_id is None}
+
+    units = {}  # root span id -> {phase name: _Phase}
+    by_source = {}
+    overall = {}
+    for span in finished:
+        if span.parent_id is None and span.name == "unit":
+            continue
+        root = roots.get(span.trace_id)
+        if root is not None and root.name == "unit":
+            source = root.attrs.get("source")
+            unit_phases = units.setdefault(root.span_id, {})
+            unit_phases.setdefault(span.name, _Phase()).add(span)
+        else:
+            source = SHARED
+        by_source.setdefault(source, {}).setdefault(span.name, _Phase()).add(span)
+        overall.setdefault(span.name, _Phase()).add(span)
+
+    unit_entries = []
+    for root in sorted(roots.values(), key=lambda s: s.start):
+        if root.name != "unit":
+            continue
+        entry = dict(root.attrs)
+        entry["seconds"] = round(root.duration, 3)
+        entry["phases"] = _summaries(units.get(root.span_id, {}), percentiles=False)
+        unit_entries.append(entry)
+
+    return {
+        "started": time.strftime("%Y-%m-%dT%H:%M:%S%z", time.localtime(started)),
+        "wall_seconds": round(time.time() - started, 3),
+        "mode": mode,
+        "keywords": list(keywords),
+        "units": unit_entries,
+        "sources": {
+            source: _summaries(phases) for source, phases in sorted(by_source.items())
+        },
+        "phases": _summaries(overall),
+    }
+
+
+def write_report(folder, recorder, started, keywords, mode, span_log=False):
+    """Write ``run_report.json`` (and ``spans.jsonl`` with ``span_log``) to ``folder``.
+
+    Returns:
+        str: Path of the report.
+    """
+    path = os.path.join(folder, REPORT_NAME)
+    report = build_report(recorder, started, keywords, mode)
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    os.replace(tmp, path)
+    if span_log:
+        recorder.write_log(os.path.join(folder, SPAN_LOG_NAME))
+    return path
@@ -0,0 +1,211 @@
+"""
+Concurrent orchestration of the scrapers for a keyword.
+
+Each source runs as an independent unit on a bounded thread pool. Workers
+lease their own browser from the shared driver pool, so a slow or failing
+source never blocks or breaks the others. In tab mode all sources run at
+once against a single browser, with one tab per source page.
+"""
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import nullcontext
+
+from scrapers import (
+    scrape_bioicons,
+    scrape_scidraw,
+    scrape_bioart,
+    scrape_flaticon,
+    scrape_nounproject,
+    scrape_svgrepo,
+    profiling,
+    ratelimit,
+    spans,
+    utils,
+    watchdog,
+)
+from scrapers.engine import leave_batch, tab_batch
+from scrapers.sites import SITES
+
+DEFAULT_SCRAPERS = [
+    scrape_bioicons,
+    scrape_scidraw,
+    scrape_bioart,
+    scrape_flaticon,
+    scrape_nounproject,
+    scrape_svgrepo,
+]
+
+DEFAULT_WORKERS = 3
+
+# Wall-clock seconds one keyword/source unit may take, all steps included
+DEFAULT_DEADLINE = 180
+
+# Statuses that count against a source's circuit breaker
+FAILED = frozenset({"error", "timeout"})
+
+# Error recorded for sources skipped by their circuit breaker
+CIRCUIT_OPEN = "circuit open"
+
+
+def source_name(scraper):
+    """Return the short source name for a scraper, e.g. ``bioart``."""
+    return scraper.__name__.replace("scrape_", "", 1)
+
+
+def run_source(scraper, keyword, folder, journal=None, deadline=DEFAULT_DEADLINE):
+    """Run one scraper and return a summary dict for it.
+
+    Scrapers return ``{"downloaded": n, "links": m}`` on success, optionally
+    with ``"failed"`` (image downloads that did not succeed) and
+    ``"transport"`` (``"http"``, ``"browser"`` or ``"cache"``), and ``None``
+    when they failed; any exception that still escapes is caught here so it
+    stays isolated to this source. The summary is appended to ``journal`` as
+    soon as the source finishes.
+
+    A source that failed several times in a row is skipped until its
+    circuit breaker (see :mod:`scrapers.ratelimit`) lets a retry through.
+
+    The whole unit, from waiting for a browser to the last download, must
+    finish within ``deadline`` seconds (None or 0 for no limit). Otherwise
+    its browser is killed (see :mod:`scrapers.watchdog`) and the unit is
+    recorded with status ``timeout``.
+
+    The unit is timed as a root span (see :mod:`scrapers.spans`) and
+    profiled under its source's name (see :mod:`scrapers.profiling`).
+    """
+    source = source_name(scraper)
+    if not circuit_allows(source):
+        # Or the other sources of a tab batch would wait for this one
+        leave_batch(source)
+        return summarize(source, keyword, None, CIRCUIT_OPEN, journal=journal)
+    start = time.perf_counter()
+    outcome = error = status = None
+    profile = profiling.unit_started(source, keyword)
+    with profiling.scope(source), spans.detached(), \
+            spans.span("unit", source=source, keyword=keyword) as span:
+        try:
+            outcome = watchdog.run_with_deadline(
+                f"{source}/{keyword}", deadline, scraper, keyword, folder
+            )
+        except watchdog.DeadlineExceeded as e:
+            error, status = str(e), "timeout"
+            span.fail(e)
+        except Exception as e:
+            print(f"  Error in {scraper.__name__}: {e}")
+            error = str(e)
+            span.fail(e)
+        result = summarize(source, keyword, outcome, error, start, journal, status)
+        describe_span(span, result)
+    profiling.unit_finished(profile)
+    ratelimit.get_breaker().record(source, result["status"] not in FAILED)
+    return result
+
+
+def describe_span(span, result):
+    """Copy the outcome of a unit's summary onto its span."""
+    span.set(
+        status=result["status"],
+        downloaded=result["downloaded"],
+        failed=result["failed"],
+        transport=result["transport"],
+    )
+
+
+def circuit_allows(source):
+    """True unless ``source``'s circuit breaker is open (then say so)."""
+    if ratelimit.get_breaker().allow(source):
+        return True
+    print(f"\n  Skipping {source}: failed too often, circuit open")
+    return False
+
+
+def summarize(source, keyword, outcome, error=None, start=None, journal=None, status=None):
+    """Build the summary dict of one finished source (see :func:`run_source`).
+
+    ``start`` is the ``time.perf_counter()`` value when work on the source
+    began, and ``status`` overrides the one derived from ``outcome``. The
+    summary is appended to ``journal`` when one is given.
+    """
+    result = {
+        "source": source,
+        "keyword": keyword,
+        "status": "error",
+        "downloaded": 0,
+        "links": 0,
+        "failed": 0,
+        "transport": None,
+        "error": error,
+    }
+    if outcome is not None:
+        result.update(outcome)
+        if result["failed"]:
+            result["status"] = "partial"
+        elif outcome["downloaded"] or outcome["links"]:
+            result["status"] = "ok"
+        else:
+            result["status"] = "empty"
+    if status is not None:
+        result["status"] = status
+    elapsed = 0 if start is None else time.perf_counter() - start
+    result["elapsed"] = round(elapsed, 2)
+    if journal is not None:
+        journal.record(result)
+    return result
+
+
+def run_keyword(keyword, folder, scrapers=None, workers=DEFAULT_WORKERS, journal=None,
+                tabs=False, deadline=DEFAULT_DEADLINE):
+    """Run all ``scrapers`` for one keyword across ``workers`` threads.
+
+    Each finished source is recorded in ``journal`` (a
+    :class:`~bioimagedownloader.journal.Journal`) when one is given, and
+    each is limited to ``deadline`` seconds (see :func:`run_source`).
+
+    With ``tabs`` a single browser is used: every scraper runs at once
+    (``workers`` is ignored), the descriptor-based sources that need the
+    browser load their pages together in one tab each, and the other
+    scrapers (e.g. SciDraw) take turns with that browser.
+
+    Returns:
+        list of dict: One summary per scraper, in the order given.
+    """
+    scrapers = DEFAULT_SCRAPERS if scrapers is None else scrapers
+    batch = nullcontext()
+    if tabs:
+        workers = max(1, len(scrapers))
+        utils.get_pool().resize(1)
+        batch = tab_batch(
+            name for name in map(source_name, scrapers) if name in SITES
+        )
+    else:
+        workers = max(1, min(workers, len(scrapers)))
+        utils.get_pool().resize(workers)
+
+    with batch, ThreadPoolExecutor(max_workers=workers, thread_name_prefix="scraper") as executor:
+        futures = [
+            executor.submit(run_source, scraper, keyword, folder, journal, deadline)
+            for scraper in scrapers
+        ]
+        return [future.result() for future in futures]
+
+
+def print_summary(keyword, results):
+    """Print a per-source summary table for a keyword.
+
+    The transport column shows what served each search: ``http`` (no
+    browser), ``browser`` or ``cache`` (results cache, no request at all).
+    """
+    print(f"\n  Summary for '{keyword}':")
+    for r in results:
+        line = (
+            f"    {r['source']:<12} {r['status']:<7} {r['transport'] or '-':<7} "
+            f"{r['downloaded']:>3} files {r['links']:>3} links  {r['elapsed']:>6.1f}s"
+        )
+        if r["failed"]:
+            line += f"  ({r['failed']} failed)"
+        if r["error"]:
+            line += f"  ({r['error']})"
+        print(line)
+    browsers = sum(r["transport"] == "browser" for r in results)
+    print(f"    Browser used for {browsers} of {len(results)} source(s)")
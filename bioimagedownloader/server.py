@@ -0,0 +1,360 @@
+"""
+Long-running daemon: warm browsers and connections, jobs over local HTTP.
+
+``bioimagedownloader serve`` pays the imports, Chrome detection and browser
+launches once, at startup. The driver pool, the downloader's per-host
+sessions, the caches and the rate limits then stay warm between jobs, so a
+job costs about as much as its page loads and downloads.
+
+API (JSON in, NDJSON out):
+
+* ``POST /jobs`` with ``{"keywords": ["DNA", "neuron"], "sources":
+  ["bioicons", "svgrepo"], "limit": 5}`` (``sources`` and ``limit`` are
+  optional). The response streams one JSON event per line: ``queued``,
+  ``started``, ``unit`` for each finished source of a keyword (the summary
+  also written to the journal), ``keyword`` once all its sources are done
+  and ``done``, or ``error``. Invalid jobs get a 400, and a full queue a
+  503 with ``Retry-After``.
+* ``GET /health``: queued and running jobs, and live and idle browsers.
+
+Jobs run one at a time, in the order received; the sources of a job run in
+parallel on ``--workers`` threads as in a normal run. At most
+``--queue-size`` jobs wait behind the running one. Further jobs are refused
+rather than queued, so clients back off instead of piling up work.
+
+Usage:
+    bioimagedownloader serve --port 8765 --workers 3
+    curl -N -d '{"keywords": ["DNA"], "limit": 5}' http://127.0.0.1:8765/jobs
+"""
+
+import argparse
+import itertools
+import json
+import os
+import queue
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import scrapers
+from bioimagedownloader.cli import add_run_arguments, configure
+from bioimagedownloader.journal import open_journal
+from bioimagedownloader.runner import DEFAULT_SCRAPERS, print_summary, run_keyword, source_name
+from scrapers import downloader, utils
+
+DEFAULT_PORT = 8765
+DEFAULT_QUEUE_SIZE = 8
+
+# Seconds a client is told to wait when the queue is full
+RETRY_AFTER = 5
+
+# Largest accepted job body, in bytes
+MAX_BODY = 64 * 1024
+
+SOURCES = {
+    source_name(scraper): scraper
+    for scraper in (getattr(scrapers, name) for name in scrapers.__all__)
+}
+
+_ids = itertools.count(1)
+
+
+def _names(value, field):
+    """A list of names from a JSON list or a comma-separated string."""
+    if isinstance(value, str):
+        value = value.split(",")
+    if not isinstance(value, list) or not all(isinstance(v, str) for v in value):
+        raise ValueError(f"'{field}' must be a list of strings or a comma-separated string")
+    return [v.strip() for v in value if v.strip()]
+
+
+class Job:
+    """One submitted request: keywords, the scrapers to run and a download limit.
+
+    Events for the client are put on :attr:`events`, followed by None once
+    the job is over.
+    """
+
+    def __init__(self, keywords, scrapers, limit=None):
+        self.id = next(_ids)
+        self.keywords = keywords
+        self.scrapers = scrapers
+        self.limit = limit
+        self.events = queue.Queue()
+
+    @classmethod
+    def from_json(cls, payload):
+        """Validate a decoded job body.
+
+        Raises:
+            ValueError: The body is not a valid job.
+        """
+        if not isinstance(payload, dict):
+            raise ValueError("the job must be a JSON object")
+        keywords = _names(payload.get("keywords", []), "keywords")
+        if not keywords:
+            raise ValueError("no keywords given")
+        for keyword in keywords:
+            # Keywords become folder names
+            if "/" in keyword or "\\" in keyword or keyword in (".", ".."):
+                raise ValueError(f"invalid keyword {keyword!r}")
+
+        scrapers = DEFAULT_SCRAPERS
+        if payload.get("sources") is not None:
+            names = _names(payload["sources"], "sources")
+            unknown = [n for n in names if n not in SOURCES]
+            if unknown:
+                raise ValueError(
+                    f"unknown sources {unknown}, choose from {sorted(SOURCES)}"
+                )
+            scrapers = [SOURCES[n] for n in names]
+            if not scrapers:
+                raise ValueError("no sources given")
+
+        limit = payload.get("limit")
+        if limit is not None and (
+            not isinstance(limit, int) or isinstance(limit, bool) or limit < 1
+        ):
+            raise ValueError("'limit' must be a positive integer")
+        return cls(keywords, scrapers, limit)
+
+    def emit(self, event, **fields):
+        self.events.put({"event": event, "job": self.id, **fields})
+
+    def stream(self):
+        """Yield the job's events until it is over."""
+        while True:
+            event = self.events.get()
+            if event is None:
+                return
+            yield event
+
+
+class _Progress:
+    """Journal stand-in that also streams each finished unit to the client."""
+
+    def __init__(self, job, journal):
+        self.job = job
+        self.journal = journal
+
+    def record(self, result):
+        self.journal.record(result)
+        self.job.emit("unit", result=result)
+
+
+class Daemon:
+    """Run jobs one at a time from a bounded queue.
+
+    Args:
+        args: Options added by :func:`~bioimagedownloader.cli.add_run_arguments`.
+        base_folder (str): Output folder.
+        queue_size (int): Jobs that may wait behind the running one.
+    """
+
+    def __init__(self, args, base_folder, queue_size=DEFAULT_QUEUE_SIZE):
+        self.args = args
+        self.base_folder = base_folder
+        self.jobs = queue.Queue(max(1, queue_size))
+        self.running = None
+        self.journal = open_journal(base_folder)
+        self._thread = threading.Thread(target=self._work, name="jobs", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        """Finish the running job, drop the queued ones and close the journal."""
+        while True:
+            try:
+                job = self.jobs.get_nowait()
+            except queue.Empty:
+                break
+            if job is not None:
+                job.emit("error", error="server shutting down")
+                job.events.put(None)
+        self.jobs.put(None)
+        self._thread.join()
+        self.journal.close()
+
+    def warm(self):
+        """Launch the browsers the first job will need."""
+        pool = utils.get_pool()
+        pool.resize(1 if self.args.tabs else self.args.workers)
+        start = time.perf_counter()
+        try:
+            pool.warm()
+        except Exception as e:
+            print(f"[server] Could not start browsers, sources that need one will fail: {e}")
+            return
+        print(f"[server] {pool.stats()['idle']} browser(s) ready in "
+              f"{time.perf_counter() - start:.1f}s")
+
+    def submit(self, job):
+        """Queue ``job``.
+
+        Raises:
+            queue.Full: Too many jobs are waiting.
+        """
+        position = self.jobs.qsize() + (self.running is not None)
+        # Emitted first, as the worker may start the job at once
+        job.emit("queued", position=position)
+        self.jobs.put_nowait(job)
+
+    def status(self):
+        running = self.running
+        return {
+            "status": "ok",
+            "queued": self.jobs.qsize(),
+            "queue_size": self.jobs.maxsize,
+            "running": running.id if running is not None else None,
+            "browsers": utils.get_pool().stats(),
+        }
+
+    def _work(self):
+        while True:
+            job = self.jobs.get()
+            if job is None:
+                return
+            self.running = job
+            try:
+                self._run(job)
+            except Exception as e:
+                print(f"[server] Job {job.id} failed: {e}")
+                job.emit("error", error=str(e))
+            finally:
+                self.running = None
+                job.events.put(None)
+
+    def _run(self, job):
+        print(f"\n[server] Job {job.id}: {', '.join(job.keywords)}")
+        job.emit("started")
+        start = time.perf_counter()
+        downloader.get_downloader().limit = (
+            job.limit if job.limit is not None else self.args.limit
+        )
+        progress = _Progress(job, self.journal)
+        downloaded = 0
+        for keyword in job.keywords:
+            folder = os.path.join(self.base_folder, keyword)
+            os.makedirs(folder, exist_ok=True)
+            results = run_keyword(
+                keyword, folder, scrapers=job.scrapers, workers=self.args.workers,
+                journal=progress, tabs=self.args.tabs, deadline=self.args.deadline,
+            )
+            print_summary(keyword, results)
+            downloaded += sum(r["downloaded"] for r in results)
+            job.emit("keyword", keyword=keyword, folder=os.path.abspath(folder), results=results)
+        job.emit("done", downloaded=downloaded, elapsed=round(time.perf_counter() - start, 2))
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, address, daemon):
+        super().__init__(address, _Handler)
+        self.daemon = daemon
+
+
+class _Handler(BaseHTTPRequestHandler):
+    # HTTP/1.0: the end of a streamed response is marked by closing the connection
+    server_version = "bioimagedownloader"
+
+    def do_GET(self):
+        if self.path == "/health":
+            self._reply(200, self.server.daemon.status())
+        else:
+            self._reply(404, {"error": "not found"})
+
+    def do_POST(self):
+        if self.path != "/jobs":
+            self._reply(404, {"error": "not found"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            if length < 0:
+                raise ValueError
+        except ValueError:
+            self._reply(400, {"error": "invalid Content-Length"})
+            return
+        if length > MAX_BODY:
+            self._reply(413, {"error": f"job body over {MAX_BODY} bytes"})
+            return
+        try:
+            job = Job.from_json(json.loads(self.rfile.read(length) or b"{}"))
+        except ValueError as e:
+            self._reply(400, {"error": str(e)})
+            return
+        try:
+            self.server.daemon.submit(job)
+        except queue.Full:
+            self._reply(
+                503, {"error": "job queue is full, retry later"},
+                {"Retry-After": str(RETRY_AFTER)},
+            )
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/x-ndjson")
+        self.end_headers()
+        for event in job.stream():
+            try:
+                self.wfile.write(json.dumps(event).encode() + b"\n")
+                self.wfile.flush()
+            except OSError:
+                # The client left; the job still runs to completion
+                return
+
+    def _reply(self, status, body, headers=None):
+        data = json.dumps(body).encode() + b"\n"
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for key, value in (headers or {}).items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        print(f"[server] {self.address_string()} {format % args}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(
+        prog="bioimagedownloader serve",
+        description="Keep browsers warm and take scraping jobs over a local HTTP/JSON API.",
+    )
+    parser.add_argument("--host", default="127.0.0.1",
+                        help="Address to listen on (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT,
+                        help=f"Port to listen on (default: {DEFAULT_PORT})")
+    parser.add_argument("--queue-size", type=int, default=DEFAULT_QUEUE_SIZE,
+                        help="Jobs that may wait behind the running one before new "
+                        f"jobs are refused with 503 (default: {DEFAULT_QUEUE_SIZE})")
+    parser.add_argument("--output", default="Output",
+                        help="Output folder (default: Output)")
+    parser.add_argument("--no-warm", dest="warm", action="store_false",
+                        help="Do not launch browsers at startup")
+    add_run_arguments(parser)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Serve jobs until interrupted."""
+    args = parse_args(argv)
+    os.makedirs(args.output, exist_ok=True)
+    configure(args, args.output)
+
+    daemon = Daemon(args, args.output, args.queue_size)
+    if args.warm:
+        daemon.warm()
+    daemon.start()
+    server = _Server((args.host, args.port), daemon)
+    host, port = server.server_address[:2]
+    print(f"[server] Listening on http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        daemon.stop()
@@ -0,0 +1,80 @@
+"""Network blocking profiles for the scraping browser.
+
+Scrapers only read the DOM of search pages and fetch the images they want
+through the downloader afterwards, so thumbnails, web fonts, media and
+analytics scripts loaded by Chrome are wasted bandwidth and time. A
+:class:`BlockingProfile` is applied to a driver on every lease with the CDP
+command ``Network.setBlockedURLs``; since pooled drivers serve many
+sources, each source can allow categories or patterns its pages need.
+"""
+
+from selenium.common.exceptions import WebDriverException
+
+# URL patterns per category (``*`` matches any run of characters)
+CATEGORIES = {
+    "images": (
+        "*.png*", "*.jpg*", "*.jpeg*", "*.gif*", "*.webp*", "*.avif*",
+        "*.ico*", "*.bmp*",
+    ),
+    "fonts": ("*.woff*", "*.ttf*", "*.otf*", "*.eot*"),
+    "media": ("*.mp4*", "*.webm*", "*.m3u8*", "*.mp3*", "*.ogg*", "*.wav*"),
+    "trackers": (
+        "*google-analytics.com*", "*googletagmanager.com*", "*doubleclick.net*",
+        "*googlesyndication.com*", "*adservice.google.*", "*amazon-adsystem.com*",
+        "*connect.facebook.net*", "*hotjar.com*", "*segment.com*", "*segment.io*",
+        "*clarity.ms*", "*criteo.*", "*taboola.com*", "*outbrain.com*",
+        "*nr-data.net*", "*newrelic.com*", "*sentry.io*", "*intercom.io*",
+        "*optimizely.com*", "*quantserve.com*", "*scorecardresearch.com*",
+    ),
+}
+
+
+class BlockingProfile:
+    """URL patterns to block while a source's pages load.
+
+    Args:
+        allow (iterable): Category names from :data:`CATEGORIES` and/or
+            individual patterns that must not be blocked for this source.
+    """
+
+    def __init__(self, allow=()):
+        allow = set(allow)
+        unknown = {a for a in allow if "*" not in a and a not in CATEGORIES}
+        if unknown:
+            raise ValueError(f"unknown blocking categories: {sorted(unknown)}")
+        self.allow = frozenset(allow)
+        self.patterns = [
+            pattern
+            for category, patterns in CATEGORIES.items() if category not in allow
+            for pattern in patterns if pattern not in allow
+        ]
+
+
+DEFAULT_PROFILE = BlockingProfile()
+
+_enabled = True
+
+
+def configure(enabled=True):
+    """Turn resource blocking on or off for all subsequent leases."""
+    global _enabled
+    _enabled = enabled
+
+
+def is_enabled():
+    return _enabled
+
+
+def apply(driver, profile=None):
+    """Install ``profile`` (default :data:`DEFAULT_PROFILE`) on ``driver``.
+
+    With blocking disabled the block list is cleared, so a pooled driver
+    never keeps a previous source's list.
+    """
+    profile = DEFAULT_PROFILE if profile is None else profile
+    patterns = profile.patterns if _enabled else []
+    try:
+        driver.execute_cdp_cmd("Network.enable", {})
+        driver.execute_cdp_cmd("Network.setBlockedURLs", {"urls": patterns})
+    except (WebDriverException, AttributeError) as e:
+        print(f"[blocking] Could not set blocked URLs: {e}")
@@ -0,0 +1,204 @@
+"""Record and replay cassettes: rerun the scrapers on exactly the same pages.
+
+While recording, every page a scraper reads (the text of an HTTP fetch, or
+the browser's rendered ``page_source``), the candidates extracted for each
+(source, keyword) and every downloaded asset are written to the cassette
+directory. When replaying, the same scraper functions run with pages and
+assets read back from it: no browser, no network and no rate limiting, so
+a replay runs at parse-and-write speed. Replayed candidates are compared to
+the recorded ones, so a changed selector shows up at once.
+
+Layout of a cassette directory::
+
+    pages/<sha1 of URL>.html
+    assets/<sha1 of URL><detected extension>
+    <source>/<keyword>.json    URL, page file and candidates of one search
+
+Pages and assets are keyed by URL alone, as the recording hooks in the
+transport, browser and downloader layers do not know which search they
+serve; the per-search manifests tie them together.
+"""
+
+import hashlib
+import json
+import os
+import re
+import shutil
+import threading
+
+RECORD = "record"
+REPLAY = "replay"
+
+
+class CassetteMiss(LookupError):
+    """A replayed scraper asked for a page that was not recorded."""
+
+
+def _key(url):
+    return hashlib.sha1(url.encode("utf-8")).hexdigest()
+
+
+def _summary(candidates):
+    return ", ".join(f"{len(v)} {k}" for k, v in sorted(candidates.items()))
+
+
+class Cassette:
+    """A cassette directory opened for recording or replaying.
+
+    Args:
+        root (str): Cassette directory.
+        mode (str): ``"record"`` or ``"replay"``.
+    """
+
+    def __init__(self, root, mode):
+        if mode not in (RECORD, REPLAY):
+            raise ValueError(f"unknown cassette mode {mode!r}")
+        if mode == REPLAY and not os.path.isdir(root):
+            raise FileNotFoundError(f"no cassette at {root}")
+        self.root = root
+        self.mode = mode
+        self._lock = threading.Lock()
+        self._assets = None  # sha1 -> file name, listed on first replayed asset
+        if mode == RECORD:
+            for sub in ("pages", "assets"):
+                os.makedirs(os.path.join(root, sub), exist_ok=True)
+
+    def _page_path(self, url):
+        return os.path.join(self.root, "pages", _key(url) + ".html")
+
+    def _manifest_path(self, source, keyword):
+        name = re.sub(r"[^\w.-]+", "_", keyword.lower().strip()) or "_"
+        return os.path.join(self.root, source, name + ".json")
+
+    def record_page(self, url, html):
+        path = self._page_path(url)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(html)
+        os.replace(tmp, path)
+
+    def page(self, url):
+        """The recorded page at ``url``, or None."""
+        try:
+            with open(self._page_path(url), encoding="utf-8") as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def record_candidates(self, source, keyword, url, candidates):
+        path = self._manifest_path(source, keyword)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        page = os.path.relpath(self._page_path(url), self.root)
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({
+                "source": source,
+                "keyword": keyword,
+                "url": url,
+                "page": page.replace(os.sep, "/"),
+                "candidates": candidates,
+            }, f, indent=2)
+
+    def recorded_candidates(self, source, keyword):
+        try:
+            with open(self._manifest_path(source, keyword), encoding="utf-8") as f:
+                return json.load(f)["candidates"]
+        except (OSError, ValueError, KeyError):
+            return None
+
+    def record_asset(self, url, path):
+        ext = os.path.splitext(path)[1].lower()
+        target = os.path.join(self.root, "assets", _key(url) + ext)
+        tmp = f"{target}.{threading.get_ident()}.tmp"
+        shutil.copyfile(path, tmp)
+        os.replace(tmp, target)
+
+    def asset(self, url):
+        """Path of the recorded body of ``url``, or None."""
+        with self._lock:
+            if self._assets is None:
+                folder = os.path.join(self.root, "assets")
+                names = os.listdir(folder) if os.path.isdir(folder) else []
+                self._assets = {os.path.splitext(n)[0]: n for n in names}
+        name = self._assets.get(_key(url))
+        return os.path.join(self.root, "assets", name) if name else None
+
+
+_cassette = None
+
+
+def configure(cassette):
+    """Install ``cassette`` (a :class:`Cassette` or None) for all scrapers."""
+    global _cassette
+    _cassette = cassette
+
+
+def recording():
+    return _cassette is not None and _cassette.mode == RECORD
+
+
+def replaying():
+    return _cassette is not None and _cassette.mode == REPLAY
+
+
+def record_page(url, html):
+    """Keep ``html`` as the page at ``url``, if recording."""
+    cassette = _cassette
+    if cassette is not None and cassette.mode == RECORD and html is not None:
+        try:
+            cassette.record_page(url, html)
+        except OSError as e:
+            print(f"  Could not record page {url}: {e}")
+
+
+def page(url):
+    """The replayed page at ``url``, or None if it was not recorded."""
+    html = _cassette.page(url)
+    if html is None:
+        print(f"  Not in cassette: {url}")
+    return html
+
+
+def replay_page(url):
+    """The replayed page at ``url``.
+
+    Raises:
+        CassetteMiss: The page was not recorded.
+    """
+    html = _cassette.page(url)
+    if html is None:
+        raise CassetteMiss(f"{url} is not in the cassette")
+    return html
+
+
+def extracted(source, keyword, url, candidates):
+    """Record fresh candidates, or compare replayed ones with the recording."""
+    cassette = _cassette
+    if cassette is None:
+        return
+    if cassette.mode == RECORD:
+        try:
+            cassette.record_candidates(source, keyword, url, candidates)
+        except OSError as e:
+            print(f"  Could not record candidates: {e}")
+        return
+    recorded = cassette.recorded_candidates(source, keyword)
+    if recorded is not None and recorded != candidates:
+        print(
+            f"  [cassette] {source}/{keyword} differs from the recording: "
+            f"{_summary(candidates)} now, {_summary(recorded)} recorded"
+        )
+
+
+def record_asset(url, path):
+    """Keep the downloaded file at ``path`` as the body of ``url``, if recording."""
+    cassette = _cassette
+    if cassette is not None and cassette.mode == RECORD:
+        try:
+            cassette.record_asset(url, path)
+        except OSError as e:
+            print(f"  Could not record {url}: {e}")
+
+
+def asset(url):
+    """Path of the replayed body of ``url``, or None if it was not recorded."""
+    return _cassette.asset(url)
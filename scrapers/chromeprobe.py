@@ -0,0 +1,227 @@
+"""Chrome discovery, version probe and patched chromedriver, cached across runs.
+
+Starting a driver used to run ``chrome --version`` and have
+``undetected_chromedriver`` download and patch a fresh chromedriver every
+time. Both results only change when Chrome itself does, so they are kept in
+``chrome_probe.json`` in the cache directory, keyed by the Chrome binary's
+path and modification time. After an update the binary's mtime changes,
+which invalidates the entry; the next launch probes again and stores a new
+patched driver.
+
+The cache directory is ``$BIOIMAGEDOWNLOADER_CACHE`` if set, otherwise
+``~/.cache/bioimagedownloader``.
+"""
+
+import json
+import os
+import platform
+import re
+import shutil
+import subprocess
+import threading
+
+PROBE_NAME = "chrome_probe.json"
+
+_lock = threading.Lock()
+_probe = None
+
+
+def cache_dir():
+    return os.environ.get("BIOIMAGEDOWNLOADER_CACHE") or os.path.join(
+        os.path.expanduser("~"), ".cache", "bioimagedownloader"
+    )
+
+
+def chrome_binaries():
+    """Installed Chrome/Chromium binaries for this platform, most likely first."""
+    system = platform.system()
+    paths = []
+    if system == "Windows":
+        paths += [
+            os.path.expandvars(r"%ProgramFiles%\Google\Chrome\Application\chrome.exe"),
+            os.path.expandvars(r"%ProgramFiles(x86)%\Google\Chrome\Application\chrome.exe"),
+            os.path.expandvars(r"%LocalAppData%\Google\Chrome\Application\chrome.exe"),
+        ]
+    elif system == "Darwin":
+        paths += [
+            "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome",
+            "/Applications/Chromium.app/Contents/MacOS/Chromium",
+            os.path.expanduser("~/Applications/Google Chrome.app/Contents/MacOS/Google Chrome"),
+        ]
+    # Linux, and the final fallback for other systems
+    for name in ("google-chrome", "google-chrome-stable", "google-chrome-beta",
+                 "google-chrome-dev", "chromium-browser", "chromium"):
+        path = shutil.which(name)
+        if path:
+            paths.append(path)
+    return [p for p in paths if os.path.exists(p)]
+
+
+def version_from_binary(binary_path):
+    """Run ``<binary> --version`` and return the major version int, or None."""
+    try:
+        result = subprocess.run(
+            [binary_path, "--version"],
+            capture_output=True,
+            text=True,
+            timeout=10,
+        )
+        output = result.stdout.strip() or result.stderr.strip()
+        match = re.search(r"(\d+)\.\d+\.\d+", output)
+        if match:
+            major = int(match.group(1))
+            print(f"[chromeprobe] Detected Chrome version {major} from: {binary_path}")
+            return major
+    except (subprocess.SubprocessError, OSError) as e:
+        print(f"[chromeprobe] Failed to get version from {binary_path}: {e}")
+    return None
+
+
+def _registry_version():
+    """Chrome major version from the Windows registry, or None."""
+    try:
+        import winreg
+    except ImportError:
+        return None
+    for root_key in (winreg.HKEY_CURRENT_USER, winreg.HKEY_LOCAL_MACHINE):
+        try:
+            key = winreg.OpenKey(root_key, r"Software\Google\Chrome\BLBeacon")
+            version, _ = winreg.QueryValueEx(key, "version")
+            winreg.CloseKey(key)
+        except OSError:
+            continue
+        major = int(version.split(".")[0])
+        print(f"[chromeprobe] Detected Chrome version {major} (Windows registry)")
+        return major
+    return None
+
+
+def _probe_path():
+    return os.path.join(cache_dir(), PROBE_NAME)
+
+
+def _load():
+    try:
+        with open(_probe_path(), encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _save(entry):
+    os.makedirs(cache_dir(), exist_ok=True)
+    path = _probe_path()
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(entry, f, indent=2)
+    os.replace(tmp, path)
+
+
+def probe():
+    """Return the Chrome probe, from memory, the disk cache, or a fresh probe.
+
+    Returns:
+        dict: ``binary`` (path or None), ``mtime``, ``version_main`` (int or
+        None), and ``driver`` / ``driver_version`` for a cached patched
+        chromedriver (or None).
+    """
+    global _probe
+    with _lock:
+        if _probe is not None:
+            return _probe
+        binaries = chrome_binaries()
+        binary = binaries[0] if binaries else None
+        mtime = os.path.getmtime(binary) if binary else None
+        entry = _load()
+        if binary and entry and entry.get("binary") == binary and entry.get("mtime") == mtime:
+            _probe = entry
+            return _probe
+
+        version = _registry_version() if platform.system() == "Windows" else None
+        for candidate in binaries:
+            if version:
+                break
+            version = version_from_binary(candidate)
+        if version is None:
+            print("[chromeprobe] Could not auto-detect Chrome version on any platform.")
+        _probe = {
+            "binary": binary,
+            "mtime": mtime,
+            "version_main": version,
+            "driver": None,
+            "driver_version": None,
+        }
+        if binary:
+            try:
+                _save(_probe)
+            except OSError as e:
+                print(f"[chromeprobe] Could not cache probe: {e}")
+        return _probe
+
+
+def cached_driver(version_main):
+    """Path of the kept patched chromedriver for ``version_main``, or None."""
+    entry = probe()
+    path = entry.get("driver")
+    if path and entry.get("driver_version") == version_main and os.path.exists(path):
+        return path
+    return None
+
+
+def remember_driver(patched_path, version_main):
+    """Keep a copy of the chromedriver ``undetected_chromedriver`` just patched.
+
+    ``undetected_chromedriver`` deletes its own copy when the driver is
+    garbage collected, so the binary is copied into the cache directory.
+    """
+    if not version_main or not patched_path or not os.path.exists(patched_path):
+        return None
+    entry = probe()
+    if not entry.get("binary"):
+        return None
+    ext = os.path.splitext(patched_path)[1]
+    target = os.path.join(cache_dir(), f"chromedriver-{version_main}{ext}")
+    try:
+        os.makedirs(cache_dir(), exist_ok=True)
+        tmp = f"{target}.{os.getpid()}.tmp"
+        shutil.copy2(patched_path, tmp)
+        os.replace(tmp, target)
+        with _lock:
+            entry["driver"], entry["driver_version"] = target, version_main
+            _save(entry)
+    except OSError as e:
+        print(f"[chromeprobe] Could not keep patched chromedriver: {e}")
+        return None
+    return target
+
+
+def forget_driver():
+    """Drop the kept chromedriver, e.g. after it failed to start."""
+    entry = probe()
+    path = entry.get("driver")
+    with _lock:
+        entry["driver"] = entry["driver_version"] = None
+        if entry.get("binary"):
+            try:
+                _save(entry)
+            except OSError:
+                pass
+    if path:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def clear():
+    """Forget the in-memory and on-disk probe (used by the startup benchmark)."""
+    global _probe
+    with _lock:
+        entry = _probe or _load() or {}
+        _probe = None
+        for path in (entry.get("driver"), _probe_path()):
+            if path:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
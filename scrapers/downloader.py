@@ -0,0 +1,559 @@
+"""Concurrent, connection-pooled asset downloader shared by all scrapers."""
+
+import hashlib
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from . import cassette, profiling, ratelimit, spans
+
+CHUNK_SIZE = 64 * 1024
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024
+PART_SUFFIX = ".part"
+SNIFF_BYTES = 1024
+
+DEFAULT_HEADERS = {
+    "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
+    "AppleWebKit/537.36"
+}
+
+
+class DownloadError(Exception):
+    """A transfer was rejected or aborted (bad status, too large, ...)."""
+
+
+class RetryableError(DownloadError):
+    """The server answered with a status worth retrying (429, 5xx)."""
+
+    def __init__(self, status, retry_after=None):
+        super().__init__(f"HTTP {status}")
+        self.status = status
+        self.retry_after = retry_after
+
+
+# Statuses retried with backoff (see Downloader.fetch)
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+def sniff_image_type(head, content_type=""):
+    """Identify an image from the first bytes of its body.
+
+    Args:
+        head (bytes): Leading bytes of the body (``SNIFF_BYTES`` is plenty).
+        content_type (str): The response ``Content-Type``, used only to
+            accept XML whose ``<svg`` root lies beyond ``head``.
+
+    Returns:
+        str or None: The file extension (``.png``, ``.jpg``, ``.gif``,
+        ``.webp`` or ``.svg``), or None if ``head`` is not a known image.
+    """
+    if head.startswith(b"\x89PNG\r\n\x1a\n"):
+        return ".png"
+    if head.startswith(b"\xff\xd8\xff"):
+        return ".jpg"
+    if head[:6] in (b"GIF87a", b"GIF89a"):
+        return ".gif"
+    if head[:4] == b"RIFF" and head[8:12] == b"WEBP":
+        return ".webp"
+
+    text = head.lstrip(b"\xef\xbb\xbf \t\r\n").lower()
+    if text.startswith(b"<svg") or (text.startswith((b"<?xml", b"<!--", b"<!doctype svg"))
+                                    and b"<svg" in text):
+        return ".svg"
+    if text.startswith(b"<?xml") and "svg" in content_type.lower():
+        return ".svg"
+    return None
+
+
+def _with_extension(path, ext):
+    """Return ``path`` with its extension replaced by ``ext`` if it differs."""
+    base, current = os.path.splitext(path)
+    if current.lower() == ext or (current.lower() == ".jpeg" and ext == ".jpg"):
+        return path
+    return base + ext
+
+
+class Downloader:
+    """Fetch many ``(url, path)`` jobs concurrently over keep-alive connections.
+
+    Each host gets its own :class:`requests.Session` whose connection pool
+    holds ``per_host`` sockets, and a semaphore that caps in-flight requests
+    to that host at the same number. ``max_workers`` bounds the total number
+    of concurrent downloads across all hosts.
+
+    Bodies are streamed in chunks to ``<path>.part`` next to the target,
+    fsync'd and atomically renamed into place, so an interrupted run never
+    leaves a truncated file under the final name. A ``.part`` file left by a
+    crashed run is resumed with an HTTP ``Range`` request when ``resume`` is
+    set and the server supports it.
+
+    With ``validate`` set, the first ``SNIFF_BYTES`` of each body are checked
+    against PNG/JPEG/GIF/WebP/SVG signatures before anything else is read.
+    Non-image responses (HTML error or challenge pages, JSON, ...) are
+    aborted and reported, and the file extension is corrected to match the
+    detected type.
+
+    With a ``store`` (:class:`~scrapers.store.ObjectStore`), bodies are
+    hashed while streaming and kept once per unique SHA-256; the requested
+    paths become links to the stored object, and URLs already stored in this
+    run are linked without any network request.
+
+    With a ``cache`` (:class:`~scrapers.httpcache.HTTPCache`), fresh entries
+    are served locally and stale ones are revalidated with conditional
+    requests, so reruns only transfer assets that changed.
+
+    Every request first waits for the host's token in the shared
+    :class:`~scrapers.ratelimit.RateLimiter` and reports its outcome back.
+    Timeouts, connection errors and 429/5xx answers are retried up to
+    ``retries`` times with jittered exponential backoff, or after the
+    server's ``Retry-After`` if that is longer.
+
+    Args:
+        per_host (int): Maximum concurrent requests (and pooled connections)
+            per host. Defaults to 4.
+        max_workers (int): Global concurrency limit. Defaults to 8.
+        timeout (float): Per-request timeout in seconds. Defaults to 30.
+        headers (dict): Default request headers.
+        max_bytes (int): Abort transfers larger than this many bytes
+            (0 disables the cap). Defaults to 50 MiB.
+        resume (bool): Resume partial ``.part`` files with HTTP Range.
+            Defaults to True.
+        validate (bool): Reject bodies that are not images and fix file
+            extensions. Defaults to True.
+        store (ObjectStore): Optional content-addressed store for dedup.
+        cache (HTTPCache): Optional persistent HTTP cache.
+        retries (int): Retries after a retryable failure. Defaults to 3.
+        limit (int): Jobs taken from each :meth:`download_many` call (the
+            images of one source and keyword), None for all. May be changed
+            between runs.
+    """
+
+    def __init__(self, per_host=4, max_workers=8, timeout=30, headers=None,
+                 max_bytes=DEFAULT_MAX_BYTES, resume=True, validate=True,
+                 store=None, cache=None, retries=3, limit=None):
+        self.per_host = max(1, per_host)
+        self.max_workers = max(1, max_workers)
+        self.timeout = timeout
+        self.max_bytes = max_bytes
+        self.resume = resume
+        self.validate = validate
+        self.store = store
+        self.cache = cache
+        self.retries = max(0, retries)
+        self.limit = limit
+        self.headers = dict(DEFAULT_HEADERS if headers is None else headers)
+        self._sessions = {}
+        self._host_slots = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=self.max_workers, thread_name_prefix="download"
+        )
+
+    def _host(self, url):
+        """Return ``(session, semaphore)`` for the host of ``url``."""
+        host = urlsplit(url).netloc.lower()
+        with self._lock:
+            session = self._sessions.get(host)
+            if session is None:
+                session = requests.Session()
+                session.headers.update(self.headers)
+                adapter = HTTPAdapter(
+                    pool_connections=1, pool_maxsize=self.per_host, max_retries=0
+                )
+                session.mount("http://", adapter)
+                session.mount("https://", adapter)
+                self._sessions[host] = session
+                self._host_slots[host] = threading.BoundedSemaphore(self.per_host)
+            return session, self._host_slots[host]
+
+    def fetch(self, url, filepath, headers=None):
+        """Download one ``url`` to ``filepath``.
+
+        The file may be saved under a different extension than requested if
+        the sniffed content type disagrees; ``path`` in the result is the
+        final location.
+
+        Returns:
+            dict: ``url``, ``path``, ``ok``, ``status`` (HTTP status or None),
+            ``type`` (detected extension), ``bytes`` (final file size),
+            ``resumed`` (bytes reused from a previous partial download),
+            ``digest`` and ``duplicate`` (with a store), ``cached`` (served
+            from the HTTP cache), ``replayed`` (served from a cassette, see
+            :mod:`scrapers.cassette`), ``elapsed`` seconds and ``error`` (or
+            None).
+        """
+        result = {
+            "url": url,
+            "path": filepath,
+            "ok": False,
+            "status": None,
+            "type": None,
+            "bytes": 0,
+            "resumed": 0,
+            "digest": None,
+            "duplicate": False,
+            "cached": False,
+            "replayed": False,
+            "elapsed": 0.0,
+            "error": None,
+        }
+        start = time.perf_counter()
+        part = filepath + PART_SUFFIX
+        span = spans.start("download", url=url)
+        try:
+            known = entry = response_headers = None
+            if cassette.replaying():
+                self._from_cassette(url, part, result)
+            else:
+                known = self.store.lookup_url(url) if self.store else None
+                if not known and self.cache and not os.path.exists(part):
+                    entry = self.cache.lookup(url)
+                if known:
+                    result["digest"], result["type"] = known
+                    result["duplicate"] = True
+                    # Left by an earlier interrupted fetch; nothing resumes it now
+                    _remove(part)
+                elif entry and self.cache.is_fresh(entry):
+                    self._from_cache(entry, part, result)
+                else:
+                    conditional = self.cache.validators(entry) if entry else None
+                    response_headers = self._transfer_with_retries(
+                        url, part, headers, result, conditional
+                    )
+                    if response_headers is None:  # 304 Not Modified
+                        self.cache.refresh(url, entry)
+                        self._from_cache(entry, part, result)
+            with spans.span("write", parent=span):
+                if self.store and result["digest"] is None and not known:
+                    result["digest"] = _file_digest(part)
+                if result["type"]:
+                    filepath = _with_extension(filepath, result["type"])
+                if self.store:
+                    digest = result["digest"]
+                    if not known:
+                        result["duplicate"] = not self.store.add(part, digest)
+                        self.store.remember(url, digest, result["type"])
+                    self.store.link(digest, filepath)
+                    result["bytes"] = os.path.getsize(filepath)
+                elif _same_file(part, filepath):
+                    # A cached body linked over its own earlier copy: rename()
+                    # would leave both names in place
+                    _remove(part)
+                else:
+                    os.replace(part, filepath)
+            result["path"] = filepath
+            result["ok"] = True
+            if not result["replayed"]:
+                cassette.record_asset(url, filepath)
+            if self.cache and response_headers is not None:
+                try:
+                    self.cache.put(url, filepath, response_headers,
+                                   result["type"], result["digest"])
+                except OSError as e:
+                    print(f"  Could not cache {url}: {e}")
+        except Exception as e:
+            result["error"] = str(e)
+            span.fail(e)
+            # Keep a partial body for a later Range resume, unless it was
+            # rejected outright (bad status, oversized).
+            if isinstance(e, DownloadError) or not self.resume:
+                _remove(part)
+        result["elapsed"] = round(time.perf_counter() - start, 3)
+        span.set(
+            bytes=result["bytes"], status=result["status"], type=result["type"],
+            served=_served_from(result),
+        )
+        span.end()
+
+        if result["duplicate"]:
+            print(f"  Linked duplicate: {os.path.basename(filepath)}")
+        elif result["cached"]:
+            print(f"  Cached: {os.path.basename(filepath)}")
+        elif result["replayed"]:
+            print(f"  Replayed: {os.path.basename(filepath)}")
+        elif result["ok"]:
+            print(f"  Downloaded: {os.path.basename(filepath)}")
+        else:
+            print(f"  Failed to download {url}: {result['error']}")
+        return result
+
+    def _transfer_with_retries(self, url, part, headers, result, conditional):
+        """Run :meth:`_transfer` under the rate limiter, retrying transient failures.
+
+        A partial body kept after a timeout is resumed by the next attempt.
+        """
+        session, slots = self._host(url)
+        limiter = ratelimit.get_limiter()
+        for attempt in range(self.retries + 1):
+            limiter.acquire(url)
+            retry_after = None
+            try:
+                with slots:
+                    response_headers = self._transfer(
+                        session, url, part, headers, result, conditional
+                    )
+            except RetryableError as e:
+                limiter.record(url, status=e.status, retry_after=e.retry_after)
+                error, retry_after = e, e.retry_after
+            except (requests.Timeout, requests.ConnectionError) as e:
+                limiter.record(url, timeout=True)
+                error = e
+            else:
+                limiter.record(url, status=result["status"])
+                return response_headers
+            if attempt == self.retries:
+                raise error
+            delay = max(ratelimit.backoff_delay(attempt), retry_after or 0)
+            print(f"  Retrying {url} in {delay:.1f}s ({error.__class__.__name__}: {error})")
+            time.sleep(delay)
+
+    def _from_cache(self, entry, part, result):
+        """Place the cached body of ``entry`` at ``part``."""
+        _remove(part)
+        try:
+            os.link(entry["body"], part)
+        except OSError:
+            shutil.copyfile(entry["body"], part)
+        result["type"] = entry.get("type")
+        result["digest"] = entry.get("digest")
+        result["bytes"] = os.path.getsize(part)
+        result["cached"] = True
+
+    def _from_cassette(self, url, part, result):
+        """Place the recorded body of ``url`` at ``part``."""
+        recorded = cassette.asset(url)
+        if recorded is None:
+            raise DownloadError("not in cassette")
+        shutil.copyfile(recorded, part)
+        result["type"] = os.path.splitext(recorded)[1] or None
+        result["bytes"] = os.path.getsize(part)
+        result["replayed"] = True
+
+    def _transfer(self, session, url, part, headers, result, conditional=None):
+        """Stream ``url`` into ``part``, resuming it if possible.
+
+        Returns:
+            The response headers, or None if ``conditional`` validators were
+            sent and the server answered ``304 Not Modified``.
+        """
+        offset = 0
+        if self.resume and os.path.exists(part):
+            offset = os.path.getsize(part)
+
+        request_headers = dict(headers or {})
+        if offset:
+            request_headers["Range"] = f"bytes={offset}-"
+        elif conditional:
+            request_headers.update(conditional)
+
+        with session.get(url, headers=request_headers, timeout=self.timeout,
+                         stream=True) as resp:
+            result["status"] = resp.status_code
+            if resp.status_code == 304 and conditional and not offset:
+                return None
+            if resp.status_code == 416 and offset:
+                # Stale partial file; start over without Range.
+                _remove(part)
+                return self._transfer(session, url, part, headers, result)
+            if resp.status_code == 206 and offset:
+                mode = "ab"
+                result["resumed"] = offset
+            elif resp.status_code == 200:
+                mode, offset = "wb", 0
+            elif resp.status_code in RETRY_STATUSES:
+                raise RetryableError(
+                    resp.status_code,
+                    ratelimit.parse_retry_after(resp.headers.get("Retry-After")),
+                )
+            else:
+                raise DownloadError(f"HTTP {resp.status_code}")
+
+            length = resp.headers.get("Content-Length")
+            if self.max_bytes and length and length.isdigit():
+                if offset + int(length) > self.max_bytes:
+                    raise DownloadError(
+                        f"too large ({offset + int(length)} > {self.max_bytes} bytes)"
+                    )
+
+            content_type = resp.headers.get("Content-Type", "")
+            head = b""
+            hasher = hashlib.sha256() if self.store else None
+            if offset and (self.validate or hasher):
+                with open(part, "rb") as f:
+                    head = f.read(SNIFF_BYTES)
+                    if hasher:
+                        hasher.update(head)
+                        for block in iter(lambda: f.read(CHUNK_SIZE), b""):
+                            hasher.update(block)
+            # Chunks are held back until the head has been sniffed.
+            pending = [] if self.validate else None
+
+            written = offset
+            try:
+                with open(part, mode) as f:
+
+                    def write(data):
+                        if hasher:
+                            hasher.update(data)
+                        f.write(data)
+
+                    for chunk in resp.iter_content(CHUNK_SIZE):
+                        written += len(chunk)
+                        if self.max_bytes and written > self.max_bytes:
+                            raise DownloadError(f"too large (> {self.max_bytes} bytes)")
+                        if pending is not None:
+                            head += chunk
+                            pending.append(chunk)
+                            if len(head) < SNIFF_BYTES:
+                                continue
+                            result["type"] = self._sniff(head, content_type)
+                            chunk, pending = b"".join(pending), None
+                        write(chunk)
+                    if pending is not None:
+                        # Body shorter than the sniff window.
+                        result["type"] = self._sniff(head, content_type)
+                        write(b"".join(pending))
+                    f.flush()
+                    # A body the store already holds is dropped by store.add
+                    # without ever being renamed into place: skip the fsync
+                    if not (hasher and self.store.has(hasher.hexdigest())):
+                        os.fsync(f.fileno())
+            except Exception:
+                # Decoded (e.g. gzip) bodies cannot be resumed by byte offset.
+                if resp.headers.get("Content-Encoding", "identity") != "identity":
+                    _remove(part)
+                raise
+            result["bytes"] = written
+            if hasher:
+                result["digest"] = hasher.hexdigest()
+            return resp.headers
+
+    def get_page(self, url, headers=None, timeout=None):
+        """GET a page over the pooled session for its host.
+
+        Shares the per-host connection pool and concurrency limit with
+        downloads, and the host's rate limit; the outcome adapts that rate.
+        Not retried: callers fall back to the browser instead. The body is
+        read in full; use :meth:`fetch` for assets.
+
+        Returns:
+            requests.Response: The response, whatever its status.
+        """
+        session, slots = self._host(url)
+        limiter = ratelimit.get_limiter()
+        limiter.acquire(url)
+        try:
+            with slots:
+                resp = session.get(url, headers=headers, timeout=timeout or self.timeout)
+        except (requests.Timeout, requests.ConnectionError):
+            limiter.record(url, timeout=True)
+            raise
+        limiter.record(
+            url, status=resp.status_code,
+            retry_after=ratelimit.parse_retry_after(resp.headers.get("Retry-After")),
+        )
+        return resp
+
+    @staticmethod
+    def _sniff(head, content_type):
+        kind = sniff_image_type(head, content_type)
+        if kind is None:
+            label = content_type.split(";")[0].strip() or "unknown type"
+            raise DownloadError(f"not an image ({label})")
+        return kind
+
+    def download_many(self, jobs, headers=None):
+        """Download ``(url, path)`` jobs concurrently.
+
+        Only the first :attr:`limit` jobs are downloaded when a limit is set.
+
+        Returns:
+            list of dict: One :meth:`fetch` result per job downloaded, in
+            job order.
+        """
+        if self.limit is not None:
+            jobs = jobs[:self.limit]
+        # Downloads stay in the span tree and profile of the unit that asked for them
+        fetch = profiling.wrap(spans.wrap(self.fetch))
+        futures = [
+            self._executor.submit(fetch, url, path, headers)
+            for url, path in jobs
+        ]
+        return [future.result() for future in futures]
+
+    def close(self):
+        """Shut down the worker threads and close pooled connections."""
+        self._executor.shutdown(wait=True)
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+            self._host_slots.clear()
+
+
+def _served_from(result):
+    """Where a finished :meth:`Downloader.fetch` got its body from."""
+    for key in ("duplicate", "cached", "replayed"):
+        if result[key]:
+            return key
+    return "network" if result["ok"] else None
+
+
+def _same_file(a, b):
+    try:
+        return os.path.samefile(a, b)
+    except OSError:
+        return False
+
+
+def _file_digest(path):
+    """Return the SHA-256 hex digest of the file at ``path``."""
+    hasher = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(CHUNK_SIZE), b""):
+            hasher.update(block)
+    return hasher.hexdigest()
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+_downloader = None
+_downloader_lock = threading.Lock()
+
+
+def get_downloader():
+    """Return the process-wide :class:`Downloader`, creating it on first use."""
+    global _downloader
+    with _downloader_lock:
+        if _downloader is None:
+            _downloader = Downloader()
+        return _downloader
+
+
+def configure(**kwargs):
+    """Replace the shared downloader with one built from ``kwargs``.
+
+    Accepts the same arguments as :class:`Downloader`.
+    """
+    global _downloader
+    with _downloader_lock:
+        old, _downloader = _downloader, Downloader(**kwargs)
+    if old is not None:
+        old.close()
+    return _downloader
+
+
+def download_many(jobs, headers=None):
+    """Download ``(url, path)`` jobs with the shared downloader."""
+    return get_downloader().download_many(jobs, headers)
@@ -0,0 +1,555 @@
+"""Descriptor-driven extraction engine shared by the simple search scrapers.
+
+A site is described by a plain dict (see ``scrapers/sites.py``): where to
+search, which containers and result cards to look in, which ``<img>`` and
+``<a>`` elements to take and how to filter their URLs. :class:`Site`
+compiles the XPath selectors and URL patterns once at import time.
+
+By default the XPaths are evaluated inside the browser by
+:data:`EXTRACT_SCRIPT` through ``execute_script``, so only the matching
+attribute values cross the WebDriver connection instead of the whole
+``page_source``. If the script fails, or for sites with
+``"extraction": "html"``, the page source is parsed with lxml and the same
+XPaths are evaluated in Python. URL filtering, rewriting, dedup and limits
+run in Python either way.
+
+Sites with ``"transport": "http"`` are first fetched without a browser (see
+:mod:`scrapers.transport`) and only rendered in Chrome when that is blocked
+or finds nothing.
+
+Inside :func:`tab_batch` the sites that need a browser for a keyword share
+one: their pages are loaded together in tabs (see :class:`TabBatch`).
+"""
+
+import os
+import re
+import threading
+from concurrent.futures import Future
+from contextlib import contextmanager
+from urllib.parse import quote, urljoin
+
+import lxml.html
+from lxml import etree
+from selenium.common.exceptions import WebDriverException
+
+from . import cassette, profiling, spans, utils
+from .blocking import BlockingProfile
+from .downloader import download_many
+from .resultcache import cached, is_empty
+from .transport import BROWSER, CACHE, HTTP, REPLAY, fetch_page
+from .utils import save_links
+
+DEFAULT_LIMIT = 10
+
+# Rule names in the order candidates are built
+RULES = ("images", "fallback_images", "links")
+
+# Runs the descriptor's XPaths on the live DOM. Returns, per rule, one list
+# of raw attribute values per scope (result card, container or page),
+# mirroring Site._raw_values.
+EXTRACT_SCRIPT = """
+const spec = arguments[0];
+function all(xpath, ctx) {
+    const r = document.evaluate(xpath, ctx, null, XPathResult.ORDERED_NODE_SNAPSHOT_TYPE, null);
+    const out = [];
+    for (let i = 0; i < r.snapshotLength; i++) out.push(r.snapshotItem(i));
+    return out;
+}
+function values(rule, ctx, first) {
+    let els = all(rule.select, ctx);
+    if (first) els = els.slice(0, 1);
+    const out = [];
+    for (const el of els) {
+        for (const attr of rule.attrs) {
+            const v = el.getAttribute(attr);
+            if (v) { out.push(v); break; }
+        }
+    }
+    return out;
+}
+let scopes = [];
+for (const xpath of spec.containers) {
+    scopes = all(xpath, document);
+    if (scopes.length) break;
+}
+if (!scopes.length) scopes = [document];
+if (spec.item) {
+    const items = [];
+    for (const c of scopes) {
+        for (const it of all(spec.item, c)) {
+            if (items.length >= spec.max_items) break;
+            items.push(it);
+        }
+        if (items.length >= spec.max_items) break;
+    }
+    scopes = items;
+}
+const out = {};
+for (const [name, rule] of Object.entries(spec.rules)) {
+    out[name] = rule.scope === "page"
+        ? [values(rule, document, false)]
+        : scopes.map(s => values(rule, s, !!spec.item));
+}
+return out;
+"""
+
+
+def count_items(candidates):
+    """Number of URLs in a candidates dict, for timing reports."""
+    return sum(len(urls) for urls in candidates.values())
+
+
+def parse_html(html):
+    """Parse a page source into an lxml element tree."""
+    try:
+        return lxml.html.document_fromstring(html)
+    except ValueError:
+        # str input with an XML encoding declaration
+        return lxml.html.document_fromstring(html.encode("utf-8"))
+
+
+class Rule:
+    """Compiled rule selecting URLs from elements of a page.
+
+    Args:
+        select (str): XPath of the elements relative to the scope, e.g.
+            ``".//img[@src]"``.
+        attrs (tuple): Attributes to read the URL from, first non-empty wins.
+        match (list): Regexes that must all be found in the raw URL.
+        exclude (str): Regex; URLs where it is found are skipped.
+        rewrite (list): ``(old, new)`` replacements applied to the URL.
+        exts (tuple): Extensions guessed from the URL, first found wins.
+        ext (str): Extension used when none of ``exts`` is in the URL.
+        limit (int): Maximum number of URLs to keep, None for no limit.
+        scope (str): ``"item"`` (default) to search each result card or
+            container, ``"page"`` to search the whole document.
+    """
+
+    def __init__(self, select, attrs=("src",), match=(), exclude=None, rewrite=(),
+                 exts=(), ext=None, limit=DEFAULT_LIMIT, scope="item"):
+        self.xpath = select
+        self.select = etree.XPath(select)
+        self.attrs = tuple(attrs)
+        self.match = [re.compile(p, re.IGNORECASE) for p in match]
+        self.exclude = re.compile(exclude, re.IGNORECASE) if exclude else None
+        self.rewrite = list(rewrite)
+        self.exts = tuple(exts)
+        self.ext = ext
+        self.limit = limit
+        self.scope = scope
+
+    def accepts(self, value):
+        if self.exclude is not None and self.exclude.search(value):
+            return False
+        return all(p.search(value) for p in self.match)
+
+    def guess_ext(self, value):
+        lower = value.lower()
+        for ext in self.exts:
+            if ext in lower:
+                return ext
+        return self.ext
+
+    def values(self, node, first=False):
+        """Return the raw attribute values of the elements under ``node``."""
+        elements = self.select(node)
+        if first:
+            elements = elements[:1]
+        found = []
+        for el in elements:
+            for attr in self.attrs:
+                value = el.get(attr)
+                if value:
+                    found.append(value)
+                    break
+        return found
+
+    def script_spec(self):
+        return {"select": self.xpath, "attrs": list(self.attrs), "scope": self.scope}
+
+
+class Site:
+    """A search site compiled from a descriptor dict.
+
+    Descriptor keys:
+
+    * ``name``, ``label`` - short source name and display name.
+    * ``search_url`` - URL template with a ``{query}`` placeholder.
+    * ``base_url`` - root that relative URLs are resolved against.
+    * ``ready``, ``ready_timeout`` - see :func:`utils.wait_for_ready`.
+    * ``container`` - optional absolute XPath of the result containers, or
+      a tuple of XPaths tried in order until one matches.
+    * ``item`` - optional XPath of the result cards relative to the
+      containers; rules then take at most one element per card.
+    * ``max_items`` - number of cards looked at (default 10).
+    * ``images``, ``links``, ``fallback_images`` - :class:`Rule` kwargs.
+      ``fallback_images`` are downloaded only if ``images`` yield nothing.
+    * ``links_file`` - file that detail links are always written to; if
+      omitted links are appended to the shared ``links.txt`` when nothing
+      could be downloaded.
+    * ``extraction`` - ``"script"`` (default) to extract in the browser,
+      ``"html"`` to always parse ``page_source``.
+    * ``transport`` - ``"browser"`` (default), or ``"http"`` to try a plain
+      HTTP fetch first and fall back to the browser if it is blocked or
+      yields no results.
+    * ``allow`` - resource categories or URL patterns the browser must still
+      load for this site (see :mod:`scrapers.blocking`).
+    """
+
+    def __init__(self, name, label, search_url, base_url, ready, ready_timeout=15,
+                 container=None, item=None, max_items=DEFAULT_LIMIT, images=None,
+                 links=None, fallback_images=None, links_file=None,
+                 extraction="script", transport=BROWSER, allow=()):
+        if extraction not in ("script", "html"):
+            raise ValueError(f"{name}: unknown extraction mode {extraction!r}")
+        if transport not in (BROWSER, HTTP):
+            raise ValueError(f"{name}: unknown transport {transport!r}")
+        self.name = name
+        self.label = label
+        self.search_url = search_url
+        self.base_url = base_url
+        self.ready = ready
+        self.ready_timeout = ready_timeout
+        if isinstance(container, str):
+            container = (container,)
+        self.containers = [etree.XPath(c) for c in container or ()]
+        self.item = etree.XPath(item) if item else None
+        self.max_items = max_items
+        specs = {"images": images, "fallback_images": fallback_images, "links": links}
+        self.rules = {key: Rule(**specs[key]) for key in RULES if specs[key]}
+        self.links_file = links_file
+        self.extraction = extraction
+        self.transport = transport
+        self.blocking = BlockingProfile(allow)
+        self.script_spec = {
+            "containers": list(container or ()),
+            "item": item,
+            "max_items": max_items,
+            "rules": {key: rule.script_spec() for key, rule in self.rules.items()},
+        }
+
+    def url_for(self, keyword):
+        return self.search_url.format(query=quote(keyword))
+
+    def _scopes(self, root):
+        """Return the elements rules are applied to, and whether they are cards."""
+        containers = []
+        for xpath in self.containers:
+            containers = xpath(root)
+            if containers:
+                break
+        else:
+            containers = [root]
+        if self.item is None:
+            return containers, False
+        items = []
+        for container in containers:
+            items.extend(self.item(container)[:self.max_items - len(items)])
+            if len(items) >= self.max_items:
+                break
+        return items, True
+
+    def _raw_values(self, root):
+        """Raw attribute values per rule, one list per scope (see EXTRACT_SCRIPT)."""
+        scopes, first = self._scopes(root)
+        groups = {}
+        for key, rule in self.rules.items():
+            if rule.scope == "page":
+                groups[key] = [rule.values(root)]
+            else:
+                groups[key] = [rule.values(scope, first) for scope in scopes]
+        return groups
+
+    def _urls(self, rule, groups):
+        """Filter, resolve, rewrite and dedup raw values into ``(url, raw)`` pairs."""
+        found = []
+        seen = set()
+        for values in groups:
+            for value in values:
+                if not rule.accepts(value):
+                    continue
+                url = urljoin(self.base_url, value)
+                for old, new in rule.rewrite:
+                    url = url.replace(old, new)
+                if url in seen:
+                    continue
+                seen.add(url)
+                found.append((url, value))
+                if rule.limit is not None and len(found) >= rule.limit:
+                    return found
+        return found
+
+    def candidates(self, groups):
+        """Build the candidates dict from raw values grouped per rule."""
+        candidates = {}
+        for key, rule in self.rules.items():
+            urls = self._urls(rule, groups[key])
+            if key == "links":
+                candidates[key] = [url for url, _ in urls]
+            else:
+                candidates[key] = [[url, rule.guess_ext(value)] for url, value in urls]
+        candidates.setdefault("links", [])
+        return candidates
+
+    def groups(self, html):
+        """Raw values per rule from a results page's source (see :meth:`candidates`)."""
+        return self._raw_values(parse_html(html))
+
+    def extract(self, html):
+        """Extract the candidates dict from a rendered results page's source."""
+        with spans.span("extract", method="html", bytes=len(html)) as span:
+            candidates = self.candidates(self.groups(html))
+            span.set(items=count_items(candidates))
+        return candidates
+
+    def extract_in_browser(self, driver):
+        """Extract the candidates dict by running :data:`EXTRACT_SCRIPT` in ``driver``."""
+        with spans.span("extract", method="script") as span:
+            candidates = self.candidates(self._script_groups(driver))
+            span.set(items=count_items(candidates))
+        return candidates
+
+    def _script_groups(self, driver):
+        groups = driver.execute_script(EXTRACT_SCRIPT, self.script_spec)
+        if not isinstance(groups, dict):
+            raise ValueError(f"unexpected script result {type(groups).__name__}")
+        missing = set(self.rules) - set(groups)
+        if missing:
+            raise ValueError(f"script result is missing {sorted(missing)}")
+        return groups
+
+    def collect(self, url, served=None):
+        """Fetch the results page and extract it.
+
+        ``served["transport"]`` is set to the transport that produced the
+        result (``"http"``, ``"browser"`` or ``"replay"``).
+        """
+        served = {} if served is None else served
+        if cassette.replaying():
+            served["transport"] = REPLAY
+            return self.extract(cassette.replay_page(url))
+        if self.transport == HTTP:
+            print(f"  Fetching: {url}")
+            html = fetch_page(url)
+            if html is not None:
+                candidates = self.extract(html)
+                if not is_empty(candidates):
+                    served["transport"] = HTTP
+                    return candidates
+                print("  HTTP fetch found no results")
+            print("  Falling back to browser")
+
+        served["transport"] = BROWSER
+        batch = _batch
+        if batch is not None and self.name in batch.names:
+            return batch.render(self, url)
+        with utils.lease_driver(self.blocking) as driver:
+            utils.load_page(driver, url, self.ready, self.ready_timeout)
+            return self.extract_loaded(driver)
+
+    def extract_loaded(self, driver):
+        """Extract the candidates dict from the page in the driver's current tab."""
+        if self.extraction == "script":
+            try:
+                return self.extract_in_browser(driver)
+            except (WebDriverException, ValueError, KeyError, TypeError) as e:
+                msg = getattr(e, "msg", None) or e
+                print(f"  In-browser extraction failed, parsing page source: {msg}")
+        return self.extract(driver.page_source)
+
+    def snapshot(self, driver):
+        """Capture what extraction needs from the page in the driver's current tab.
+
+        Returns:
+            tuple: ``("groups", raw values)`` from :data:`EXTRACT_SCRIPT`, or
+            ``("html", page source)`` for ``"html"`` sites and when the script
+            fails. The browser is not needed to turn either into candidates
+            (:meth:`candidates` / :meth:`extract`).
+        """
+        if self.extraction == "script":
+            try:
+                return "groups", self._script_groups(driver)
+            except (WebDriverException, ValueError) as e:
+                msg = getattr(e, "msg", None) or e
+                print(f"  In-browser extraction failed, taking page source: {msg}")
+        return "html", driver.page_source
+
+    def _download(self, images, keyword, folder):
+        jobs = [
+            (img_url, os.path.join(folder, f"{self.name}_{keyword}_{i}{ext}"))
+            for i, (img_url, ext) in enumerate(images, 1)
+        ]
+        results = download_many(jobs)
+        downloaded = sum(r["ok"] for r in results)
+        return downloaded, len(results) - downloaded
+
+    def _write_links(self, keyword, folder, links):
+        filepath = os.path.join(folder, self.links_file)
+        with open(filepath, "w", encoding="utf-8") as f:
+            f.write(f"{self.label} links for: {keyword}\n")
+            f.write("=" * 50 + "\n\n")
+            for link in links:
+                f.write(f"{link}\n")
+        print(f"  Saved {len(links)} links to {self.links_file}")
+
+    def scrape(self, keyword, folder):
+        """Search for ``keyword``, download images and save detail links.
+
+        Returns:
+            dict: ``downloaded``, ``links`` (links written), ``failed``
+            (image downloads that did not succeed) and ``transport``
+            (``"http"``, ``"browser"`` or ``"cache"``), or None on error.
+        """
+        print(f"\n[{self.label}] Searching for: {keyword}")
+        try:
+            url = self.url_for(keyword)
+            served = {"transport": CACHE}
+            batch = _batch
+            try:
+                candidates = cached(self.name, keyword, url, lambda: self.collect(url, served))
+            finally:
+                if batch is not None:
+                    batch.arrive(self.name)
+            return self.save(keyword, folder, candidates, served["transport"])
+
+        except Exception as e:
+            print(f"  {self.label} error: {e}")
+
+    def save(self, keyword, folder, candidates, transport):
+        """Download the images in ``candidates`` and save its detail links.
+
+        Returns:
+            dict: The summary described in :meth:`scrape`.
+        """
+        links = candidates["links"]
+
+        downloaded = failed = 0
+        if candidates.get("images"):
+            downloaded, failed = self._download(candidates["images"], keyword, folder)
+        if downloaded == 0 and candidates.get("fallback_images"):
+            downloaded, failed = self._download(candidates["fallback_images"], keyword, folder)
+        if downloaded:
+            print(f"  Downloaded {downloaded} images from {self.label}")
+
+        saved = 0
+        if links and self.links_file:
+            self._write_links(keyword, folder, links)
+            saved = len(links)
+        elif links and downloaded == 0:
+            save_links(os.path.join(folder, "links.txt"), links, self.label)
+            saved = len(links)
+        elif downloaded == 0:
+            print(f"  No results found for {self.label}")
+
+        return {
+            "downloaded": downloaded,
+            "links": saved,
+            "failed": failed,
+            "transport": transport,
+        }
+
+    def scraper(self):
+        """Return a ``scrape_<name>(keyword, folder)`` function for this site."""
+        def scrape(keyword, folder):
+            return self.scrape(keyword, folder)
+        scrape.__name__ = scrape.__qualname__ = f"scrape_{self.name}"
+        scrape.__doc__ = f"Scrape {self.label} for icons - images and links."
+        return scrape
+
+
+class TabBatch:
+    """Load the browser pages of several sites in tabs of one browser.
+
+    Each site's scrape runs in its own thread as usual. A site that needs
+    the browser calls :meth:`render` and waits; a site that was served from
+    the cache or over HTTP calls :meth:`arrive` instead. Once every site in
+    ``names`` has done one or the other, the last thread to arrive leases a
+    single driver, starts all waiting navigations at once in separate tabs
+    (:func:`utils.load_in_tabs`), and extracts each tab in turn.
+
+    All sites in ``names`` must be running concurrently, or the batch waits
+    forever for the ones that have not started.
+
+    Args:
+        names (iterable): Names of the sites taking part.
+    """
+
+    def __init__(self, names):
+        self.names = frozenset(names)
+        self._waiting = set(self.names)
+        self._requests = []  # (site, url, future, span of the requesting unit)
+        self._lock = threading.Lock()
+
+    def render(self, site, url):
+        """Queue ``url`` for ``site`` and return its candidates once loaded."""
+        future = Future()
+        with self._lock:
+            self._requests.append((site, url, future, spans.current()))
+        self.arrive(site.name)
+        return future.result()
+
+    def arrive(self, name):
+        """Mark ``name`` as done with collection; the last arrival renders the batch."""
+        with self._lock:
+            self._waiting.discard(name)
+            if self._waiting or not self._requests:
+                return
+            requests, self._requests = self._requests, []
+        self._render(requests)
+
+    def _render(self, requests):
+        print(f"\n  Loading {len(requests)} page(s) in tabs of one browser")
+        # The shared browser work belongs to no single unit, so it is its own
+        # root span; each tab's extraction goes back under its unit's span.
+        try:
+            with profiling.scope(profiling.SHARED), spans.detached(), \
+                    spans.span("tab_batch", pages=len(requests)):
+                with utils.lease_driver() as driver:
+                    pages = [
+                        (url, site.ready, site.ready_timeout, site.blocking)
+                        for site, url, _, _ in requests
+                    ]
+                    with spans.span("navigate", pages=len(pages)):
+                        loaded = utils.load_in_tabs(driver, pages)
+                    for (site, url, future, parent), (handle, _) in zip(requests, loaded):
+                        try:
+                            driver.switch_to.window(handle)
+                            if cassette.recording():
+                                cassette.record_page(url, driver.page_source)
+                            with spans.activate(parent):
+                                future.set_result(site.extract_loaded(driver))
+                        except Exception as e:
+                            future.set_exception(e)
+        except Exception as e:
+            for _, _, future, _ in requests:
+                if not future.done():
+                    future.set_exception(e)
+
+
+_batch = None
+
+
+def leave_batch(name):
+    """Tell the current tab batch, if any, that ``name`` will not load a page.
+
+    For sources skipped before they scrape, so the batch does not wait for
+    them.
+    """
+    batch = _batch
+    if batch is not None:
+        batch.arrive(name)
+
+
+@contextmanager
+def tab_batch(names):
+    """Share one browser between the sites in ``names`` for the ``with`` block.
+
+    Used by the runner's tab mode for one keyword at a time; see
+    :class:`TabBatch` for the requirement that the sites run concurrently.
+    """
+    global _batch
+    _batch = TabBatch(names)
+    try:
+        yield _batch
+    finally:
+        _batch = None
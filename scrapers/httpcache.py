@@ -0,0 +1,152 @@
+"""On-disk HTTP cache for downloaded assets, revalidated with ETag/Last-Modified."""
+
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+
+DEFAULT_TTL = 24 * 60 * 60
+DEFAULT_MAX_BYTES = 500 * 1024 * 1024
+
+
+class HTTPCache:
+    """Cache response bodies and their validators per URL.
+
+    Each URL is stored as ``<key>.body`` plus ``<key>.json`` holding the
+    ``ETag``, ``Last-Modified``, detected type, digest and store time. An
+    entry younger than ``ttl`` is served without any request; an older one
+    is revalidated with ``If-None-Match`` / ``If-Modified-Since`` and served
+    locally on ``304 Not Modified``. When the bodies exceed ``max_bytes`` the
+    least recently used entries are evicted.
+
+    Bodies are hardlinked where possible, so a cached asset and its copy in
+    the output folder share disk space.
+
+    Args:
+        root (str): Cache directory, e.g. ``Output/.cache/http``.
+        ttl (float): Seconds an entry is used without revalidation.
+        max_bytes (int): Size budget for cached bodies.
+    """
+
+    def __init__(self, root, ttl=DEFAULT_TTL, max_bytes=DEFAULT_MAX_BYTES):
+        self.root = root
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._size = None
+        os.makedirs(root, exist_ok=True)
+
+    def _paths(self, url):
+        key = hashlib.sha256(url.encode("utf-8")).hexdigest()
+        base = os.path.join(self.root, key)
+        return base + ".json", base + ".body"
+
+    def lookup(self, url):
+        """Return the cache entry for ``url`` or None.
+
+        The entry is a dict with ``etag``, ``last_modified``, ``type``,
+        ``digest``, ``size``, ``stored_at`` and ``body`` (path), and is marked
+        as recently used.
+        """
+        meta_path, body_path = self._paths(url)
+        try:
+            with open(meta_path, encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if not os.path.exists(body_path):
+            return None
+        entry["body"] = body_path
+        try:
+            os.utime(meta_path)  # LRU clock
+        except OSError:
+            pass
+        return entry
+
+    def is_fresh(self, entry):
+        return time.time() - entry.get("stored_at", 0) < self.ttl
+
+    @staticmethod
+    def validators(entry):
+        """Return conditional request headers for ``entry``."""
+        headers = {}
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+        return headers
+
+    def put(self, url, path, response_headers, kind=None, digest=None):
+        """Cache the body at ``path`` with the validators from a response.
+
+        Responses without ``ETag`` or ``Last-Modified`` are still cached and
+        served until ``ttl`` expires, then fetched again in full.
+        """
+        meta_path, body_path = self._paths(url)
+        tmp = f"{body_path}.{threading.get_ident()}.tmp"
+        try:
+            os.link(path, tmp)
+        except OSError:
+            shutil.copyfile(path, tmp)
+        old_size = os.path.getsize(body_path) if os.path.exists(body_path) else 0
+        os.replace(tmp, body_path)
+        size = os.path.getsize(body_path)
+        self._write_meta(meta_path, {
+            "url": url,
+            "etag": response_headers.get("ETag"),
+            "last_modified": response_headers.get("Last-Modified"),
+            "type": kind,
+            "digest": digest,
+            "size": size,
+            "stored_at": time.time(),
+        })
+        with self._lock:
+            if self._size is not None:
+                self._size += size - old_size
+        self._evict()
+
+    def refresh(self, url, entry):
+        """Restart the TTL of ``entry`` after a successful revalidation."""
+        meta_path, _ = self._paths(url)
+        entry = dict(entry, stored_at=time.time())
+        entry.pop("body", None)
+        self._write_meta(meta_path, entry)
+
+    @staticmethod
+    def _write_meta(meta_path, entry):
+        tmp = f"{meta_path}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(entry, f)
+        os.replace(tmp, meta_path)
+
+    def _evict(self):
+        """Drop least recently used entries until within ``max_bytes``."""
+        with self._lock:
+            if self._size is None:
+                self._size = sum(
+                    e.stat().st_size for e in os.scandir(self.root)
+                    if e.name.endswith(".body")
+                )
+            if self._size <= self.max_bytes:
+                return
+            entries = []
+            for e in os.scandir(self.root):
+                if e.name.endswith(".json"):
+                    body = e.path[:-len(".json")] + ".body"
+                    try:
+                        entries.append((e.stat().st_mtime, e.path, body, os.path.getsize(body)))
+                    except OSError:
+                        continue
+            entries.sort()
+            for _, meta_path, body_path, size in entries:
+                if self._size <= self.max_bytes:
+                    break
+                for path in (meta_path, body_path):
+                    try:
+                        os.remove(path)
+                    except OSError:
+                        pass
+                self._size -= size
+
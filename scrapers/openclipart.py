@@ -1,76 +1,175 @@
 """OpenClipart scraper - https://openclipart.org/"""
 
 import os
-import time
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import urljoin, quote
-from bs4 import BeautifulSoup
-from . import utils
-from .utils import download_file, save_links
+from lxml import etree
+from . import cassette, profiling, spans, utils
+from .downloader import download_many
+from .engine import parse_html
+from .resultcache import cached
+from .transport import BROWSER, CACHE, HTTP, REPLAY, fetch_page
+from .utils import save_links
 
+BASE_URL = "https://openclipart.org"
 
-def scrape_openclipart(keyword, folder):
-    """Scrape OpenClipart for clipart - download if possible."""
-    print(f"\n[OpenClipart] Searching for: {keyword}")
-    driver = None
-    try:
-        driver = utils.get_driver()
-        url = f"https://openclipart.org/search/?query={quote(keyword)}"
-        driver.get(url)
-        time.sleep(3)
-        
-        soup = BeautifulSoup(driver.page_source, 'lxml')
-        
-        downloaded = 0
+# Results are ready once this matches (see utils.wait_for_ready)
+READY_SELECTOR = "a[href*='/detail/']"
+READY_TIMEOUT = 10
+DETAIL_READY_SELECTOR = "a[href*='.svg'], a[href*='.png']"
+DETAIL_READY_TIMEOUT = 8
+
+DETAIL_LINKS_XPATH = etree.XPath("//a[contains(@href, '/detail/')]/@href")
+LINKS_XPATH = etree.XPath("//a/@href")
+
+MAX_DETAILS = 10
+
+
+def _detail_links(html):
+    """Return the clipart detail page URLs on a search results page."""
+    with spans.span("extract", method="html", bytes=len(html)) as span:
         links_found = []
-        
-        # Find clipart detail pages
-        for a in soup.find_all('a', href=True):
-            href = a['href']
-            if '/detail/' in href:
-                full_url = urljoin("https://openclipart.org", href)
-                if full_url not in links_found:
-                    links_found.append(full_url)
-        
-        # Try to download from detail pages
-        for i, link in enumerate(links_found[:10]):
+        seen = set()
+        for href in DETAIL_LINKS_XPATH(parse_html(html)):
+            full_url = urljoin(BASE_URL, href)
+            if full_url not in seen:
+                seen.add(full_url)
+                links_found.append(full_url)
+        span.set(items=min(len(links_found), MAX_DETAILS))
+    return links_found[:MAX_DETAILS]
+
+
+def _download_urls(html):
+    """Return ``[svg_url, png_url]`` (either may be None) from a detail page."""
+    svg_url = png_url = None
+    with spans.span("extract", method="html", bytes=len(html)) as span:
+        for href in LINKS_XPATH(parse_html(html)):
+            lower = href.lower()
+            if svg_url is None and '.svg' in lower:
+                svg_url = urljoin(BASE_URL, href)
+            elif png_url is None and '.png' in lower:
+                png_url = urljoin(BASE_URL, href)
+        span.set(items=(svg_url is not None) + (png_url is not None))
+    return [svg_url, png_url]
+
+
+def _collect_http(url):
+    """Fetch the search and detail pages without a browser.
+
+    Returns None if the search page is blocked or empty, or no detail page
+    yields a download link, so the caller can fall back to the browser.
+    """
+    print(f"  Fetching: {url}")
+    html = fetch_page(url)
+    if html is None:
+        return None
+    links_found = _detail_links(html)
+    if not links_found:
+        print("  HTTP fetch found no results")
+        return None
+
+    def details(link):
+        page = fetch_page(link)
+        return _download_urls(page) if page is not None else [None, None]
+
+    with ThreadPoolExecutor(max_workers=4) as executor:
+        files = list(executor.map(profiling.wrap(spans.wrap(details)), links_found))
+    if not any(svg_url or png_url for svg_url, png_url in files):
+        print("  HTTP detail pages had no downloads")
+        return None
+    return {"files": files, "links": links_found}
+
+
+def _collect_browser(url):
+    """Render the search page and each detail page, extracting SVG/PNG download URLs."""
+    with utils.lease_driver() as driver:
+        utils.load_page(driver, url, READY_SELECTOR, READY_TIMEOUT)
+        links_found = _detail_links(driver.page_source)
+
+        # Collect the SVG (preferred) and PNG download links of each detail page
+        files = []
+        for link in links_found:
             try:
-                driver.get(link)
-                time.sleep(2)
-                page_soup = BeautifulSoup(driver.page_source, 'lxml')
-                
-                # Find SVG download link
-                for a in page_soup.find_all('a', href=True):
-                    href = a['href']
-                    if '.svg' in href.lower():
-                        svg_url = urljoin("https://openclipart.org", href)
-                        filename = f"openclipart_{keyword}_{i+1}.svg"
-                        filepath = os.path.join(folder, filename)
-                        if download_file(svg_url, filepath):
-                            downloaded += 1
-                            break
-                
-                # Check for PNG
-                if downloaded <= i:
-                    for a in page_soup.find_all('a', href=True):
-                        href = a['href']
-                        if '.png' in href.lower():
-                            png_url = urljoin("https://openclipart.org", href)
-                            filename = f"openclipart_{keyword}_{i+1}.png"
-                            filepath = os.path.join(folder, filename)
-                            if download_file(png_url, filepath):
-                                downloaded += 1
-                                break
-                                
+                utils.load_page(driver, link, DETAIL_READY_SELECTOR, DETAIL_READY_TIMEOUT)
+                files.append(_download_urls(driver.page_source))
+
             except Exception as e:
                 print(f"  Error processing clipart: {e}")
-        
+                files.append([None, None])
+
+    return {"files": files, "links": links_found}
+
+
+def _collect_replay(url):
+    """Extract download URLs from the search and detail pages of a cassette."""
+    links_found = _detail_links(cassette.replay_page(url))
+    files = []
+    for link in links_found:
+        html = cassette.page(link)
+        files.append(_download_urls(html) if html is not None else [None, None])
+    return {"files": files, "links": links_found}
+
+
+def _collect(url, served):
+    """Extract SVG/PNG download URLs over HTTP, or in the browser if that fails.
+
+    Returns ``files`` as ``[svg_url, png_url]`` pairs (either may be None),
+    one per detail page, and sets ``served["transport"]``.
+    """
+    if cassette.replaying():
+        served["transport"] = REPLAY
+        return _collect_replay(url)
+    candidates = _collect_http(url)
+    if candidates is not None:
+        served["transport"] = HTTP
+        return candidates
+    print("  Falling back to browser")
+    served["transport"] = BROWSER
+    return _collect_browser(url)
+
+
+def scrape_openclipart(keyword, folder):
+    """Scrape OpenClipart for clipart - download if possible."""
+    print(f"\n[OpenClipart] Searching for: {keyword}")
+    try:
+        url = f"{BASE_URL}/search/?query={quote(keyword)}"
+        served = {"transport": CACHE}
+        candidates = cached("openclipart", keyword, url, lambda: _collect(url, served))
+        links_found = candidates["links"]
+
+        first_jobs = []
+        png_fallback = {}
+        for i, (svg_url, png_url) in enumerate(candidates["files"], 1):
+            png_job = None
+            if png_url:
+                png_job = (png_url, os.path.join(folder, f"openclipart_{keyword}_{i}.png"))
+            if svg_url:
+                svg_path = os.path.join(folder, f"openclipart_{keyword}_{i}.svg")
+                first_jobs.append((svg_url, svg_path))
+                png_fallback[svg_path] = png_job
+            elif png_job:
+                first_jobs.append(png_job)
+
+        # Download everything at once, then retry failed SVGs as PNGs
+        results = download_many(first_jobs)
+        downloaded = sum(r["ok"] for r in results)
+        png_jobs = [
+            png_fallback[r["path"]] for r in results
+            if not r["ok"] and png_fallback.get(r["path"])
+        ]
+        downloaded += sum(r["ok"] for r in download_many(png_jobs))
+
         if downloaded == 0 and links_found:
-            save_links(os.path.join(folder, "links.txt"), links_found[:10], "OpenClipart")
+            save_links(os.path.join(folder, "links.txt"), links_found, "OpenClipart")
         else:
             print(f"  Downloaded {downloaded} files from OpenClipart")
-            
+
+        return {
+            "downloaded": downloaded,
+            "links": len(links_found),
+            "failed": len(first_jobs) - downloaded,
+            "transport": served["transport"],
+        }
+
     except Exception as e:
         print(f"  OpenClipart error: {e}")
-    finally:
-        if driver:
-            driver.quit()
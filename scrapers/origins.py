@@ -0,0 +1,62 @@
+"""Point sources at another origin, e.g. a local stand-in of each site.
+
+Only the scheme and host of a source's URLs are replaced. Paths and
+queries stay as they are, so a stand-in only has to serve the same paths
+as the real site (see ``benchmarks/standin.py``).
+"""
+
+from urllib.parse import urlsplit, urlunsplit
+
+from . import openclipart, scidraw
+from .sites import SITES
+
+# Sources not built on the engine, with the module attribute holding their root
+_MODULE_URLS = {
+    "scidraw": (scidraw, "HOME_URL"),
+    "openclipart": (openclipart, "BASE_URL"),
+}
+
+
+def with_origin(url, origin):
+    """Return ``url`` with scheme and host taken from ``origin``."""
+    new = urlsplit(origin)
+    return urlunsplit((new.scheme, new.netloc) + tuple(urlsplit(url)[2:]))
+
+
+def origin_of(url):
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{parts.netloc}"
+
+
+def current():
+    """``{source: origin}`` of every source."""
+    origins = {name: origin_of(site.search_url) for name, site in SITES.items()}
+    for name, (module, attr) in _MODULE_URLS.items():
+        origins[name] = origin_of(getattr(module, attr))
+    return origins
+
+
+def rebase(origins):
+    """Send each source in ``origins`` (``{source: "http://host:port"}``) there.
+
+    Returns:
+        dict: The previous origins of those sources, to undo the change
+        with another call.
+
+    Raises:
+        KeyError: A source name is unknown.
+    """
+    previous = {}
+    for name, origin in origins.items():
+        site = SITES.get(name)
+        if site is not None:
+            previous[name] = origin_of(site.search_url)
+            site.search_url = with_origin(site.search_url, origin)
+            site.base_url = with_origin(site.base_url, origin)
+        elif name in _MODULE_URLS:
+            module, attr = _MODULE_URLS[name]
+            previous[name] = origin_of(getattr(module, attr))
+            setattr(module, attr, with_origin(getattr(module, attr), origin))
+        else:
+            raise KeyError(f"unknown source {name!r}")
+    return previous
@@ -0,0 +1,303 @@
+"""CPU and memory profiling of scraping units, scoped per source.
+
+With a :class:`CPUProfiler` installed, every thread working for a source
+(the unit's own thread, its deadline thread, its download workers) runs
+under a ``cProfile`` profile of that source, so ``scrape_flaticon`` and
+``scrape_bioart`` get separate profiles. At the end, per source:
+
+* ``<source>.pstats`` - the merged profile, for ``python -m pstats``,
+  snakeviz and the like;
+* ``<source>.collapsed`` - collapsed stacks (``a;b;c microseconds``) for
+  flamegraph tools. cProfile only records caller/callee pairs, so stacks
+  are rebuilt from them and the split of a function's time between its
+  callers is proportional rather than exact.
+
+With a :class:`MemoryProfiler` installed, ``tracemalloc`` runs for the
+whole run and a snapshot is taken when each (source, keyword) unit starts
+and ends; the top allocation sites by growth between the two are written
+to ``memory.txt``. Allocation tracing is process-wide, so units running at
+the same time see each other's allocations: use one worker for exact
+attribution.
+
+Work is tied to a source with :func:`scope`, and work handed to another
+thread keeps it with :func:`wrap`, as for :mod:`scrapers.spans`. Nothing
+happens unless a profiler is installed with :func:`configure`.
+"""
+
+import cProfile
+import os
+import pstats
+import re
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager, nullcontext
+
+CPU = "cpu"
+MEMORY = "mem"
+
+# Scope of browser work shared by several sources (tab batches)
+SHARED = "shared"
+
+DEFAULT_TOP = 15
+
+# Collapsed-stack paths thinner than this many seconds are dropped
+MIN_STACK_SECONDS = 1e-5
+MAX_STACK_DEPTH = 100
+
+# From Python 3.12 cProfile hooks into sys.monitoring, which is
+# process-wide: one profile can be enabled at a time, whatever the thread
+PROCESS_WIDE = sys.version_info >= (3, 12)
+
+_local = threading.local()
+
+
+def _file_name(name):
+    return re.sub(r"[^\w.-]+", "_", name.strip()) or "_"
+
+
+def _frame_label(func):
+    filename, line, name = func
+    if filename == "~":  # built-in
+        return name
+    return f"{name} ({os.path.basename(filename)}:{line})"
+
+
+def collapsed_stacks(stats):
+    """Rebuild ``{"a;b;c": microseconds}`` stacks from a ``pstats.Stats``.
+
+    Each function's own time is spread over the paths leading to it in
+    proportion to the cumulative time of each caller/callee pair.
+    """
+    table = stats.stats
+    callees = {}
+    for func, (_, _, _, _, callers) in table.items():
+        for caller, edge in callers.items():
+            callees.setdefault(caller, []).append((func, edge[3]))
+    roots = [func for func, entry in table.items() if not entry[4]]
+
+    stacks = {}
+
+    def walk(func, path, on_path, share):
+        _, _, own, total, _ = table[func]
+        path = path + (_frame_label(func),)
+        micros = int(own * share * 1e6)
+        if micros:
+            key = ";".join(path)
+            stacks[key] = stacks.get(key, 0) + micros
+        if len(path) >= MAX_STACK_DEPTH:
+            return
+        on_path = on_path | {func}
+        for callee, edge_total in callees.get(func, ()):
+            callee_total = table[callee][3]
+            if callee in on_path or callee_total <= 0:
+                continue
+            callee_share = share * edge_total / callee_total
+            if callee_total * callee_share >= MIN_STACK_SECONDS:
+                walk(callee, path, on_path, callee_share)
+
+    for root in roots:
+        walk(root, (), frozenset(), 1.0)
+    return stacks
+
+
+class CPUProfiler:
+    """Per-source ``cProfile`` profiles (see the module docstring)."""
+
+    mode = CPU
+
+    def __init__(self):
+        self._profiles = {}  # source -> [cProfile.Profile]
+        self._lock = threading.Lock()
+        self._warned = False
+
+    @contextmanager
+    def scope(self, name):
+        outer = getattr(_local, "active", None)
+        if outer is not None and outer[0] == name:
+            yield
+            return
+        # cProfile hooks are per thread and do not nest: pause the outer one
+        if outer is not None:
+            outer[1].disable()
+        profile = cProfile.Profile()
+        if not self._enable(profile):
+            # Another thread's profile is enabled (PROCESS_WIDE) and counts
+            # this work instead
+            try:
+                yield
+            finally:
+                if outer is not None:
+                    self._enable(outer[1])
+            return
+        _local.active = (name, profile)
+        try:
+            yield
+        finally:
+            profile.disable()
+            _local.active = outer
+            if outer is not None:
+                self._enable(outer[1])
+            with self._lock:
+                self._profiles.setdefault(name, []).append(profile)
+
+    def _enable(self, profile):
+        """Enable ``profile``; False if another profile already holds the hook."""
+        try:
+            profile.enable()
+            return True
+        except ValueError:
+            with self._lock:
+                warned, self._warned = self._warned, True
+            if not warned:
+                print("[profiling] Another CPU profile is already active: cProfile "
+                      "is process-wide on this Python, so per-source CPU profiles "
+                      "need --workers 1 (overlapping work is counted in the "
+                      "active source's profile)")
+            return False
+
+    def unit_started(self, source, keyword):
+        return None
+
+    def unit_finished(self, token):
+        pass
+
+    def write(self, folder):
+        """Write ``<source>.pstats`` and ``<source>.collapsed`` per source.
+
+        Returns:
+            list of str: Paths written.
+        """
+        os.makedirs(folder, exist_ok=True)
+        with self._lock:
+            profiles = dict(self._profiles)
+        written = []
+        for name, runs in sorted(profiles.items()):
+            stats = pstats.Stats(*runs)
+            base = os.path.join(folder, _file_name(name))
+            stats.dump_stats(base + ".pstats")
+            with open(base + ".collapsed", "w", encoding="utf-8") as f:
+                for stack, micros in sorted(collapsed_stacks(stats).items()):
+                    f.write(f"{stack} {micros}\n")
+            written += [base + ".pstats", base + ".collapsed"]
+        return written
+
+
+class MemoryProfiler:
+    """Top allocation growth per (source, keyword) unit (see the module docstring).
+
+    Tracing starts when the profiler is created and stops in :meth:`write`.
+
+    Args:
+        top (int): Allocation sites kept per unit.
+        frames (int): Frames kept per allocation by ``tracemalloc``.
+    """
+
+    mode = MEMORY
+
+    def __init__(self, top=DEFAULT_TOP, frames=1):
+        self.top = top
+        self._units = []  # (source, keyword, seconds, growth, top sites, traced, peak)
+        self._lock = threading.Lock()
+        tracemalloc.start(frames)
+
+    @contextmanager
+    def scope(self, name):
+        yield
+
+    @staticmethod
+    def _snapshot():
+        return tracemalloc.take_snapshot().filter_traces((
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+            tracemalloc.Filter(False, "<unknown>"),
+        ))
+
+    def unit_started(self, source, keyword):
+        if not tracemalloc.is_tracing():
+            return None
+        return source, keyword, time.perf_counter(), self._snapshot()
+
+    def unit_finished(self, token):
+        if token is None or not tracemalloc.is_tracing():
+            return
+        source, keyword, start, before = token
+        diff = self._snapshot().compare_to(before, "lineno")
+        growth = sum(stat.size_diff for stat in diff)
+        traced, peak = tracemalloc.get_traced_memory()
+        with self._lock:
+            self._units.append((
+                source, keyword, time.perf_counter() - start, growth,
+                diff[:self.top], traced, peak,
+            ))
+
+    def write(self, folder):
+        """Write the top allocation sites of each unit to ``memory.txt``.
+
+        Returns:
+            list of str: Paths written.
+        """
+        os.makedirs(folder, exist_ok=True)
+        path = os.path.join(folder, "memory.txt")
+        with self._lock:
+            units = list(self._units)
+        with open(path, "w", encoding="utf-8") as f:
+            for source, keyword, seconds, growth, sites, traced, peak in units:
+                f.write(
+                    f"=== {source} / {keyword}: {growth / 1024:+.1f} KiB in {seconds:.1f}s "
+                    f"(traced {traced / 2**20:.1f} MiB, peak {peak / 2**20:.1f} MiB) ===\n"
+                )
+                for stat in sites:
+                    f.write(f"{stat}\n")
+                f.write("\n")
+        tracemalloc.stop()
+        return [path]
+
+
+_profiler = None
+
+
+def configure(profiler):
+    """Install ``profiler`` (a :class:`CPUProfiler`, :class:`MemoryProfiler` or None)."""
+    global _profiler
+    _profiler = profiler
+
+
+def scope(name):
+    """Attribute the ``with`` block's CPU time in this thread to ``name``."""
+    profiler = _profiler
+    if profiler is None:
+        return nullcontext()
+    return profiler.scope(name)
+
+
+def current():
+    """The source this thread's work is attributed to, or None."""
+    active = getattr(_local, "active", None)
+    return active[0] if active is not None else None
+
+
+def wrap(func):
+    """Bind ``func`` to the current scope, for running it in another thread."""
+    profiler = _profiler
+    name = current()
+    if profiler is None or name is None:
+        return func
+
+    def run(*args, **kwargs):
+        with profiler.scope(name):
+            return func(*args, **kwargs)
+    return run
+
+
+def unit_started(source, keyword):
+    """Mark the start of a unit; pass the result to :func:`unit_finished`."""
+    profiler = _profiler
+    return None if profiler is None else profiler.unit_started(source, keyword)
+
+
+def unit_finished(token):
+    profiler = _profiler
+    if profiler is not None:
+        profiler.unit_finished(token)
@@ -0,0 +1,219 @@
+"""Adaptive per-host rate limiting, retry backoff and per-source circuit breaking.
+
+Every request a scraper makes, whether a browser page load, an HTTP page
+fetch or an asset download, first takes a token from its host's bucket in
+the shared :class:`RateLimiter`. Each host's rate adapts on its own
+(additive increase, multiplicative decrease): successful responses raise
+it a little, while 429/503 responses and timeouts halve it, and a
+``Retry-After`` header pauses the host entirely for that long. A flaky
+host therefore only slows itself down.
+
+Failed downloads are retried after :func:`backoff_delay`, and
+:class:`CircuitBreaker` stops scraping a source that keeps failing.
+"""
+
+import email.utils
+import random
+import threading
+import time
+from urllib.parse import urlsplit
+
+DEFAULT_RATE = 4.0  # requests per second each host starts at
+MIN_RATE = 0.2
+MAX_RATE = 20.0
+DEFAULT_BURST = 4
+INCREASE = 0.25  # rate added per successful response
+DECREASE = 0.5  # factor applied on throttling
+MAX_RETRY_AFTER = 300
+
+# Responses that mean the host wants us to slow down
+THROTTLE_STATUSES = frozenset({429, 503})
+
+
+def host_of(url):
+    return urlsplit(url).netloc.lower()
+
+
+def parse_retry_after(value):
+    """Seconds to wait from a ``Retry-After`` header (delta or HTTP date), or None."""
+    if not value:
+        return None
+    value = value.strip()
+    if value.isdigit():
+        seconds = int(value)
+    else:
+        try:
+            when = email.utils.parsedate_to_datetime(value)
+        except (TypeError, ValueError):
+            return None
+        seconds = when.timestamp() - time.time()
+    return min(max(0.0, seconds), MAX_RETRY_AFTER)
+
+
+def backoff_delay(attempt, base=1.0, cap=30.0):
+    """Full-jitter exponential backoff before retry number ``attempt`` (0-based)."""
+    return random.uniform(0, min(cap, base * 2 ** attempt))
+
+
+class _Bucket:
+    """Token bucket of one host. Not thread-safe; guarded by the limiter."""
+
+    def __init__(self, rate, burst):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+        self.last_decrease = 0.0
+
+    def reserve(self, now):
+        """Take a token and return how long to wait before using it.
+
+        Tokens may go negative: each caller reserves its place in line, so
+        waiting callers are served in order without polling.
+        """
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1
+        wait = -self.tokens / self.rate if self.tokens < 0 else 0.0
+        return max(wait, self.paused_until - now)
+
+
+class RateLimiter:
+    """Per-host token buckets with AIMD rate adaptation.
+
+    Args:
+        rate (float): Starting requests per second for each host.
+        burst (int): Requests a host may receive back to back.
+        min_rate (float): Floor the rate never drops below.
+        max_rate (float): Ceiling for additive increases.
+        enabled (bool): With False, :meth:`acquire` never waits.
+    """
+
+    def __init__(self, rate=DEFAULT_RATE, burst=DEFAULT_BURST, min_rate=MIN_RATE,
+                 max_rate=MAX_RATE, enabled=True):
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.min_rate = min_rate
+        self.max_rate = max(rate, max_rate)
+        self.enabled = enabled
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def _bucket(self, host):
+        bucket = self._buckets.get(host)
+        if bucket is None:
+            bucket = self._buckets[host] = _Bucket(self.rate, self.burst)
+        return bucket
+
+    def acquire(self, url):
+        """Block until a request to the host of ``url`` may be sent.
+
+        Returns:
+            float: Seconds waited.
+        """
+        if not self.enabled:
+            return 0.0
+        with self._lock:
+            wait = self._bucket(host_of(url)).reserve(time.monotonic())
+        if wait > 0:
+            time.sleep(wait)
+        return wait
+
+    def record(self, url, status=None, timeout=False, retry_after=None):
+        """Adapt the host's rate to the outcome of a request.
+
+        Args:
+            url (str): The requested URL.
+            status (int): HTTP status, if a response arrived.
+            timeout (bool): The request timed out or the connection failed.
+            retry_after (float): Seconds from a ``Retry-After`` header.
+        """
+        host = host_of(url)
+        now = time.monotonic()
+        with self._lock:
+            bucket = self._bucket(host)
+            if retry_after:
+                bucket.paused_until = max(bucket.paused_until, now + retry_after)
+            if timeout or status in THROTTLE_STATUSES:
+                # Requests already in flight fail together; count them once
+                if now - bucket.last_decrease >= 1.0 / bucket.rate:
+                    bucket.rate = max(self.min_rate, bucket.rate * DECREASE)
+                    bucket.last_decrease = now
+                    print(f"[ratelimit] Slowing {host} to {bucket.rate:.2f} req/s")
+            elif status is not None and status < 400:
+                bucket.rate = min(self.max_rate, bucket.rate + INCREASE)
+
+    def rates(self):
+        """Current ``{host: requests per second}``."""
+        with self._lock:
+            return {host: bucket.rate for host, bucket in self._buckets.items()}
+
+
+class CircuitBreaker:
+    """Skip a source after ``threshold`` failures in a row.
+
+    Once open, the circuit stays open for ``cooldown`` seconds. After that a
+    single attempt is let through (half-open): if it succeeds the circuit
+    closes again, and if it fails the cooldown starts over.
+
+    Args:
+        threshold (int): Consecutive failures that open the circuit.
+        cooldown (float): Seconds before a half-open probe is allowed.
+    """
+
+    def __init__(self, threshold=3, cooldown=300):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self._failures = {}
+        self._opened = {}
+        self._probing = set()
+        self._lock = threading.Lock()
+
+    def allow(self, key):
+        """True if ``key`` may be attempted now."""
+        with self._lock:
+            opened = self._opened.get(key)
+            if opened is None:
+                return True
+            if key in self._probing or time.monotonic() - opened < self.cooldown:
+                return False
+            self._probing.add(key)
+            return True
+
+    def record(self, key, ok):
+        """Record the outcome of an attempt allowed by :meth:`allow`."""
+        with self._lock:
+            self._probing.discard(key)
+            if ok:
+                self._failures.pop(key, None)
+                self._opened.pop(key, None)
+                return
+            failures = self._failures[key] = self._failures.get(key, 0) + 1
+            if failures >= self.threshold:
+                if key not in self._opened:
+                    print(f"[ratelimit] Circuit open for {key} after {failures} failures")
+                self._opened[key] = time.monotonic()
+
+    def failures(self, key):
+        with self._lock:
+            return self._failures.get(key, 0)
+
+
+_limiter = RateLimiter()
+_breaker = CircuitBreaker()
+
+
+def configure(rate=DEFAULT_RATE, enabled=True, threshold=3, cooldown=300):
+    """Replace the shared limiter and breaker."""
+    global _limiter, _breaker
+    _limiter = RateLimiter(rate=rate, enabled=enabled)
+    _breaker = CircuitBreaker(threshold=threshold, cooldown=cooldown)
+
+
+def get_limiter():
+    return _limiter
+
+
+def get_breaker():
+    return _breaker
@@ -0,0 +1,122 @@
+"""Cache of extracted search results, so reruns can skip the browser."""
+
+import hashlib
+import json
+import os
+import threading
+import time
+
+from . import cassette
+
+DEFAULT_TTL = 6 * 60 * 60
+DEFAULT_NEGATIVE_TTL = 60 * 60
+
+
+def normalize_keyword(keyword):
+    """Case- and whitespace-insensitive form of a keyword used in cache keys."""
+    return " ".join(keyword.lower().split())
+
+
+def is_empty(candidates):
+    """True if a candidate dict holds no images, links or other results."""
+    return not any(candidates.values())
+
+
+class ResultCache:
+    """Store each scraper's extracted candidates per (source, keyword, URL).
+
+    Only the extracted candidate lists (image URLs, detail links, ...) are
+    stored, never raw HTML. Empty results are cached too, with the shorter
+    ``negative_ttl``, so dead queries are not re-rendered on every run.
+
+    Args:
+        root (str): Cache directory, e.g. ``Output/.cache/results``.
+        ttl (float): Seconds a non-empty result stays valid.
+        negative_ttl (float): Seconds an empty result stays valid.
+        refresh (bool): Ignore existing entries (but still store new ones).
+    """
+
+    def __init__(self, root, ttl=DEFAULT_TTL, negative_ttl=DEFAULT_NEGATIVE_TTL,
+                 refresh=False):
+        self.root = root
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.refresh = refresh
+        os.makedirs(root, exist_ok=True)
+
+    def _path(self, source, keyword, url):
+        key = json.dumps([source, normalize_keyword(keyword), url])
+        return os.path.join(self.root, hashlib.sha256(key.encode("utf-8")).hexdigest() + ".json")
+
+    def get(self, source, keyword, url):
+        """Return cached candidates, or None on a miss or expired entry."""
+        if self.refresh:
+            return None
+        try:
+            with open(self._path(source, keyword, url), encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        candidates = entry["candidates"]
+        ttl = self.negative_ttl if is_empty(candidates) else self.ttl
+        if time.time() - entry["stored_at"] >= ttl:
+            return None
+        return candidates
+
+    def put(self, source, keyword, url, candidates):
+        path = self._path(source, keyword, url)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump({
+                "source": source,
+                "keyword": normalize_keyword(keyword),
+                "url": url,
+                "stored_at": time.time(),
+                "candidates": candidates,
+            }, f)
+        os.replace(tmp, path)
+
+
+_cache = None
+
+
+def configure(cache):
+    """Install ``cache`` (a :class:`ResultCache` or None) for all scrapers."""
+    global _cache
+    _cache = cache
+
+
+def lookup(source, keyword, url):
+    """Return cached candidates for ``(source, keyword, url)``, or None."""
+    cache = _cache
+    if cache is None:
+        return None
+    candidates = cache.get(source, keyword, url)
+    if candidates is not None:
+        print("  Using cached search results")
+    return candidates
+
+
+def store(source, keyword, url, candidates):
+    """Cache freshly extracted candidates, if a cache is configured.
+
+    They are also recorded in, or checked against, the active cassette
+    (see :mod:`scrapers.cassette`).
+    """
+    cassette.extracted(source, keyword, url, candidates)
+    cache = _cache
+    if cache is not None:
+        cache.put(source, keyword, url, candidates)
+
+
+def cached(source, keyword, url, collect):
+    """Return candidates for ``(source, keyword, url)``, calling ``collect`` on a miss.
+
+    ``collect`` is only invoked (and so a browser only leased) when there is
+    no usable cache entry. Exceptions from ``collect`` are not cached.
+    """
+    candidates = lookup(source, keyword, url)
+    if candidates is None:
+        candidates = collect()
+        store(source, keyword, url, candidates)
+    return candidates
@@ -2,119 +2,202 @@
 
 import os
 import time
-from urllib.parse import urljoin
+from urllib.parse import quote, urljoin
 
-from bs4 import BeautifulSoup
+import lxml.html
+from lxml import etree
+from selenium.common.exceptions import TimeoutException
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.common.keys import Keys
 
-from . import utils
-from .utils import download_file, save_links
+from . import cassette, ratelimit, spans, utils
+from .downloader import download_many, get_downloader
+from .engine import count_items, parse_html
+from .resultcache import cached
+from .transport import BROWSER, CACHE, REPLAY
+from .utils import save_links
 
+HOME_URL = "https://scidraw.io/"
 
-def _find_search_input(driver, timeout: int = 15):
-    """Try several common selectors to locate the SciDraw search input."""
-    wait = WebDriverWait(driver, timeout)
-    selectors = [
-        (By.CSS_SELECTOR, "input[type='search']"),
-        (By.CSS_SELECTOR, "input[placeholder*='search' i]"),
-        (By.CSS_SELECTOR, "input[name='q']"),
-        (By.TAG_NAME, "input"),
-    ]
-    for by, value in selectors:
-        try:
-            element = wait.until(EC.presence_of_element_located((by, value)))
-            if element:
-                return element
-        except Exception:
-            continue
-    return None
+# Results are ready once this matches (see utils.wait_for_ready)
+READY_SELECTOR = "div.grid-container-container img"
+READY_TIMEOUT = 15
+# The home page is ready once its search form has rendered
+HOME_READY_SELECTOR = "input"
 
+RESULTS_XPATH = etree.XPath(
+    "//div[contains(concat(' ', normalize-space(@class), ' '), ' grid-container-container ')]"
+)
+IMAGES_XPATH = etree.XPath(".//img[@src]")
+SVGS_XPATH = etree.XPath(".//svg")
+LINKS_XPATH = etree.XPath(".//a[@href]")
+
+
+# Candidates for the search input, most specific first
+SEARCH_INPUT_SELECTORS = [
+    (By.CSS_SELECTOR, "input[type='search']"),
+    (By.CSS_SELECTOR, "input[placeholder*='search' i]"),
+    (By.CSS_SELECTOR, "input[name='q']"),
+]
+# Any input is accepted after this many seconds without a specific match
+ANY_INPUT_AFTER = 3
+
+
+def _find_search_input(driver, timeout: int = 15):
+    """Locate the SciDraw search input, trying every selector on each poll.
+
+    One shared ``timeout`` covers all selectors, instead of a full wait per
+    selector that did not match.
+    """
+    start = time.monotonic()
+
+    def first_match(driver):
+        for by, value in SEARCH_INPUT_SELECTORS:
+            elements = driver.find_elements(by, value)
+            if elements:
+                return elements[0]
+        if time.monotonic() - start >= ANY_INPUT_AFTER:
+            elements = driver.find_elements(By.TAG_NAME, "input")
+            if elements:
+                return elements[0]
+        return False
 
-def scrape_scidraw(keyword, folder):
-    """Scrape scidraw.io for scientific drawings using real on-page search."""
-    print(f"\n[SciDraw] Searching for: {keyword}")
-    driver = None
     try:
-        driver = utils.get_driver()
+        return WebDriverWait(driver, timeout, poll_frequency=0.2).until(first_match)
+    except TimeoutException:
+        return None
+
+
+def results_url(keyword):
+    """Key of the results page for ``keyword`` in caches and cassettes.
 
+    The search runs through the home page's form, so this is not a URL
+    that is ever loaded.
+    """
+    return f"{HOME_URL}#search={quote(keyword)}"
+
+
+def _collect(keyword):
+    """Search SciDraw in the browser and extract images, inline SVGs and links."""
+    with utils.lease_driver() as driver:
         # 1) Open homepage
-        driver.get("https://scidraw.io/")
+        utils.load_page(driver, HOME_URL, HOME_READY_SELECTOR, READY_TIMEOUT)
 
         # 2) Find the search input on the page
         search_input = _find_search_input(driver)
         if not search_input:
-            print("  Could not locate SciDraw search input.")
-            return
+            raise RuntimeError("Could not locate SciDraw search input.")
 
-        # 3) Type the keyword and submit
+        # 3) Type the keyword and submit; the search is a second request
+        # to the same host
         try:
             search_input.clear()
         except Exception:
             pass
+        ratelimit.get_limiter().acquire(HOME_URL)
         search_input.send_keys(keyword)
         search_input.send_keys(Keys.ENTER)
 
-        # 4) Wait a bit for results to load
-        time.sleep(4)
+        # 4) Wait until the results grid has rendered an image
+        with spans.span("ready", selector=READY_SELECTOR) as wait:
+            wait.set(ready=utils.wait_for_ready(driver, READY_SELECTOR, READY_TIMEOUT))
 
-        # Optionally wait until at least one result image shows up
-        try:
-            WebDriverWait(driver, 10).until(
-                EC.presence_of_all_elements_located((By.CSS_SELECTOR, "img"))
-            )
-        except Exception:
-            # If this fails, we still try to parse whatever is loaded
-            pass
+        html = driver.page_source
+        cassette.record_page(results_url(keyword), html)
+
+    return _extract(html, keyword)
+
+
+def _extract(html, keyword):
+    """Extract images, inline SVGs and result links from a results page."""
+    with spans.span("extract", method="html", bytes=len(html)) as span:
+        candidates = _extract_candidates(html, keyword)
+        span.set(items=count_items(candidates))
+    return candidates
+
+
+def _extract_candidates(html, keyword):
+    root = parse_html(html)
+
+    # 5) Narrow down to the main results container if present
+    containers = RESULTS_XPATH(root)
+    search_scope = containers[0] if containers else root
+
+    # Find image/SVG elements only inside the results grid
+    images = []
+    for img in IMAGES_XPATH(search_scope)[:10]:
+        src = img.get("src")
+        if any(ext in src.lower() for ext in [".svg", ".png", ".jpg", ".jpeg"]):
+            img_url = urljoin(HOME_URL, src)
+            ext = ".svg" if ".svg" in src.lower() else ".png"
+            images.append([img_url, ext])
+
+    # 6) Also look for inline SVG elements directly
+    inline_svgs = [
+        lxml.html.tostring(svg, encoding="unicode", with_tail=False)
+        for svg in SVGS_XPATH(search_scope)[:5]
+    ]
+    inline_svgs = [svg for svg in inline_svgs if len(svg) > 100]  # Not tiny inline SVGs
+
+    # 7) Result links, saved if nothing could be downloaded
+    links = []
+    for a in LINKS_XPATH(search_scope):
+        href = a.get("href")
+        if keyword.lower() in href.lower():
+            links.append(href)
+
+    return {"images": images, "inline_svgs": inline_svgs, "links": links[:10]}
 
-        soup = BeautifulSoup(driver.page_source, "lxml")
-
-        # 5) Narrow down to the main results container if present
-        container = soup.find("div", class_="grid-container-container")
-        search_scope = container if container is not None else soup
-
-        # Find image/SVG elements only inside the results grid
-        downloaded = 0
-        images = search_scope.find_all("img", src=True)
-
-        for i, img in enumerate(images[:10]):
-            src = img["src"]
-            if any(ext in src.lower() for ext in [".svg", ".png", ".jpg", ".jpeg"]):
-                img_url = urljoin("https://scidraw.io", src)
-                ext = ".svg" if ".svg" in src.lower() else ".png"
-                filename = f"scidraw_{keyword}_{i+1}{ext}"
-                filepath = os.path.join(folder, filename)
-                if download_file(img_url, filepath):
-                    downloaded += 1
-
-        # 6) Also look for inline SVG elements directly
-        svgs = search_scope.find_all("svg")
-        for i, svg in enumerate(svgs[:5]):
-            if downloaded >= 10:
+
+def scrape_scidraw(keyword, folder):
+    """Scrape scidraw.io for scientific drawings using real on-page search."""
+    print(f"\n[SciDraw] Searching for: {keyword}")
+    try:
+        served = {"transport": CACHE}
+
+        def collect():
+            if cassette.replaying():
+                served["transport"] = REPLAY
+                return _extract(cassette.replay_page(results_url(keyword)), keyword)
+            # The search form needs JavaScript, so SciDraw always uses Chrome
+            served["transport"] = BROWSER
+            return _collect(keyword)
+
+        candidates = cached("scidraw", keyword, results_url(keyword), collect)
+
+        jobs = [
+            (img_url, os.path.join(folder, f"scidraw_{keyword}_{i}{ext}"))
+            for i, (img_url, ext) in enumerate(candidates["images"], 1)
+        ]
+        results = download_many(jobs)
+        downloaded = sum(r["ok"] for r in results)
+        failed = len(results) - downloaded
+
+        limit = get_downloader().limit
+        most = 10 if limit is None else min(10, limit)
+        for i, svg_content in enumerate(candidates["inline_svgs"], 1):
+            if downloaded >= most:
                 break
-            svg_content = str(svg)
-            if len(svg_content) > 100:  # Not tiny inline SVGs
-                filename = f"scidraw_svg_{keyword}_{i+1}.svg"
-                filepath = os.path.join(folder, filename)
-                with open(filepath, "w", encoding="utf-8") as f:
-                    f.write(svg_content)
-                downloaded += 1
-
-        # 7) If nothing downloaded, at least save some result links
+            filename = f"scidraw_svg_{keyword}_{i}.svg"
+            filepath = os.path.join(folder, filename)
+            with open(filepath, "w", encoding="utf-8") as f:
+                f.write(svg_content)
+            downloaded += 1
+
+        # If nothing downloaded, at least save some result links
+        links = []
         if downloaded == 0:
-            links = []
-            for a in search_scope.find_all("a", href=True):
-                href = a["href"]
-                if keyword.lower() in href.lower():
-                    links.append(href)
-            links = links[:10]
+            links = candidates["links"]
             if links:
                 save_links(os.path.join(folder, "links.txt"), links, "SciDraw")
 
+        return {
+            "downloaded": downloaded,
+            "links": len(links),
+            "failed": failed,
+            "transport": served["transport"],
+        }
+
     except Exception as e:
         print(f"  SciDraw error: {e}")
-    finally:
-        if driver:
-            driver.quit()
@@ -0,0 +1,190 @@
+"""Site descriptors for the scrapers built on :mod:`scrapers.engine`.
+
+Adding a site is a new entry in ``DESCRIPTORS`` (see :class:`engine.Site` for the
+keys) plus a ``scrape_<name>`` export below. ``ready`` is a CSS selector
+(it is handed to Selenium); containers, cards and rules are XPath.
+"""
+
+from .engine import Site
+
+DESCRIPTORS = [
+    {
+        "name": "bioicons",
+        "label": "BioIcons",
+        "search_url": "https://bioicons.com/?query={query}",
+        "base_url": "https://bioicons.com/",
+        "ready": "#app-grid img",
+        "container": "//div[@id='app-grid']",
+        # Results are <article>s in the grid with <img> pointing at the SVG
+        "images": {
+            "select": ".//img",
+            "attrs": ("src", "data-src"),
+            "match": [r"\.svg"],
+            "exclude": r"loading|static",
+            "ext": ".svg",
+        },
+        # Icon detail pages, saved if direct download doesn't work
+        "links": {
+            "select": ".//a[@href]",
+            "attrs": ("href",),
+            "match": [r"/icons?/"],
+            "scope": "page",
+        },
+    },
+    {
+        "name": "bioart",
+        "label": "BioArt",
+        "search_url": "https://bioart.niaid.nih.gov/discover?q={query}&sort=relevance",
+        "base_url": "https://bioart.niaid.nih.gov/",
+        "ready": "div[class*='MuiCard-root'] img[src*='/api/bioarts/']",
+        "item": ".//div[contains(@class, 'MuiCard-root')]",
+        "images": {
+            "select": ".//img[@src]",
+            "match": [r"/api/bioarts/"],
+            "exts": (".png", ".jpg"),
+            "ext": ".png",
+        },
+        "links": {
+            "select": ".//a[@href]",
+            "attrs": ("href",),
+            "match": [r"/bioart/"],
+            "limit": 20,
+        },
+        "links_file": "bioart_links.txt",
+        # Cards may be server-rendered; falls back to Chrome if not
+        "transport": "http",
+    },
+    {
+        "name": "flaticon",
+        "label": "Flaticon",
+        "search_url": "https://www.flaticon.com/search?word={query}",
+        "base_url": "https://www.flaticon.com/",
+        "ready": "section.search-result img",
+        "container": "//section[contains(concat(' ', normalize-space(@class), ' '), ' search-result ')]",
+        "images": {
+            "select": ".//img",
+            "attrs": ("src", "data-src"),
+            "exclude": r"placeholder|loading",
+            "exts": (".svg",),
+            "ext": ".png",
+        },
+        "links": {
+            "select": ".//a[@href]",
+            "attrs": ("href",),
+            "match": [r"/(free|premium)-icon/"],
+        },
+        "links_file": "flaticon_links.txt",
+    },
+    {
+        "name": "nounproject",
+        "label": "NounProject",
+        "search_url": "https://thenounproject.com/search/icons/?q={query}",
+        "base_url": "https://thenounproject.com/",
+        "ready": "div#browse-page-1 div[class*='GridItem'] img",
+        "container": (
+            "//div[@id='browse-page-1']",
+            "//div[contains(@class, 'GridContainer')]",
+        ),
+        "item": ".//div[contains(@class, 'GridItem')]",
+        "images": {
+            "select": ".//img[@src]",
+            "match": [r"static\.thenounproject\.com"],
+            "ext": ".png",
+        },
+        "links": {
+            "select": ".//a[@href]",
+            "attrs": ("href",),
+            "match": [r"/icon/"],
+        },
+        "links_file": "nounproject_links.txt",
+    },
+    {
+        "name": "svgrepo",
+        "label": "SVGRepo",
+        "search_url": "https://www.svgrepo.com/vectors/{query}/",
+        "base_url": "https://www.svgrepo.com/",
+        "ready": "div[class*='nodeListing'] div[class*='Node__'] img",
+        "container": "//div[contains(@class, 'nodeListing')]",
+        "item": ".//div[contains(@class, 'Node__')]",
+        "images": {
+            "select": ".//div[contains(@class, 'NodeImage')]//img[@src]",
+            "match": [r"\.svg", r"svgrepo\.com"],
+            "ext": ".svg",
+        },
+        "links": {
+            "select": ".//div[contains(@class, 'NodeImage')]//a[@href]",
+            "attrs": ("href",),
+            "match": [r"/svg/"],
+        },
+        # SVGs anywhere on the page, used when the node listing yields nothing
+        "fallback_images": {
+            "select": ".//img[@src]",
+            "match": [r"\.svg", r"svgrepo\.com/show/"],
+            "ext": ".svg",
+            "scope": "page",
+        },
+        "links_file": "svgrepo_links.txt",
+        # /vectors/<kw>/ is server-rendered
+        "transport": "http",
+    },
+    {
+        "name": "pixabay",
+        "label": "Pixabay",
+        "search_url": "https://pixabay.com/vectors/search/{query}/",
+        "base_url": "https://pixabay.com/",
+        "ready": "img[src*='pixabay.com']",
+        "ready_timeout": 10,
+        "images": {
+            "select": ".//img[@src]",
+            "match": [r"pixabay\.com", r"\.(png|jpg|svg)"],
+            # Ask for the higher resolution rendition
+            "rewrite": [("__340", "__480"), ("_340", "_480")],
+            "exts": (".png", ".svg"),
+            "ext": ".jpg",
+        },
+        "links": {
+            "select": ".//a[starts-with(@href, '/')]",
+            "attrs": ("href",),
+            "match": [r"/vectors/"],
+        },
+    },
+    {
+        "name": "freepik",
+        "label": "Freepik",
+        "search_url": "https://www.freepik.com/search?format=search&query={query}+icon",
+        "base_url": "https://www.freepik.com/",
+        "ready": "a[href*='/free-vector/'], a[href*='/premium-vector/'], a[href*='/free-icon/']",
+        "ready_timeout": 12,
+        "links": {
+            "select": ".//a[@href]",
+            "attrs": ("href",),
+            "match": [r"/free-vector/|/free-icon/|/premium-vector/"],
+        },
+        "links_file": "freepik_links.txt",
+    },
+    {
+        "name": "vecteezy",
+        "label": "Vecteezy",
+        "search_url": "https://www.vecteezy.com/free-vector/{query}",
+        "base_url": "https://www.vecteezy.com/",
+        "ready": "a[href*='/vector-art/'], a[href*='/free-vector/']",
+        "ready_timeout": 12,
+        "links": {
+            "select": ".//a[@href]",
+            "attrs": ("href",),
+            "match": [r"/vector-art/|/free-vector/"],
+        },
+        "links_file": "vecteezy_links.txt",
+    },
+]
+
+SITES = {d["name"]: Site(**d) for d in DESCRIPTORS}
+
+scrape_bioicons = SITES["bioicons"].scraper()
+scrape_bioart = SITES["bioart"].scraper()
+scrape_flaticon = SITES["flaticon"].scraper()
+scrape_nounproject = SITES["nounproject"].scraper()
+scrape_svgrepo = SITES["svgrepo"].scraper()
+scrape_pixabay = SITES["pixabay"].scraper()
+scrape_freepik = SITES["freepik"].scraper()
+scrape_vecteezy = SITES["vecteezy"].scraper()
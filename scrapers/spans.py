@@ -0,0 +1,231 @@
+"""Per-phase timing of scraping units, as a tree of spans.
+
+Each (source, keyword) unit is a root span; the phases it goes through
+(waiting for a browser, navigation, the readiness wait, extraction, every
+download and file write) are child spans with their own duration and
+attributes such as bytes, item counts and the class of any error.
+
+Spans nest through a per-thread stack. Work handed to another thread keeps
+its place in the tree with :func:`wrap` (the downloader's workers, the
+deadline thread) or :func:`activate` (pipeline stages, tab batches); work
+shared by several units runs :func:`detached` under a root span of its own.
+
+Nothing is recorded unless a :class:`Recorder` is installed with
+:func:`configure`; :func:`span` then costs a few attribute lookups. The run
+report (see ``bioimagedownloader.report``) is built from the recorded
+spans, and :meth:`Recorder.write_log` writes them as an OpenTelemetry-style
+JSON-lines span log.
+"""
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+_local = threading.local()
+_ids = iter(range(1, 1 << 62))
+_ids_lock = threading.Lock()
+
+
+def _next_id():
+    with _ids_lock:
+        return next(_ids)
+
+
+class Span:
+    """One timed phase.
+
+    Attributes:
+        name (str): Phase name, e.g. ``navigate`` or ``download``.
+        trace_id (int): Id shared by all spans of one unit.
+        span_id (int): Id of this span.
+        parent_id (int): Id of the enclosing span, or None for a root.
+        start (float): Wall-clock start, seconds since the epoch.
+        duration (float): Seconds, set when the span ends.
+        attrs (dict): Attributes such as ``url``, ``bytes`` or ``error``.
+    """
+
+    __slots__ = ("name", "trace_id", "span_id", "parent_id", "start", "duration",
+                 "attrs", "_t0", "_recorder")
+
+    def __init__(self, name, parent, recorder, attrs):
+        self.name = name
+        self.span_id = _next_id()
+        self.parent_id = parent.span_id if parent is not None else None
+        self.trace_id = parent.trace_id if parent is not None else self.span_id
+        self.start = time.time()
+        self.duration = None
+        self.attrs = attrs
+        self._t0 = time.perf_counter()
+        self._recorder = recorder
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def fail(self, error):
+        """Record the class of ``error`` (an exception or a class name)."""
+        self.attrs["error"] = error if isinstance(error, str) else type(error).__name__
+
+    def end(self):
+        if self.duration is None:
+            self.duration = time.perf_counter() - self._t0
+            self._recorder.add(self)
+
+    def to_dict(self):
+        """The span in an OpenTelemetry-like JSON shape."""
+        end = self.start + (self.duration or 0.0)
+        return {
+            "traceId": f"{self.trace_id:032x}",
+            "spanId": f"{self.span_id:016x}",
+            "parentSpanId": f"{self.parent_id:016x}" if self.parent_id else None,
+            "name": self.name,
+            "startTimeUnixNano": int(self.start * 1e9),
+            "endTimeUnixNano": int(end * 1e9),
+            "attributes": self.attrs,
+            "status": {"code": "ERROR" if "error" in self.attrs else "OK"},
+        }
+
+
+class _NoSpan:
+    """Stands in for a span while nothing is being recorded."""
+
+    span_id = trace_id = None
+
+    def set(self, **attrs):
+        pass
+
+    def fail(self, error):
+        pass
+
+    def end(self):
+        pass
+
+
+NO_SPAN = _NoSpan()
+
+
+class Recorder:
+    """Collects finished spans in memory."""
+
+    def __init__(self):
+        self._spans = []
+        self._lock = threading.Lock()
+
+    def add(self, span):
+        with self._lock:
+            self._spans.append(span)
+
+    def spans(self):
+        with self._lock:
+            return list(self._spans)
+
+    def write_log(self, path):
+        """Write every finished span as one JSON object per line."""
+        tmp = f"{path}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            for span in sorted(self.spans(), key=lambda s: s.start):
+                f.write(json.dumps(span.to_dict()) + "\n")
+        os.replace(tmp, path)
+
+
+_recorder = None
+
+
+def configure(recorder):
+    """Install ``recorder`` (a :class:`Recorder` or None) for all scrapers."""
+    global _recorder
+    _recorder = recorder
+
+
+def get_recorder():
+    return _recorder
+
+
+def _stack():
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+    return stack
+
+
+def current():
+    """The innermost open span of this thread, or None."""
+    stack = _stack()
+    return stack[-1] if stack else None
+
+
+def start(name, parent=None, **attrs):
+    """Open a span without entering it; the caller must :meth:`~Span.end` it.
+
+    ``parent`` defaults to the current span; the span is a new root if
+    there is none.
+    """
+    recorder = _recorder
+    if recorder is None:
+        return NO_SPAN
+    if parent is None:
+        parent = current()
+    if parent is NO_SPAN:
+        parent = None
+    return Span(name, parent, recorder, attrs)
+
+
+@contextmanager
+def span(name, parent=None, **attrs):
+    """Time the ``with`` block as a child of ``parent`` or the current span.
+
+    The opened span is current inside the block. An exception escaping the
+    block is recorded as the span's ``error``.
+    """
+    opened = start(name, parent, **attrs)
+    if opened is NO_SPAN:
+        yield opened
+        return
+    stack = _stack()
+    stack.append(opened)
+    try:
+        yield opened
+    except BaseException as e:
+        opened.fail(e)
+        raise
+    finally:
+        stack.pop()
+        opened.end()
+
+
+@contextmanager
+def activate(parent):
+    """Make ``parent`` (a span from another thread, or None) the current span."""
+    if parent is None or parent is NO_SPAN:
+        yield
+        return
+    stack = _stack()
+    stack.append(parent)
+    try:
+        yield
+    finally:
+        stack.pop()
+
+
+@contextmanager
+def detached():
+    """Run the ``with`` block outside any span, so new spans are roots."""
+    stack = _stack()
+    stack.append(None)
+    try:
+        yield
+    finally:
+        stack.pop()
+
+
+def wrap(func):
+    """Bind ``func`` to the current span, for running it in another thread."""
+    parent = current()
+    if parent is None:
+        return func
+
+    def run(*args, **kwargs):
+        with activate(parent):
+            return func(*args, **kwargs)
+    return run
@@ -0,0 +1,74 @@
+"""Content-addressed asset store used to deduplicate downloads."""
+
+import os
+import shutil
+import threading
+
+
+class ObjectStore:
+    """Keep one copy of each unique asset under ``root/<sha256>``.
+
+    Keyword folders get hardlinks (or symlinks, or as a last resort copies)
+    to the stored objects, so the same icon found under several keywords or
+    sources occupies disk space once. URLs already resolved during this run
+    are remembered, so a repeated URL is linked without being fetched again.
+
+    Args:
+        root (str): Object directory, e.g. ``Output/.objects``.
+        link (str): ``"hard"`` (default) or ``"symlink"``.
+    """
+
+    def __init__(self, root, link="hard"):
+        self.root = root
+        self.link_mode = link
+        self._urls = {}
+        self._lock = threading.Lock()
+        os.makedirs(root, exist_ok=True)
+
+    def path(self, digest):
+        """Return the object path for a hex ``digest``."""
+        return os.path.join(self.root, digest)
+
+    def has(self, digest):
+        return os.path.exists(self.path(digest))
+
+    def add(self, src, digest):
+        """Move ``src`` into the store, or drop it if ``digest`` is present.
+
+        Returns:
+            bool: True if ``src`` was a new object, False if a duplicate.
+        """
+        target = self.path(digest)
+        if os.path.exists(target):
+            os.remove(src)
+            return False
+        os.replace(src, target)
+        return True
+
+    def link(self, digest, dest):
+        """Make ``dest`` refer to the object ``digest``."""
+        source = self.path(digest)
+        if os.path.lexists(dest):
+            os.remove(dest)
+        if self.link_mode == "hard":
+            try:
+                os.link(source, dest)
+                return
+            except OSError:
+                pass
+        try:
+            os.symlink(os.path.relpath(source, os.path.dirname(dest) or "."), dest)
+        except OSError:
+            shutil.copyfile(source, dest)
+
+    def lookup_url(self, url):
+        """Return ``(digest, ext)`` for a URL stored earlier, or None."""
+        with self._lock:
+            entry = self._urls.get(url)
+        if entry and self.has(entry[0]):
+            return entry
+        return None
+
+    def remember(self, url, digest, ext):
+        with self._lock:
+            self._urls[url] = (digest, ext)
@@ -0,0 +1,71 @@
+"""Plain HTTP transport for result pages that render without JavaScript.
+
+Sources whose search or detail pages are usable without a browser are
+fetched over the downloader's pooled sessions first; the browser is only
+used when that fails, is blocked or yields nothing (see
+:func:`fetch_page` and :meth:`engine.Site.collect`).
+"""
+
+import re
+
+import requests
+
+from . import cassette, spans
+from .downloader import get_downloader
+
+HTTP = "http"
+BROWSER = "browser"
+CACHE = "cache"
+REPLAY = "replay"
+
+PAGE_TIMEOUT = 15
+
+PAGE_HEADERS = {
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.9",
+}
+
+# Status codes and markers of bot-protection interstitials
+CHALLENGE_STATUSES = frozenset({401, 403, 429, 503})
+CHALLENGE_RE = re.compile(
+    r"cf-browser-verification|cf-challenge|challenge-platform|"
+    r"<title>\s*(just a moment|attention required|access denied)|"
+    r"captcha-delivery|px-captcha|enable javascript and cookies",
+    re.IGNORECASE,
+)
+
+
+def is_challenge(status, text):
+    """True if a response looks like a block or bot-check page."""
+    return status in CHALLENGE_STATUSES or bool(CHALLENGE_RE.search(text[:20000]))
+
+
+def fetch_page(url):
+    """Fetch ``url`` without a browser.
+
+    Returns:
+        str or None: The page text, or None if the request failed, was
+        not a 200, or returned a challenge page. When replaying a cassette,
+        the recorded page or None.
+    """
+    if cassette.replaying():
+        return cassette.page(url)
+    with spans.span("fetch", url=url) as span:
+        try:
+            resp = get_downloader().get_page(url, headers=PAGE_HEADERS, timeout=PAGE_TIMEOUT)
+        except requests.RequestException as e:
+            span.fail(e)
+            print(f"  HTTP fetch failed ({e.__class__.__name__})")
+            return None
+        text = resp.text
+        span.set(status=resp.status_code, bytes=len(resp.content))
+        if is_challenge(resp.status_code, text):
+            span.fail("Challenge")
+            print(f"  HTTP fetch blocked ({resp.status_code})")
+            return None
+        if resp.status_code != 200:
+            span.fail(f"HTTP{resp.status_code}")
+            print(f"  HTTP fetch returned {resp.status_code}")
+            return None
+    cassette.record_page(url, text)
+    return text
@@ -1,106 +1,55 @@
 """Shared utility functions for all scrapers."""
 
+import atexit
 import os
-import platform
-import re
-import shutil
-import subprocess
-import requests
+import threading
+import time
+from contextlib import contextmanager
+
 import undetected_chromedriver as uc
+from selenium.common.exceptions import TimeoutException, WebDriverException
+from selenium.webdriver.common.by import By
+from selenium.webdriver.support import expected_conditions as EC
+from selenium.webdriver.support.ui import WebDriverWait
+
+from . import blocking, cassette, chromeprobe, ratelimit, spans, watchdog
+from .downloader import get_downloader
+
+# Set on every driver, so a hung page or script cannot block a call forever
+PAGE_LOAD_TIMEOUT = 30
+SCRIPT_TIMEOUT = 20
+
+# Chrome prefs that keep permission prompts and popups out of the way
+BROWSER_PREFS = {
+    "profile.default_content_setting_values.notifications": 2,
+    "profile.default_content_setting_values.geolocation": 2,
+    "profile.default_content_setting_values.media_stream": 2,
+    "profile.default_content_setting_values.popups": 2,
+}
+
+# Sums the transfer sizes the page reports (cross-origin resources without
+# Timing-Allow-Origin count as 0, so this is a lower bound), and the HTTP
+# status of the document where the browser exposes it
+PAGE_METRICS_SCRIPT = """
+const nav = performance.getEntriesByType('navigation')[0];
+const res = performance.getEntriesByType('resource');
+let bytes = nav ? nav.transferSize : 0;
+for (const r of res) bytes += r.transferSize;
+return {bytes: bytes, requests: res.length + 1,
+        status: nav && nav.responseStatus ? nav.responseStatus : null};
+"""
 
 
 def detect_chrome_version():
     """Detect the installed Chrome major version (Windows, macOS, Linux).
 
+    The result is cached on disk per Chrome binary and mtime, see
+    :mod:`scrapers.chromeprobe`.
+
     Returns:
         int or None: The major version number, or None if detection fails.
     """
-    system = platform.system()
-
-    # ----- Windows -----
-    if system == "Windows":
-        try:
-            import winreg
-            try:
-                key = winreg.OpenKey(
-                    winreg.HKEY_CURRENT_USER,
-                    r"Software\Google\Chrome\BLBeacon",
-                )
-                version, _ = winreg.QueryValueEx(key, "version")
-                winreg.CloseKey(key)
-                major = int(version.split(".")[0])
-                print(f"[utils] Detected Chrome version {major} (Windows registry)")
-                return major
-            except (FileNotFoundError, OSError):
-                pass
-        except ImportError:
-            pass
-
-        # Fall back to running chrome.exe --version
-        win_paths = [
-            os.path.expandvars(r"%ProgramFiles%\Google\Chrome\Application\chrome.exe"),
-            os.path.expandvars(r"%ProgramFiles(x86)%\Google\Chrome\Application\chrome.exe"),
-            os.path.expandvars(r"%LocalAppData%\Google\Chrome\Application\chrome.exe"),
-        ]
-        for chrome_path in win_paths:
-            ver = _version_from_binary(chrome_path)
-            if ver:
-                return ver
-
-    # ----- macOS -----
-    elif system == "Darwin":
-        mac_paths = [
-            "/Applications/Google Chrome.app/Contents/MacOS/Google Chrome",
-            "/Applications/Chromium.app/Contents/MacOS/Chromium",
-            os.path.expanduser(
-                "~/Applications/Google Chrome.app/Contents/MacOS/Google Chrome"
-            ),
-        ]
-        for path in mac_paths:
-            ver = _version_from_binary(path)
-            if ver:
-                return ver
-
-    # ----- Linux (also used as final fallback for other OSes) -----
-    linux_names = [
-        "google-chrome",
-        "google-chrome-stable",
-        "google-chrome-beta",
-        "google-chrome-dev",
-        "chromium-browser",
-        "chromium",
-    ]
-    for name in linux_names:
-        binary = shutil.which(name)
-        if binary:
-            ver = _version_from_binary(binary)
-            if ver:
-                return ver
-
-    print("[utils] Could not auto-detect Chrome version on any platform.")
-    return None
-
-
-def _version_from_binary(binary_path):
-    """Run ``<binary> --version`` and return the major version int, or None."""
-    if not os.path.exists(binary_path):
-        return None
-    try:
-        result = subprocess.run(
-            [binary_path, "--version"],
-            capture_output=True,
-            text=True,
-            timeout=10,
-        )
-        output = result.stdout.strip() or result.stderr.strip()
-        match = re.search(r"(\d+)\.\d+\.\d+", output)
-        if match:
-            major = int(match.group(1))
-            print(f"[utils] Detected Chrome version {major} from: {binary_path}")
-            return major
-    except (subprocess.SubprocessError, OSError) as e:
-        print(f"[utils] Failed to get version from {binary_path}: {e}")
-    return None
+    return chromeprobe.probe()["version_main"]
 
 
 def _create_chrome_options(headless: bool = True):
@@ -112,6 +61,10 @@ def _create_chrome_options(headless: bool = True):
     options.add_argument("--disable-extensions")
     options.add_argument("--no-first-run")
     options.add_argument("--no-default-browser-check")
+    # Keep pages in background tabs rendering at full speed (see load_in_tabs)
+    options.add_argument("--disable-background-timer-throttling")
+    options.add_argument("--disable-renderer-backgrounding")
+    options.add_argument("--disable-backgrounding-occluded-windows")
 
     if headless:
         options.add_argument("--headless=new")
@@ -119,9 +72,24 @@ def _create_chrome_options(headless: bool = True):
     else:
         options.add_argument("--start-maximized")
 
+    apply_browser_policy(options)
     return options
 
 
+def apply_browser_policy(options):
+    """Apply the resource policy shared by every scraping browser.
+
+    With blocking enabled (see :mod:`scrapers.blocking`) pages load with the
+    ``eager`` strategy, so ``driver.get`` returns at DOMContentLoaded and
+    :func:`wait_for_ready` takes over; media autoplay is disabled.
+    Per-source URL blocking is applied on every lease by :func:`lease_driver`.
+    """
+    if blocking.is_enabled():
+        options.page_load_strategy = "eager"
+        options.add_argument("--autoplay-policy=user-gesture-required")
+    options.add_experimental_option("prefs", dict(BROWSER_PREFS))
+
+
 def get_driver(headless: bool = True):
     """Create and return an undetected Chrome driver.
 
@@ -136,6 +104,18 @@ def get_driver(headless: bool = True):
     Returns:
         Chrome driver instance.
     """
+    return launch_driver(lambda: _create_chrome_options(headless))
+
+
+def launch_driver(make_options):
+    """Start an undetected Chrome with options built by ``make_options()``.
+
+    The Chrome version comes from ``CHROME_VERSION_MAIN`` or the cached probe.
+    The chromedriver patched on the first launch is kept and reused (see
+    :mod:`scrapers.chromeprobe`), so later launches skip the download and
+    patching. If the kept binary fails to start, it is dropped and a fresh
+    one is patched.
+    """
     # Allow overriding Chrome major version via environment variable.
     version_main_env = os.getenv("CHROME_VERSION_MAIN")
     version_main = None
@@ -156,41 +136,373 @@ def get_driver(headless: bool = True):
         version_main = detect_chrome_version()
 
     # Create fresh options - ChromeOptions cannot be reused
-    options = _create_chrome_options(headless)
-    driver_kwargs = {"options": options, "use_subprocess": True}
-    
+    driver_kwargs = {"options": make_options(), "use_subprocess": True}
     if version_main:
         driver_kwargs["version_main"] = version_main
+    cached = chromeprobe.cached_driver(version_main) if version_main else None
+    if cached:
+        driver_kwargs["driver_executable_path"] = cached
 
     try:
         driver = uc.Chrome(**driver_kwargs)
-        return driver
     except Exception as e:
         print(f"[utils.get_driver] Driver creation failed: {e}")
+        if cached:
+            print("[utils.get_driver] Dropping the kept chromedriver")
+            chromeprobe.forget_driver()
+            cached = None
         # Create fresh options for retry - cannot reuse ChromeOptions
-        options2 = _create_chrome_options(headless)
         print("[utils.get_driver] Retrying with fresh options...")
-        driver = uc.Chrome(options=options2, use_subprocess=True)
-        return driver
+        driver = uc.Chrome(options=make_options(), use_subprocess=True)
+    if not cached:
+        patcher = getattr(driver, "patcher", None)
+        if patcher is not None:
+            chromeprobe.remember_driver(patcher.executable_path, patcher.version_main)
+    return set_timeouts(driver)
 
 
-def download_file(url, filepath, headers=None):
-    """Download a file from URL to filepath."""
+def set_timeouts(driver, page_load=PAGE_LOAD_TIMEOUT, script=SCRIPT_TIMEOUT):
+    """Apply the default page-load and script timeouts to ``driver`` and return it."""
+    driver.set_page_load_timeout(page_load)
+    driver.set_script_timeout(script)
+    return driver
+
+
+class DriverPool:
+    """A small pool of warm Chrome drivers shared by all scrapers.
+
+    Drivers are leased with :meth:`lease` and handed back afterwards instead
+    of being quit, so a batch run pays the browser launch cost once per pool
+    slot rather than once per scraper call. Between leases each driver is
+    reset (extra tabs closed, cookies cleared, ``about:blank`` loaded). A
+    driver is recycled after ``max_uses`` leases, or immediately if it
+    crashed or could not be reset.
+
+    Args:
+        max_size (int): Maximum number of live drivers. Defaults to 1.
+        max_uses (int): Leases before a driver is quit and replaced.
+        headless (bool): Passed through to :func:`get_driver`.
+    """
+
+    def __init__(self, max_size: int = 1, max_uses: int = 50, headless: bool = True):
+        self.max_size = max(1, max_size)
+        self.max_uses = max_uses
+        self.headless = headless
+        self._idle = []  # [driver, uses] pairs ready to be leased
+        self._live = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        # Serialise launches: undetected_chromedriver downloads and patches
+        # its driver binary on creation, which is not safe to run in parallel.
+        self._launch_lock = threading.Lock()
+
+    def resize(self, max_size: int):
+        """Allow up to ``max_size`` live drivers.
+
+        When shrinking, idle drivers beyond the new limit are quit now and
+        leased ones when they are handed back.
+        """
+        with self._cond:
+            self.max_size = max(1, max_size)
+            surplus = []
+            while self._idle and self._live > self.max_size:
+                surplus.append(self._idle.pop(0))
+                self._live -= 1
+            self._cond.notify_all()
+        for driver, _ in surplus:
+            _quit_driver(driver)
+
+    def warm(self, count=None):
+        """Launch drivers until ``count`` (at most ``max_size``) are idle.
+
+        Lets a long-running process pay the browser launch cost up front
+        rather than in its first leases.
+        """
+        count = self.max_size if count is None else min(count, self.max_size)
+        entries = []
+        try:
+            while len(entries) < count:
+                entries.append(self._acquire())
+        finally:
+            for entry in entries:
+                self._release(entry, False)
+
+    def stats(self):
+        """``live``, ``idle`` and ``max`` driver counts."""
+        with self._cond:
+            return {"live": self._live, "idle": len(self._idle), "max": self.max_size}
+
+    def _acquire(self):
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise RuntimeError("DriverPool is closed")
+                if self._idle:
+                    return self._idle.pop()
+                if self._live < self.max_size:
+                    self._live += 1
+                    break
+                self._cond.wait()
+        try:
+            # Module-level lookup so callers that patch utils.get_driver
+            # (e.g. the headless script) are honoured.
+            with self._launch_lock:
+                return [get_driver(self.headless), 0]
+        except Exception:
+            with self._cond:
+                self._live -= 1
+                self._cond.notify()
+            raise
+
+    def _release(self, entry, broken: bool):
+        driver, uses = entry
+        if not broken and uses < self.max_uses and not self._closed:
+            broken = not _reset_driver(driver)
+        with self._cond:
+            # Decided with the count it changes, so a concurrent resize or
+            # release sees either this driver kept or already gone
+            keep = (not broken and uses < self.max_uses and not self._closed
+                    and self._live <= self.max_size)
+            if keep:
+                self._idle.append(entry)
+            else:
+                self._live -= 1
+            self._cond.notify()
+        if not keep:
+            _quit_driver(driver)
+
+    @contextmanager
+    def lease(self):
+        """Lease a driver for the duration of a ``with`` block.
+
+        A :class:`WebDriverException` escaping the block marks the driver as
+        crashed, so it is quit and replaced rather than reused.
+        """
+        # Includes launching a browser when none is warm
+        with spans.span("driver.acquire"):
+            entry = self._acquire()
+        entry[1] += 1
+        broken = False
+        try:
+            yield entry[0]
+        except WebDriverException:
+            broken = True
+            raise
+        finally:
+            self._release(entry, broken)
+
+    def close(self):
+        """Quit all idle drivers and refuse further leases."""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._live -= len(idle)
+            self._cond.notify_all()
+        for driver, _ in idle:
+            _quit_driver(driver)
+
+
+def _reset_driver(driver):
+    """Return a driver to a clean state. Returns False if it is unusable."""
     try:
-        if headers is None:
-            headers = {
-                "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64) "
-                "AppleWebKit/537.36"
-            }
-        resp = requests.get(url, headers=headers, timeout=30)
-        if resp.status_code == 200:
-            with open(filepath, "wb") as f:
-                f.write(resp.content)
-            print(f"  Downloaded: {os.path.basename(filepath)}")
-            return True
+        handles = driver.window_handles
+        for handle in handles[1:]:
+            driver.switch_to.window(handle)
+            driver.close()
+        driver.switch_to.window(handles[0])
+        driver.delete_all_cookies()
+        driver.get("about:blank")
+        return True
     except Exception as e:
-        print(f"  Failed to download {url}: {e}")
-    return False
+        print(f"[utils.DriverPool] Discarding driver after failed reset: {e}")
+        return False
+
+
+def _quit_driver(driver):
+    try:
+        driver.quit()
+    except Exception:
+        pass
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_pool():
+    """Return the process-wide :class:`DriverPool`, creating it on first use."""
+    global _pool
+    with _pool_lock:
+        if _pool is None or _pool._closed:
+            _pool = DriverPool()
+        return _pool
+
+
+@contextmanager
+def lease_driver(profile=None):
+    """Lease a warm driver from the shared pool (use as a context manager).
+
+    Args:
+        profile (BlockingProfile): Network blocking for this source, see
+            :mod:`scrapers.blocking`. Defaults to blocking everything.
+    """
+    with get_pool().lease() as driver:
+        # Lets the unit's deadline kill this browser (see scrapers.watchdog)
+        watchdog.attach(driver)
+        try:
+            blocking.apply(driver, profile)
+            yield driver
+        finally:
+            watchdog.detach(driver)
+
+
+@atexit.register
+def shutdown_pool():
+    """Quit every pooled driver. Registered to run at interpreter exit."""
+    with _pool_lock:
+        pool = _pool
+    if pool is not None:
+        pool.close()
+
+
+def wait_for_ready(driver, selector, timeout=15, poll=0.2):
+    """Wait until ``selector`` (CSS) matches at least one element.
+
+    Replaces fixed ``time.sleep`` calls after ``driver.get``: the wait ends as
+    soon as the source's results are rendered, and is capped by ``timeout``.
+    On timeout the caller should still parse whatever has loaded.
+
+    Args:
+        driver: Selenium driver.
+        selector (str): CSS selector that signals the results are ready.
+        timeout (float): Maximum seconds to wait.
+        poll (float): Polling interval in seconds.
+
+    Returns:
+        bool: True if the page became ready, False on timeout.
+    """
+    try:
+        WebDriverWait(driver, timeout, poll_frequency=poll).until(
+            EC.presence_of_element_located((By.CSS_SELECTOR, selector))
+        )
+        return True
+    except TimeoutException:
+        print(f"  Page not ready after {timeout}s (waiting for {selector!r})")
+        return False
+
+
+def load_page(driver, url, selector, timeout=15):
+    """Navigate to ``url``, wait for ``selector`` and report the page cost.
+
+    Returns:
+        dict: ``ready`` (bool), ``seconds`` until ready (or timeout),
+        ``bytes`` transferred, ``requests`` made and the document's HTTP
+        ``status`` (or None), as reported by the page's Performance API.
+        The status feeds the host's rate in :mod:`scrapers.ratelimit`.
+    """
+    limiter = ratelimit.get_limiter()
+    limiter.acquire(url)
+    print(f"  Loading: {url}")
+    start = time.perf_counter()
+    with spans.span("navigate", url=url) as navigate:
+        try:
+            driver.get(url)
+        except TimeoutException as e:
+            navigate.fail(e)
+            limiter.record(url, timeout=True)
+            print(f"  Page load timed out after {PAGE_LOAD_TIMEOUT}s, using what has loaded")
+            try:
+                driver.execute_script("window.stop();")
+            except WebDriverException:
+                pass
+    with spans.span("ready", selector=selector) as wait:
+        ready = wait_for_ready(driver, selector, timeout)
+        wait.set(ready=ready)
+    metrics = _page_metrics(driver, ready, time.perf_counter() - start)
+    navigate.set(bytes=metrics["bytes"], requests=metrics["requests"], status=metrics["status"])
+    limiter.record(url, status=metrics.get("status"))
+    if cassette.recording():
+        cassette.record_page(url, driver.page_source)
+    return metrics
+
+
+def _page_metrics(driver, ready, seconds, label=""):
+    """Collect and print the cost of the page in the driver's current tab."""
+    metrics = {"ready": ready, "seconds": round(seconds, 2)}
+    try:
+        metrics.update(driver.execute_script(PAGE_METRICS_SCRIPT))
+    except WebDriverException:
+        metrics.update(bytes=None, requests=None, status=None)
+    if metrics["bytes"] is not None:
+        print(
+            f"  {label}Page ready in {metrics['seconds']:.1f}s "
+            f"({metrics['bytes'] // 1024} KiB, {metrics['requests']} requests)"
+        )
+    return metrics
+
+
+def load_in_tabs(driver, pages, poll=0.2):
+    """Load several pages at once, one tab each, in a single browser.
+
+    Every page gets a new tab with its own blocking profile and its
+    navigation is started without waiting for it, so all pages load
+    concurrently. Tabs are then polled in turn until each one's selector
+    matches or its timeout expires. The tabs are left open for the caller to
+    read (switch to them with ``driver.switch_to.window``) and close; the
+    pool closes any that are left when the driver is handed back.
+
+    Args:
+        driver: Selenium driver, e.g. from :func:`lease_driver`.
+        pages (list): ``(url, selector, timeout, profile)`` tuples, where
+            ``selector`` is CSS and ``profile`` a ``BlockingProfile`` or None.
+        poll (float): Seconds between polling rounds.
+
+    Returns:
+        list of tuple: ``(handle, metrics)`` per page, in the order given,
+        with ``metrics`` as returned by :func:`load_page`.
+    """
+    limiter = ratelimit.get_limiter()
+    start = time.perf_counter()
+    handles = []
+    for url, _, _, profile in pages:
+        limiter.acquire(url)
+        driver.switch_to.new_window("tab")
+        blocking.apply(driver, profile)
+        print(f"  Loading in tab: {url}")
+        # location.href returns at once, unlike driver.get
+        driver.execute_script("window.location.href = arguments[0];", url)
+        handles.append(driver.current_window_handle)
+
+    pending = dict(enumerate(pages))
+    finished = {}
+    while pending:
+        for i, (url, selector, timeout, _) in list(pending.items()):
+            driver.switch_to.window(handles[i])
+            elapsed = time.perf_counter() - start
+            if driver.find_elements(By.CSS_SELECTOR, selector):
+                finished[i] = (True, elapsed)
+            elif elapsed >= timeout:
+                print(f"  Page not ready after {timeout}s (waiting for {selector!r})")
+                finished[i] = (False, elapsed)
+            else:
+                continue
+            del pending[i]
+        if pending:
+            time.sleep(poll)
+
+    loaded = []
+    for i, (url, *_) in enumerate(pages):
+        driver.switch_to.window(handles[i])
+        ready, seconds = finished[i]
+        metrics = _page_metrics(driver, ready, seconds, f"[{url}] ")
+        limiter.record(url, status=metrics.get("status"))
+        loaded.append((handles[i], metrics))
+    return loaded
+
+
+def download_file(url, filepath, headers=None):
+    """Download a file from URL to filepath."""
+    return get_downloader().fetch(url, filepath, headers)["ok"]
 
 
 def save_links(filepath, links, source_name):
@@ -0,0 +1,155 @@
+"""Wall-clock deadlines for scraping units, enforced by killing the browser.
+
+A stalled page can block a Selenium call for minutes, and a thread cannot be
+interrupted from outside. :func:`run_with_deadline` therefore runs a unit in
+its own thread and, if it overruns, kills the process tree (chromedriver,
+Chrome and its renderers) of every driver the unit leased. Blocked WebDriver
+calls then fail at once, the pool discards the dead driver, and the caller
+records a timeout instead of waiting any longer.
+
+Drivers are attached to the running unit by :func:`utils.lease_driver`. A
+unit that times out while still waiting for a driver gets
+:class:`DeadlineExceeded` as soon as it is handed one.
+"""
+
+import os
+import signal
+import subprocess
+import threading
+
+from . import profiling, spans
+
+# Seconds to let a unit unwind after its browser was killed
+GRACE = 5
+
+_local = threading.local()
+
+
+class DeadlineExceeded(Exception):
+    """A unit ran past its deadline and was abandoned."""
+
+
+class _Guard:
+    """Deadline state of one unit: the drivers it holds and whether it expired."""
+
+    def __init__(self, label):
+        self.label = label
+        self.expired = False
+        self.drivers = []
+        self._lock = threading.Lock()
+
+    def expire(self):
+        with self._lock:
+            self.expired = True
+            drivers = list(self.drivers)
+        for driver in drivers:
+            kill_browser(driver)
+
+
+def run_with_deadline(label, seconds, func, *args):
+    """Call ``func(*args)``, giving up after ``seconds`` (None or 0: no limit).
+
+    Raises:
+        DeadlineExceeded: The call did not finish in time. Its browsers have
+            been killed; the call itself may still be unwinding in the
+            background.
+    """
+    if not seconds:
+        return func(*args)
+    guard = _Guard(label)
+    box = {}
+    func = profiling.wrap(spans.wrap(func))
+
+    def target():
+        _local.guard = guard
+        try:
+            box["result"] = func(*args)
+        except BaseException as e:
+            box["error"] = e
+
+    thread = threading.Thread(target=target, name=f"deadline-{label}", daemon=True)
+    thread.start()
+    thread.join(seconds)
+    if thread.is_alive():
+        print(f"[watchdog] {label} missed its deadline, killing its browser")
+        guard.expire()
+        thread.join(GRACE)
+        raise DeadlineExceeded(f"timed out after {seconds:.0f}s")
+    if "error" in box:
+        raise box["error"]
+    return box.get("result")
+
+
+def attach(driver):
+    """Register ``driver`` with the calling thread's unit, if it has a deadline."""
+    guard = getattr(_local, "guard", None)
+    if guard is None:
+        return
+    with guard._lock:
+        if guard.expired:
+            raise DeadlineExceeded(f"{guard.label} already timed out")
+        guard.drivers.append(driver)
+
+
+def detach(driver):
+    guard = getattr(_local, "guard", None)
+    if guard is None:
+        return
+    with guard._lock:
+        if driver in guard.drivers:
+            guard.drivers.remove(driver)
+
+
+def kill_browser(driver):
+    """Kill chromedriver and Chrome (with all their children) behind ``driver``."""
+    pids = []
+    service = getattr(driver, "service", None)
+    process = getattr(service, "process", None)
+    if process is not None:
+        pids.append(process.pid)
+    browser_pid = getattr(driver, "browser_pid", None)
+    if browser_pid:
+        pids.append(browser_pid)
+    for pid in pids:
+        _kill_tree(pid)
+
+
+def _kill_tree(pid):
+    if os.name == "nt":
+        subprocess.run(
+            ["taskkill", "/F", "/T", "/PID", str(pid)],
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        return
+    # Children first, so none is re-parented and missed
+    for child in _children(pid):
+        _kill_tree(child)
+    try:
+        os.kill(pid, signal.SIGKILL)
+    except OSError:
+        pass
+
+
+def _children(pid):
+    """Direct child PIDs of ``pid`` (from /proc, or ``pgrep`` elsewhere)."""
+    if os.path.isdir("/proc"):
+        children = []
+        for entry in os.listdir("/proc"):
+            if not entry.isdigit():
+                continue
+            try:
+                with open(f"/proc/{entry}/stat") as f:
+                    # The command name may contain spaces; ppid follows it
+                    ppid = int(f.read().rsplit(")", 1)[1].split()[1])
+            except (OSError, IndexError, ValueError):
+                continue
+            if ppid == pid:
+                children.append(int(entry))
+        return children
+    try:
+        out = subprocess.run(
+            ["pgrep", "-P", str(pid)], capture_output=True, text=True, timeout=5
+        ).stdout
+    except (OSError, subprocess.SubprocessError):
+        return []
+    return [int(p) for p in out.split()]
@@ -0,0 +1,39 @@
+"""Tests for bioimagedownloader.journal."""
+
+import os
+
+from bioimagedownloader.journal import Journal
+
+
+def _result(keyword, source, status="ok"):
+    return {
+        "keyword": keyword,
+        "source": source,
+        "status": status,
+        "downloaded": 1,
+        "links": 0,
+        "error": None,
+    }
+
+
+def test_record_after_torn_line_survives_reload(tmp_path):
+    path = str(tmp_path / "journal.jsonl")
+    journal = Journal(path)
+    journal.record(_result("DNA", "bioicons"))
+    journal.record(_result("DNA", "svgrepo"))
+    journal.close()
+
+    # Crash in the middle of the last record
+    with open(path, "rb+") as f:
+        f.truncate(os.path.getsize(path) - 10)
+
+    journal = Journal(path)
+    assert journal.is_complete("DNA", "bioicons")
+    assert not journal.is_complete("DNA", "svgrepo")
+    journal.record(_result("DNA", "flaticon"))
+    journal.close()
+
+    journal = Journal(path)
+    assert journal.is_complete("DNA", "bioicons")
+    assert journal.is_complete("DNA", "flaticon")
+    journal.close()